@@ -1,4 +1,13 @@
-from collections import OrderedDict
+import contextlib
+import contextvars
+import copy
+import hashlib
+import itertools
+import json
+import sys
+import types
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 
 
 def sorted_values_by_key(d):
@@ -6,9 +15,10 @@ def sorted_values_by_key(d):
 
 
 class OrderedSet:
+    __slots__ = ('d',)
 
     def __init__(self):
-        self.d = OrderedDict()
+        self.d = {}
 
     def add(self, x):
         if x not in self.d:
@@ -34,11 +44,25 @@ class Scope:
     """A scope is used to help assign unique readable names to addressable objects.
 
     A scope keeps references to modules, hyperparameters, inputs, and outputs.
+    Elements that are no longer part of the graphs of interest (e.g., the
+    substitution modules that have been replaced, or the architectures sampled
+    previously if the scope is kept across samples) can be released with
+    :meth:`compact`.
+
+    .. note::
+        For efficiency, the scope keeps a counter per prefix to create unused
+        names and the names of inputs and outputs are only built and
+        registered when they are first needed, e.g., when
+        :meth:`deep_architect.core.Addressable.get_name` or
+        :meth:`get_elem` are called. The resulting names are the same as if
+        they had been registered right away.
     """
 
     def __init__(self):
-        self.name_to_elem = OrderedDict()
-        self.elem_to_name = OrderedDict()
+        self.name_to_elem = {}
+        self.prefix_to_count = {}
+        # addressable objects whose names have not been built yet.
+        self._pending = []
 
     def register(self, name, elem):
         """Registers an addressable object with the desired name.
@@ -49,10 +73,32 @@ class Scope:
             name (str): Unique name.
             elem (deep_architect.core.Addressable): Addressable object to register.
         """
+        if self._pending and _may_be_deferred_name(name):
+            self._register_pending()
         assert name not in self.name_to_elem
         assert isinstance(elem, Addressable)
+        name = sys.intern(name)
         self.name_to_elem[name] = elem
-        self.elem_to_name[elem] = name
+        elem._name = name
+
+    def _register_later(self, elem):
+        """Defers the registration of an addressable object until its name is
+        needed.
+
+        The object must implement ``_get_deferred_name``, which is called
+        once to build its name.
+
+        Args:
+            elem (deep_architect.core.Addressable): Addressable object to register.
+        """
+        self._pending.append(elem)
+
+    def _register_pending(self):
+        pending = self._pending
+        self._pending = []
+        for elem in pending:
+            if elem._name is None:
+                self.register(elem._get_deferred_name(), elem)
 
     def get_unused_name(self, prefix):
         """Creates a unique name by adding a numbered suffix to the prefix.
@@ -63,12 +109,17 @@ class Scope:
         Returns:
             str: Unique name in the current scope.
         """
-        i = 0
+        if self._pending and _may_be_deferred_name(prefix):
+            self._register_pending()
+        # the suffixes before the count are known to be in use or to have
+        # been released by compact, so they are never reused.
+        i = self.prefix_to_count.get(prefix, 0)
         while True:
             name = prefix + str(i)
             if name not in self.name_to_elem:
                 break
             i += 1
+        self.prefix_to_count[prefix] = i
         return name
 
     def get_name(self, elem):
@@ -83,7 +134,8 @@ class Scope:
         Returns:
             str: Name with which the object was registered in the scope.
         """
-        return self.elem_to_name[elem]
+        assert elem.scope is self
+        return elem.get_name()
 
     def get_elem(self, name):
         """Get the object that is registered in the scope with the desired name.
@@ -96,17 +148,109 @@ class Scope:
         Returns:
             str: Addressable object with the corresponding name.
         """
+        if name not in self.name_to_elem:
+            self._register_pending()
         return self.name_to_elem[name]
 
+    def compact(self, outputs):
+        """Stops tracking the elements that are not reachable from the outputs.
+
+        The elements kept are the modules reached by traversing the graph
+        backward from the outputs, their inputs, outputs, and hyperparameters,
+        and the hyperparameters reachable through dependent hyperparameters.
+        The names of the released elements are never reused.
+
+        Args:
+            outputs (dict[str, deep_architect.core.Output] or list[dict[str, deep_architect.core.Output]]):
+                Dictionary of named outputs of the graph to keep, or list of
+                dictionaries if there are several graphs in the scope.
+        """
+        outputs_lst = outputs if isinstance(outputs, list) else [outputs]
+        modules = []
+        for outputs in outputs_lst:
+            modules.extend(get_modules_with_cond(outputs, lambda m: True))
+        live = set(_get_hyperparameters_of_modules(modules))
+        for m in modules:
+            live.add(m)
+            live.update(m.inputs.values())
+            live.update(m.outputs.values())
+
+        for prefix, i in self.prefix_to_count.items():
+            while prefix + str(i) in self.name_to_elem:
+                i += 1
+            self.prefix_to_count[prefix] = i
+        self.name_to_elem = {
+            name: elem
+            for name, elem in self.name_to_elem.items()
+            if elem in live
+        }
+        self._pending = [elem for elem in self._pending if elem in live]
+
+    @staticmethod
+    def get_default_scope():
+        """Returns the scope used when no scope is given upon creation of an
+        addressable object.
+
+        The default scope is resolved through :mod:`contextvars`, so each
+        thread and each asyncio task has its own. Contexts in which it has not
+        been set use :attr:`Scope.default_scope`, which is shared by the whole
+        process. See also :func:`scope_context`.
+
+        Returns:
+            deep_architect.core.Scope: Default scope of the current context.
+        """
+        return _default_scope.get(Scope.default_scope)
+
+    @staticmethod
+    def set_default_scope(scope):
+        """Sets the default scope of the current context.
+
+        Args:
+            scope (deep_architect.core.Scope): Scope to use when no scope is
+                given upon creation of an addressable object.
+        """
+        _default_scope.set(scope)
+
     @staticmethod
     def reset_default_scope():
-        """Replaces the current default scope with a new empty scope."""
-        Scope.default_scope = Scope()
+        """Replaces the default scope of the current context with a new empty
+        scope."""
+        Scope.set_default_scope(Scope())
+
+
+def _may_be_deferred_name(name):
+    return '.I.' in name or '.O.' in name
 
 
 # NOTE: is this called once for each time core is imported?
 # TODO: check.
 Scope.default_scope = Scope()
+_default_scope = contextvars.ContextVar('default_scope')
+
+
+@contextlib.contextmanager
+def scope_context(scope=None):
+    """Context manager that sets the default scope of the current context.
+
+    The previous default scope is restored upon exit. As the default scope is
+    resolved through :mod:`contextvars`, search spaces can be created and
+    specified concurrently by different threads or asyncio tasks, each in its
+    own scope, e.g., by calling the search space function inside
+    ``with scope_context():``.
+
+    Args:
+        scope (deep_architect.core.Scope, optional): Scope to use as default.
+            If none is given, uses a new empty scope.
+
+    Yields:
+        deep_architect.core.Scope: The default scope within the context.
+    """
+    scope = scope if scope is not None else Scope()
+    token = _default_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _default_scope.reset(token)
 
 
 class Addressable:
@@ -117,12 +261,20 @@ class Addressable:
     Args:
         scope (deep_architect.core.Scope): Scope object where the addressable
             object will be registered.
-        name (str): Unique name used to register the addressable object.
+        name (str): Unique name used to register the addressable object. If
+            ``None``, the registration is deferred until the name is needed,
+            in which case the name is built by ``_get_deferred_name``.
     """
 
+    __slots__ = ('scope', '_name', '__weakref__')
+
     def __init__(self, scope, name):
-        scope.register(name, self)
         self.scope = scope
+        self._name = None
+        if name is not None:
+            scope.register(name, self)
+        else:
+            scope._register_later(self)
 
     def __repr__(self):
         return self.get_name()
@@ -133,7 +285,9 @@ class Addressable:
         Returns:
             str: Unique name used to register the object.
         """
-        return self.scope.get_name(self)
+        if self._name is None:
+            self.scope._register_pending()
+        return self._name
 
     def _get_base_name(self):
         """Get the class name.
@@ -166,8 +320,10 @@ class Hyperparameter(Addressable):
             the name.
     """
 
+    __slots__ = ('assign_done', 'modules', 'dependent_hyperps', 'val')
+
     def __init__(self, scope=None, name=None):
-        scope = scope if scope is not None else Scope.default_scope
+        scope = scope if scope is not None else Scope.get_default_scope()
         name = scope.get_unused_name('.'.join(
             ['H', (name if name is not None else self._get_base_name()) + '-']))
         Addressable.__init__(self, scope, name)
@@ -195,11 +351,26 @@ class Hyperparameter(Addressable):
         Args:
             val (object): Value to assign to the hyperparameter.
         """
-        assert not self.assign_done
         self._check_value(val)
+        self._assign_value(val)
+
+    def _assign_value(self, val):
+        """Assigns a value that is known to be valid to the hyperparameter.
+
+        See also: :meth:`assign_value`.
+        """
+        assert not self.assign_done
         self.assign_done = True
         self.val = val
 
+        # within assign_values, the updates are done after all the values
+        # have been assigned.
+        updates = _pending_updates.get()
+        if updates is not None:
+            updates.extend(self.modules)
+            updates.extend(self.dependent_hyperps)
+            return
+
         # calls update on the dependent modules to signal that this hyperparameter
         # has been set, and trigger any relevant local changes.
         for m in self.modules:
@@ -249,6 +420,13 @@ class Hyperparameter(Addressable):
         """
         raise NotImplementedError
 
+    def _get_domain_label(self):
+        """Returns a JSON serializable description of the values that the
+        hyperparameter can take, used by :func:`fingerprint` while the
+        hyperparameter is unassigned.
+        """
+        return None
+
 
 class DependentHyperparameter(Hyperparameter):
     """Hyperparameter that depends on other hyperparameters.
@@ -271,18 +449,20 @@ class DependentHyperparameter(Hyperparameter):
             in the scope is derived.
     """
 
+    __slots__ = ('_hyperps', '_fn')
+
     def __init__(self, fn, hyperps, scope=None, name=None):
         Hyperparameter.__init__(self, scope, name)
         # NOTE: this assert may or may not be necessary.
-        # assert isinstance(hyperps, OrderedDict)
-        self._hyperps = OrderedDict([(k, hyperps[k]) for k in sorted(hyperps)])
+        # assert isinstance(hyperps, dict)
+        self._hyperps = {k: hyperps[k] for k in sorted(hyperps)}
         self._fn = fn
 
         # registering the dependencies.
         for h in self._hyperps.values():
             h._register_dependent_hyperparameter(self)
 
-        self._update()
+        _request_update(self)
 
     def _update(self):
         """Checks if the hyperparameter is ready to be set, and sets it if that
@@ -297,6 +477,67 @@ class DependentHyperparameter(Hyperparameter):
     def _check_value(self, val):
         pass
 
+    def _get_domain_label(self):
+        return _get_fn_label(self._fn)
+
+
+_pending_updates = contextvars.ContextVar('pending_updates', default=None)
+
+
+def _request_update(x):
+    """Calls ``_update`` on a module or hyperparameter, or defers the call
+    until the end of :func:`assign_values` if called within it."""
+    updates = _pending_updates.get()
+    if updates is None:
+        x._update()
+    else:
+        updates.append(x)
+
+
+def assign_values(hyperp_to_val):
+    """Assigns values to multiple hyperparameters at once.
+
+    All the values are checked before any of them is assigned. The updates
+    triggered by the assignments (i.e., the substitutions and the assignment
+    of dependent hyperparameters) are then done through a single worklist
+    rather than through nested calls, so long chains of dependent
+    hyperparameters and deeply nested substitution modules are not limited by
+    the recursion depth. The updates requested while doing the updates
+    (e.g., by substitution modules created by a substitution) go to the end
+    of the worklist.
+
+    The resulting graph is the same as the one obtained by assigning the
+    values one by one in the same order. Modules created by substitution
+    modules that are created with their hyperparameters already assigned may
+    be numbered differently, as their substitutions are done after the
+    substitution that created them rather than during it.
+
+    If a value is not valid for its hyperparameter, asserts ``False`` before
+    any value is assigned.
+
+    Args:
+        hyperp_to_val (dict[deep_architect.core.Hyperparameter, object]):
+            Dictionary mapping the hyperparameters to the values to assign to
+            them. The hyperparameters must not have been assigned a value yet.
+    """
+    for h, v in hyperp_to_val.items():
+        assert not h.has_value_assigned()
+        h._check_value(v)
+
+    updates = []
+    token = _pending_updates.set(updates)
+    try:
+        for h, v in hyperp_to_val.items():
+            h._assign_value(v)
+        idx = 0
+        while idx < len(updates):
+            x = updates[idx]
+            idx += 1
+            if not isinstance(x, Hyperparameter) or not x.assign_done:
+                x._update()
+    finally:
+        _pending_updates.reset(token)
+
 
 class Input(Addressable):
     """Manages input connections.
@@ -314,13 +555,18 @@ class Input(Addressable):
         name (str): Unique name with which to register the input object.
     """
 
-    def __init__(self, module, scope, name):
-        name = '.'.join([module.get_name(), 'I', name])
-        Addressable.__init__(self, scope, name)
+    __slots__ = ('module', '_local_name', 'from_output', 'val')
 
+    def __init__(self, module, scope, name):
         self.module = module
+        self._local_name = name
+        Addressable.__init__(self, scope, None)
+
         self.from_output = None
 
+    def _get_deferred_name(self):
+        return self.module.get_name() + '.I.' + self._local_name
+
     def is_connected(self):
         """Checks if the input is connected.
 
@@ -407,13 +653,18 @@ class Output(Addressable):
         name (str): Unique name with which to register the output object.
     """
 
-    def __init__(self, module, scope, name):
-        name = '.'.join([module.get_name(), 'O', name])
-        Addressable.__init__(self, scope, name)
+    __slots__ = ('module', '_local_name', 'to_inputs', 'val')
 
+    def __init__(self, module, scope, name):
         self.module = module
+        self._local_name = name
+        Addressable.__init__(self, scope, None)
+
         self.to_inputs = []
 
+    def _get_deferred_name(self):
+        return self.module.get_name() + '.O.' + self._local_name
+
     def is_connected(self):
         """Checks if the output is connected.
 
@@ -498,16 +749,22 @@ class Module(Addressable):
         name (str, optional): Unique name with which to register the module.
     """
 
+    __slots__ = ('inputs', 'outputs', 'hyperps', '_is_compiled', '_is_settled')
+
     def __init__(self, scope=None, name=None):
-        scope = scope if scope is not None else Scope.default_scope
+        scope = scope if scope is not None else Scope.get_default_scope()
         name = scope.get_unused_name('.'.join(
             ['M', (name if name is not None else self._get_base_name()) + '-']))
         Addressable.__init__(self, scope, name)
 
-        self.inputs = OrderedDict()
-        self.outputs = OrderedDict()
-        self.hyperps = OrderedDict()
+        self.inputs = {}
+        self.outputs = {}
+        self.hyperps = {}
         self._is_compiled = False
+        # set once all the hyperparameters that this module depends on (directly
+        # or through the modules before it) have been assigned a value.
+        # see also: :class:`HyperparameterFrontier`.
+        self._is_settled = False
 
     def _register_input(self, name):
         """Creates a new input with the chosen local name.
@@ -615,6 +872,17 @@ class Module(Addressable):
         # raise NotImplementedError
         pass
 
+    def _get_structure_label(self):
+        """Returns a JSON serializable description of what the module may
+        still become that is not given by its type and hyperparameters, used
+        by :func:`fingerprint` for partially specified graphs.
+
+        Modules that are replaced once their hyperparameters are assigned
+        (e.g., substitution modules) should return a description of the
+        function that creates the replacement while they are not done.
+        """
+        return None
+
     def _compile(self):
         """Compile operation for the module.
 
@@ -648,6 +916,29 @@ class Module(Addressable):
             self._is_compiled = True
         self._forward()
 
+    def _forward_with_values(self, input_name_to_val):
+        """Forward operation for the module that takes the values of the inputs
+        and returns the values of the outputs.
+
+        By default, it goes through :meth:`forward`, setting the values of the
+        inputs and getting the values of the outputs. Modules that can do the
+        forward computation directly on the values once they have been
+        compiled may override it to avoid this overhead. The override is used
+        by :class:`ForwardPlan` after the module has been compiled.
+
+        Args:
+            input_name_to_val (dict[str, object]): Dictionary of local input
+                names to their corresponding values.
+
+        Returns:
+            dict[str, object]: Dictionary of local output names to their
+                corresponding values.
+        """
+        for name, val in input_name_to_val.items():
+            self.inputs[name].val = val
+        self.forward()
+        return {name: ox.val for name, ox in self.outputs.items()}
+
 
 def extract_unique_modules(input_or_output_lst):
     """Get the modules associated to the inputs and outputs in the list.
@@ -669,10 +960,28 @@ def extract_unique_modules(input_or_output_lst):
     return list(ms)
 
 
-# assumes that the inputs provided are sufficient to evaluate all the network.
-# TODO: add the more general functionality that allows us to compute the sequence
-# of forward operations for a subgraph of the full computational graph.
-def determine_module_eval_seq(inputs):
+def _get_modules_needed_for_outputs(inputs, outputs):
+    """Modules that have to be evaluated to compute the outputs from the inputs.
+
+    The backward traversal from the outputs does not go past the inputs
+    provided, i.e., the graph is cut at these inputs.
+    """
+    input_memo = set(inputs.values())
+    ms = extract_unique_modules(list(outputs.values()))
+    module_memo = set(ms)
+    for m in ms:
+        for ix in m.inputs.values():
+            if ix not in input_memo and ix.is_connected():
+                m_prev = ix.get_connected_output().get_module()
+                if m_prev not in module_memo:
+                    module_memo.add(m_prev)
+                    ms.append(m_prev)
+    return module_memo
+
+
+# assumes that the inputs provided are sufficient to evaluate all the network
+# (or all the modules required to compute the outputs, if provided).
+def determine_module_eval_seq(inputs, outputs=None, return_levels=False):
     """Computes the module forward evaluation sequence necessary to evaluate
     the computational graph starting from the provided inputs.
 
@@ -681,31 +990,104 @@ def determine_module_eval_seq(inputs):
     the inputs in the dictionary provided are sufficient to compute forward for all
     modules in the graph. See also: :func:`forward`.
 
+    The sort keeps a count of the inputs of each module that still have
+    to be computed, so it is linear in the size of the graph.
+
+    If ``outputs`` is provided, only the modules that are needed to compute
+    them from ``inputs`` are returned, i.e., the sequence for the sub-graph
+    between ``inputs`` and ``outputs``.
+
+    If ``return_levels`` is ``True``, the modules are also grouped in
+    levels. The modules of the first level only depend on the inputs provided,
+    and the modules of each following level only depend on the inputs provided
+    and on modules of previous levels. Modules in the same level are independent
+    of each other, so their forward can be done in any order.
+
     Args:
         inputs (dict[str, deep_architect.core.Input]): dictionary of inputs sufficient
             to compute the forward computation of the whole graph through propagation.
+        outputs (dict[str, deep_architect.core.Output], optional): dictionary of
+            outputs to compute. If ``None``, the whole graph reachable from
+            ``inputs`` is considered.
+        return_levels (bool, optional): Whether to also return the modules
+            grouped in levels.
 
     Returns:
-        list[deep_architect.core.Module]:
+        list[deep_architect.core.Module] or (list[deep_architect.core.Module], list[list[deep_architect.core.Module]]):
             List of modules ordered in a way that allows to call forward on the
-            modules in that order.
+            modules in that order. If ``return_levels`` is ``True``, a pair with
+            this list and the list of levels.
     """
-    module_seq = []
-    module_memo = set()
     input_memo = set(inputs.values())
+    if outputs is not None:
+        module_filter = _get_modules_needed_for_outputs(inputs, outputs)
+    else:
+        module_filter = None
+
+    # number of inputs of each module seen so far that are not computed yet.
+    module_to_num_missing = {}
+
+    def _get_num_missing(m):
+        num_missing = module_to_num_missing.get(m)
+        if num_missing is None:
+            num_missing = 0
+            for ix in m.inputs.values():
+                if ix not in input_memo:
+                    num_missing += 1
+            module_to_num_missing[m] = num_missing
+        return num_missing
+
+    module_seq = []
+    module_set = set()
     ms = extract_unique_modules(list(inputs.values()))
+    if module_filter is not None:
+        ms = [m for m in ms if m in module_filter]
     for m in ms:
-        if m not in module_memo and all(
-                ix in input_memo for ix in m.inputs.values()):
+        # modules appear multiple times in ms; the first appearance after
+        # all its inputs have been computed determines its position.
+        if m not in module_set and _get_num_missing(m) == 0:
             module_seq.append(m)
-            module_memo.add(m)
+            module_set.add(m)
 
             for ox in m.outputs.values():
                 ix_lst = ox.get_connected_inputs()
-                input_memo.update(ix_lst)
-                m_lst = [ix.get_module() for ix in ix_lst]
-                ms.extend(m_lst)
-    return module_seq
+                for ix in ix_lst:
+                    if ix not in input_memo:
+                        m_next = ix.get_module()
+                        # counts are initialized before adding ix to input_memo.
+                        _get_num_missing(m_next)
+                        input_memo.add(ix)
+                        module_to_num_missing[m_next] -= 1
+                for ix in ix_lst:
+                    m_next = ix.get_module()
+                    if module_filter is None or m_next in module_filter:
+                        ms.append(m_next)
+
+    if return_levels:
+        return module_seq, _get_levels(module_seq)
+    else:
+        return module_seq
+
+
+def _get_levels(module_seq):
+    # groups the modules of a module evaluation sequence in levels, where the
+    # level of a module is one more than the highest level of the modules of
+    # the sequence it depends on.
+    module_to_level = {}
+    levels = []
+    for m in module_seq:
+        level = 0
+        for ix in m.inputs.values():
+            if ix.is_connected():
+                m_prev = ix.get_connected_output().get_module()
+                prev_level = module_to_level.get(m_prev)
+                if prev_level is not None and prev_level >= level:
+                    level = prev_level + 1
+        module_to_level[m] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(m)
+    return levels
 
 
 def traverse_backward(outputs, fn):
@@ -806,13 +1188,36 @@ def is_specified(outputs):
     return is_spec[0]
 
 
-def forward(input_to_val, _module_seq=None):
+def forward(input_to_val,
+            _module_seq=None,
+            release_intermediates=False,
+            num_workers=None):
     """Forward pass through the graph starting with the provided inputs.
 
     The starting inputs are given the values in the dictionary. The values for
     the other inputs are obtained through propagation, i.e., through successive
     calls to :meth:`deep_architect.core.Module.forward` of the appropriate modules.
 
+    If ``release_intermediates`` is ``True``, the values of the inputs and
+    outputs are released as soon as the last module using them has been
+    evaluated (see :func:`determine_input_output_cleanup_seq`). Only the
+    values of the unconnected outputs are kept after the call. In this mode,
+    some statistics about the values kept alive during the forward pass are
+    returned. The size in bytes of a value is determined if it exposes
+    ``nbytes`` (e.g., numpy arrays) or ``element_size`` and ``numel``
+    (e.g., PyTorch tensors); other values count as zero bytes.
+
+    If ``num_workers`` is provided, the modules of the module evaluation
+    sequence are evaluated level by level (see
+    :func:`determine_module_eval_seq`) and the modules of the same level are
+    evaluated concurrently by a pool of threads. This is only beneficial if
+    the forward of the modules releases the GIL (e.g., most NumPy and PyTorch
+    CPU operations) and there are independent branches in the graph (e.g.,
+    :func:`deep_architect.modules.siso_split_combine`). The values computed
+    are the same as in the sequential mode. If ``release_intermediates`` is
+    also ``True``, the values are released after each level, so more values
+    may be live at once than in the sequential mode.
+
     .. note::
         For efficiency, in dynamic frameworks, the module evaluation sequence
         is best computed once and reused in each forward call. The module
@@ -825,19 +1230,314 @@ def forward(input_to_val, _module_seq=None):
             in a way that calling :meth:`deep_architect.core.Module.forward` on them
             starting from the values given for the inputs is valid. If it is
             not provided, the module sequence is computed.
+        release_intermediates (bool, optional): Whether to release the
+            intermediate values once they are no longer needed.
+        num_workers (int, optional): Number of threads used to evaluate
+            independent modules concurrently. If ``None``, the modules are
+            evaluated sequentially.
+
+    Returns:
+        dict[str, int] or None:
+            If ``release_intermediates`` is ``True``, dictionary with the peak
+            number of live values (``peak_num_live_values``) and the peak
+            number of bytes of the live values (``peak_num_live_bytes``).
+            Otherwise, ``None``.
     """
+    inputs = {"in%d" % i: ix for (i, ix) in enumerate(input_to_val.keys())}
+    for ix, val in input_to_val.items():
+        ix.val = val
+
     if _module_seq is None:
-        inputs = {"in%d" % i: ix for (i, ix) in enumerate(input_to_val.keys())}
         _module_seq = determine_module_eval_seq(inputs)
+    levels = _get_levels(_module_seq) if num_workers is not None else None
 
-    for ix, val in input_to_val.items():
-        ix.val = val
+    if not release_intermediates:
+        if levels is not None:
+            _forward_levels(levels, num_workers)
+        else:
+            for m in _module_seq:
+                m.forward()
+                for ox in m.outputs.values():
+                    for ix in ox.get_connected_inputs():
+                        ix.val = ox.val
+        return None
+
+    input_cleanup_seq, output_cleanup_seq = _get_input_output_cleanup_seq(
+        _module_seq)
+    module_to_cleanup = dict(
+        zip(_module_seq, zip(input_cleanup_seq, output_cleanup_seq)))
+    # the values of the inputs connected to an output are the value of the
+    # output, so only the values of the starting inputs and of the outputs
+    # are counted.
+    num_bytes = sum(_get_num_bytes(v) for v in input_to_val.values())
+    stats = {
+        'num_live_values': len(input_to_val),
+        'num_live_bytes': num_bytes,
+        'peak_num_live_values': len(input_to_val),
+        'peak_num_live_bytes': num_bytes
+    }
 
-    for m in _module_seq:
-        m.forward()
-        for ox in m.outputs.values():
-            for ix in ox.get_connected_inputs():
-                ix.val = ox.val
+    def _release(ms):
+        for m in ms:
+            for ox in m.outputs.values():
+                stats['num_live_values'] += 1
+                stats['num_live_bytes'] += _get_num_bytes(ox.val)
+        for name in ['num_live_values', 'num_live_bytes']:
+            if stats[name] > stats['peak_' + name]:
+                stats['peak_' + name] = stats[name]
+
+        for m in ms:
+            ixs, oxs = module_to_cleanup[m]
+            for ix in ixs:
+                if ix in input_to_val:
+                    stats['num_live_values'] -= 1
+                    stats['num_live_bytes'] -= _get_num_bytes(ix.val)
+                ix.val = None
+            for ox in oxs:
+                stats['num_live_values'] -= 1
+                stats['num_live_bytes'] -= _get_num_bytes(ox.val)
+                ox.val = None
+
+    if levels is not None:
+        _forward_levels(levels, num_workers, _release)
+    else:
+        for m in _module_seq:
+            _forward_module(m)
+            _release([m])
+
+    return {
+        'peak_num_live_values': stats['peak_num_live_values'],
+        'peak_num_live_bytes': stats['peak_num_live_bytes']
+    }
+
+
+def _forward_module(m):
+    m.forward()
+    for ox in m.outputs.values():
+        for ix in ox.get_connected_inputs():
+            ix.val = ox.val
+
+
+def _forward_levels(levels, num_workers, level_fn=None):
+    # the modules of a level only read the values of previous levels, and
+    # each module only writes to its outputs and to the inputs connected to them.
+    # level_fn is called with the modules of each level after they are done.
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for ms in levels:
+            if len(ms) == 1:
+                _forward_module(ms[0])
+            else:
+                for _ in executor.map(_forward_module, ms):
+                    pass
+            if level_fn is not None:
+                level_fn(ms)
+
+
+def _get_num_bytes(val):
+    if hasattr(val, 'nbytes'):
+        return int(val.nbytes)
+    elif hasattr(val, 'element_size') and hasattr(val, 'numel'):
+        return int(val.element_size() * val.numel())
+    else:
+        return 0
+
+
+# kinds of the instructions of a forward plan.
+_SISO_VALUES = 0
+_VALUES = 1
+_GRAPH = 2
+
+
+class ForwardPlan:
+    """Forward evaluation plan for a fully specified graph.
+
+    The graph is lowered into a flat sequence of instructions, one per module
+    in the module evaluation sequence. Each value flowing through the graph is
+    kept in a slot of a preallocated list of values, and each instruction
+    refers to the slots of the inputs and outputs of its module by index.
+    Calling :meth:`forward` repeatedly then only does list indexing, rather
+    than setting the values of all the inputs and outputs in the graph as in
+    :func:`forward`.
+
+    The compiled modules that override
+    :meth:`deep_architect.core.Module._forward_with_values` (e.g., the
+    framework helpers) are called directly on the values of the slots. The
+    other modules go through :meth:`deep_architect.core.Module.forward`, with
+    the values of their inputs and outputs set in the graph only during the
+    call. Each slot is released after the last module using it, and no value
+    is kept by the plan or in the graph after :meth:`forward` returns, so the
+    values of the outputs are only available in the dictionary returned.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs which by being traversed forward will reach all the
+            modules in the graph.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs whose values are returned by :meth:`forward`.
+
+    Raises:
+        ValueError: If an input of a module needed to compute the outputs is
+            neither connected nor in ``inputs``.
+    """
+
+    def __init__(self, inputs, outputs):
+        input_set = set(inputs.values())
+        for m in _get_modules_needed_for_outputs(inputs, outputs):
+            for ix in m.inputs.values():
+                if not (ix in input_set or ix.is_connected()):
+                    raise ValueError(
+                        "Input %s is not connected and is not one of the "
+                        "inputs of the plan." % ix.get_name())
+        self.module_seq = determine_module_eval_seq(inputs)
+
+        input_to_slot = {}
+        self.input_name_to_slot = {}
+        for i, (name, ix) in enumerate(inputs.items()):
+            input_to_slot[ix] = i
+            self.input_name_to_slot[name] = i
+        num_slots = len(inputs)
+
+        output_to_slot = {}
+        # position of the last module using each slot.
+        slot_to_last_use = {}
+        self._module_slots = []
+        for i, m in enumerate(self.module_seq):
+            in_slots = []
+            for name, ix in m.inputs.items():
+                if ix in input_to_slot:
+                    idx = input_to_slot[ix]
+                else:
+                    idx = output_to_slot[ix.get_connected_output()]
+                in_slots.append((name, ix, idx))
+                slot_to_last_use[idx] = i
+
+            out_slots = []
+            for name, ox in m.outputs.items():
+                output_to_slot[ox] = num_slots
+                out_slots.append((name, ox, num_slots))
+                slot_to_last_use[num_slots] = i
+                num_slots += 1
+            self._module_slots.append((in_slots, out_slots, []))
+
+        self.output_name_to_slot = {
+            name: output_to_slot[ox] for name, ox in outputs.items()
+        }
+        # the slots of the outputs of the plan are released after the values
+        # are returned, as are the slots of the inputs not used by any module.
+        self.final_release_slots = sorted(
+            set(self.output_name_to_slot.values()) |
+            (set(range(len(inputs))) - set(slot_to_last_use)))
+        for idx, i in slot_to_last_use.items():
+            if idx not in self.final_release_slots:
+                self._module_slots[i][2].append(idx)
+        self.vals = [None] * num_slots
+        self._set_instructions()
+
+    def _set_instructions(self):
+        # each instruction is (kind, function or module, input slots, output
+        # slots, slots released after it). the modules that are not compiled
+        # go through the graph, as compiling them may need the values there,
+        # and the instructions are set again once they are.
+        self.instructions = []
+        self.is_compiled = True
+        for m, (in_slots, out_slots, release_slots) in zip(
+                self.module_seq, self._module_slots):
+            uses_values = (type(m)._forward_with_values is
+                           not Module._forward_with_values)
+            release_slots = tuple(release_slots)
+            if uses_values and not m._is_compiled:
+                self.is_compiled = False
+            if uses_values and m._is_compiled:
+                in_slots = tuple((name, idx) for name, _, idx in in_slots)
+                out_slots = tuple((name, idx) for name, _, idx in out_slots)
+                if len(in_slots) == 1 and len(out_slots) == 1:
+                    self.instructions.append(
+                        (_SISO_VALUES, m._forward_with_values, in_slots[0],
+                         out_slots[0], release_slots))
+                else:
+                    self.instructions.append(
+                        (_VALUES, m._forward_with_values, in_slots, out_slots,
+                         release_slots))
+            else:
+                self.instructions.append(
+                    (_GRAPH, m, tuple((ix, idx) for _, ix, idx in in_slots),
+                     tuple((ox, idx) for _, ox, idx in out_slots),
+                     release_slots))
+
+    def forward(self, input_name_to_val):
+        """Forward pass through the graph using the plan.
+
+        Args:
+            input_name_to_val (dict[str, object]): Dictionary of input names to
+                their corresponding values. The names are the ones in the
+                dictionary of inputs used to create the plan.
+
+        Returns:
+            dict[str, object]: Dictionary of output names to their
+                corresponding values. The names are the ones in the dictionary
+                of outputs used to create the plan.
+
+        Raises:
+            ValueError: If no value is given for one of the inputs.
+        """
+        vals = self.vals
+        for name, idx in self.input_name_to_slot.items():
+            if name not in input_name_to_val:
+                raise ValueError("No value given for input %s." % name)
+            vals[idx] = input_name_to_val[name]
+
+        for kind, x, in_slots, out_slots, release_slots in self.instructions:
+            if kind == _SISO_VALUES:
+                vals[out_slots[1]] = x({
+                    in_slots[0]: vals[in_slots[1]]
+                })[out_slots[0]]
+            elif kind == _VALUES:
+                input_name_to_val = {}
+                for name, idx in in_slots:
+                    input_name_to_val[name] = vals[idx]
+                output_name_to_val = x(input_name_to_val)
+                for name, idx in out_slots:
+                    vals[idx] = output_name_to_val[name]
+            else:
+                for ix, idx in in_slots:
+                    ix.val = vals[idx]
+                x.forward()
+                for ix, _ in in_slots:
+                    ix.val = None
+                for ox, idx in out_slots:
+                    vals[idx] = ox.val
+                    ox.val = None
+            for idx in release_slots:
+                vals[idx] = None
+
+        output_name_to_val = {
+            name: vals[idx] for (name, idx) in self.output_name_to_slot.items()
+        }
+        for idx in self.final_release_slots:
+            vals[idx] = None
+        if not self.is_compiled:
+            self._set_instructions()
+        return output_name_to_val
+
+
+def compile_plan(inputs, outputs):
+    """Lowers a fully specified graph into a forward evaluation plan.
+
+    The plan is best computed once and reused for each forward call, e.g.,
+    for dynamic frameworks where forward is called for each batch of data.
+    See also: :class:`ForwardPlan`.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs which by being traversed forward will reach all the
+            modules in the graph.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs whose values are computed by the plan.
+
+    Returns:
+        deep_architect.core.ForwardPlan: Forward evaluation plan for the graph.
+    """
+    return ForwardPlan(inputs, outputs)
 
 
 def get_unconnected_inputs(outputs):
@@ -916,6 +1616,24 @@ def get_all_hyperparameters(outputs):
             Ordered set of hyperparameters that are currently present in the
             graph.
     """
+    return _get_hyperparameters_of_modules(
+        get_modules_with_cond(outputs, lambda m: True))
+
+
+def _get_hyperparameters_of_modules(modules):
+    """Gets the hyperparameters of the modules in the order they are
+    visited, including the ones reachable through dependent hyperparameters.
+
+    See also: :func:`get_all_hyperparameters`.
+
+    Args:
+        modules (list[deep_architect.core.Module]): Modules in the order that
+            their hyperparameters should be visited.
+
+    Returns:
+        OrderedSet[deep_architect.core.Hyperparameter]:
+            Ordered set of hyperparameters of the modules.
+    """
     visited_hs = OrderedSet()
 
     def _add_reachable_hs(h_dep):
@@ -935,16 +1653,12 @@ def get_all_hyperparameters(outputs):
                 visited_hs.add(h)
             idx += 1
 
-    # this function is applied on each of the modules in the graph.
-    def fn(module):
+    for module in modules:
         for h in module.hyperps.values():
             if h not in visited_hs:
                 visited_hs.add(h)
                 if isinstance(h, DependentHyperparameter):
                     _add_reachable_hs(h)
-        return False
-
-    traverse_backward(outputs, fn)
     return visited_hs
 
 
@@ -976,8 +1690,113 @@ def get_unassigned_independent_hyperparameters(outputs):
     return unassigned_indep_hs
 
 
-# TODO: perhaps change to not have to work until everything is specified.
-# this can be done through a flag.
+class HyperparameterFrontier:
+    """Iterator over the independent hyperparameters that are left to assign
+    in the search space.
+
+    The hyperparameters are visited in passes. Each pass goes over the
+    unassigned independent hyperparameters present in the graph when the pass
+    starts, in the order given by :func:`get_unassigned_independent_hyperparameters`.
+    Hyperparameters that show up as a result of substitutions triggered during
+    a pass are visited in the next pass.
+
+    Rather than traversing the whole graph in each pass, the frontier marks
+    the modules for which all the hyperparameters (including the ones of the
+    modules before them) have been assigned as settled. A settled module
+    cannot become unsettled, as substitutions only change the graph after
+    modules with unassigned hyperparameters, so passes only traverse the part
+    of the graph that is not settled yet. Skipping the settled modules does
+    not change the relative order in which the remaining modules are visited,
+    so the order of the hyperparameters is the same as the one resulting from
+    traversing the whole graph.
+
+    .. note::
+        Connecting new graph fragments before modules that have already been
+        settled is not supported.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs which by being traversed back will reach all the
+            modules in the search space.
+    """
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.hyperps = []
+        self.idx = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            while self.idx < len(self.hyperps):
+                h = self.hyperps[self.idx]
+                self.idx += 1
+                if not h.has_value_assigned():
+                    return h
+
+            self.hyperps = self.next_pass()
+            self.idx = 0
+            if len(self.hyperps) == 0:
+                raise StopIteration
+
+    def next_pass(self):
+        """Gets the unassigned independent hyperparameters currently in the graph
+        and settles the modules for which everything has been assigned.
+
+        Returns:
+            list[deep_architect.core.Hyperparameter]:
+                Unassigned independent hyperparameters in the order that they
+                should be assigned. Empty if the search space is specified.
+        """
+        ms = self._get_unsettled_modules()
+        self._settle_modules(ms)
+        return [
+            h for h in _get_hyperparameters_of_modules(ms)
+            if not isinstance(h, DependentHyperparameter) and
+            not h.has_value_assigned()
+        ]
+
+    def _get_unsettled_modules(self):
+        # same traversal as traverse_backward, except that settled modules are
+        # not visited.
+        memo = set()
+        output_lst = sorted_values_by_key(self.outputs)
+        ms = [m for m in extract_unique_modules(output_lst) if not m._is_settled]
+        for m in ms:
+            for ix in m.inputs.values():
+                if ix.is_connected():
+                    m_prev = ix.get_connected_output().get_module()
+                    if m_prev not in memo:
+                        memo.add(m_prev)
+                        if not m_prev._is_settled:
+                            ms.append(m_prev)
+        return ms
+
+    def _settle_modules(self, ms):
+        # modules not in ms that are before a module in ms are settled, so a
+        # module is unsettled if it has an unassigned hyperparameter or if it
+        # is after such a module.
+        m_set = set(ms)
+        unsettled = set()
+        m_lst = []
+        for m in m_set:
+            for h in m.hyperps.values():
+                if not h.assign_done:
+                    unsettled.add(m)
+                    m_lst.append(m)
+                    break
+        for m in m_lst:
+            for ox in m.outputs.values():
+                for ix in ox.get_connected_inputs():
+                    m_next = ix.get_module()
+                    if m_next in m_set and m_next not in unsettled:
+                        unsettled.add(m_next)
+                        m_lst.append(m_next)
+        for m in m_set:
+            if m not in unsettled:
+                m._is_settled = True
 
 
 def unassigned_independent_hyperparameter_iterator(outputs):
@@ -998,15 +1817,12 @@ def unassigned_independent_hyperparameter_iterator(outputs):
             modules in the search space, and correspondingly all the current
             unspecified hyperparameters of the search space.
 
-    Yields:
-        (deep_architect.core.Hyperparameter):
-            Next unspecified hyperparameter of the search space.
+    Returns:
+        deep_architect.core.HyperparameterFrontier:
+            Iterator yielding the next unspecified hyperparameter of the
+            search space.
     """
-    while not is_specified(outputs):
-        hs = get_unassigned_independent_hyperparameters(outputs)
-        for h in hs:
-            if not h.has_value_assigned():
-                yield h
+    return HyperparameterFrontier(outputs)
 
 
 def determine_input_output_cleanup_seq(inputs):
@@ -1031,7 +1847,10 @@ def determine_input_output_cleanup_seq(inputs):
             cleaned up after they are no longer needed.
     """
     module_eval_seq = determine_module_eval_seq(inputs)
+    return _get_input_output_cleanup_seq(module_eval_seq)
+
 
+def _get_input_output_cleanup_seq(module_eval_seq):
     input_cleanup_seq = []
     for m in module_eval_seq:
         lst = list(m.inputs.values())
@@ -1140,4 +1959,750 @@ def jsonify(inputs, outputs):
         "input_cleanup_seq": input_cleanup_seq,
         "output_cleanup_seq": output_cleanup_seq,
     }
-    return graph
\ No newline at end of file
+    return graph
+
+
+def _get_sha256(obj):
+    s = json.dumps(obj, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(s.encode('utf-8')).hexdigest()
+
+
+_unique_label_counter = itertools.count()
+_code_labels = weakref.WeakKeyDictionary()
+# labels of the modules, inputs, outputs, and hyperparameters of the graph
+# being fingerprinted, by id, for the functions that capture them.
+_position_labels = contextvars.ContextVar('position_labels', default=None)
+
+
+def _get_unique_label():
+    # a label that is not shared with any other, for the objects that cannot
+    # be described.
+    return ['unique', next(_unique_label_counter)]
+
+
+def _get_code_label(code):
+    # the file and the line are left out, so the functions with the same code
+    # get the same label wherever they are defined.
+    if code not in _code_labels:
+        consts = [_get_const_label(x) for x in code.co_consts]
+        _code_labels[code] = [
+            code.co_name, code.co_code.hex(), code.co_names, consts
+        ]
+    return _code_labels[code]
+
+
+def _get_const_label(x):
+    if isinstance(x, types.CodeType):
+        return _get_code_label(x)
+    elif isinstance(x, tuple):
+        return [_get_const_label(y) for y in x]
+    elif isinstance(x, frozenset):
+        # sorted as the order of the elements depends on the hash seed.
+        return ['frozenset', sorted(repr(y) for y in x)]
+    else:
+        return repr(x)
+
+
+def _get_value_label(x, depth):
+    if x is None or isinstance(x, (bool, int, float, str)):
+        return x
+    elif type(x).__module__ == 'numpy' and getattr(x, 'shape', None) == ():
+        # numpy scalars, e.g., ``np.int64(8)``.
+        return [type(x).__name__, _get_value_label(x.item(), depth)]
+    elif isinstance(x, (list, tuple)):
+        return [type(x).__name__, [_get_value_label(y, depth) for y in x]]
+    elif isinstance(x, dict) and all(isinstance(k, str) for k in x):
+        return [
+            'dict', [[k, _get_value_label(x[k], depth)] for k in sorted(x)]
+        ]
+    elif callable(x):
+        return _get_fn_label(x, depth - 1)
+
+    position_labels = _position_labels.get()
+    if position_labels is not None:
+        label = position_labels.get(id(x))
+        if label is None and isinstance(x, Hyperparameter):
+            # hyperparameters that are not in the graph yet are numbered in
+            # the order in which they are found.
+            label = ['captured', len(position_labels)]
+            position_labels[id(x)] = label
+        if label is not None:
+            return label
+    return _get_unique_label()
+
+
+def _get_fn_label(fn, depth=4):
+    """Describes a function by its code, and by its default arguments and the
+    values captured in its closure.
+
+    The code is described by its name, bytecode, and constants, so the label
+    does not depend on the file or the line where the function is defined,
+    but does depend on the version of Python. The captured functions are
+    described recursively up to the given depth, and the captured numbers,
+    strings, booleans, ``None``, and lists, tuples and dictionaries of them by
+    their values. Within :func:`fingerprint`, the captured modules, inputs,
+    outputs, and hyperparameters of the graph are described by their
+    positions in the graph, and the other captured hyperparameters by the
+    order in which they are found. The label is conservative: the functions
+    capturing other objects, the callable objects other than functions and
+    classes, and the functions nested deeper than the given depth get a
+    unique label, so they are never described as equal to another function.
+    """
+    if isinstance(fn, type) or (isinstance(fn, types.BuiltinFunctionType) and
+                                isinstance(fn.__self__,
+                                           (types.ModuleType, type(None)))):
+        return [fn.__module__, fn.__qualname__]
+    if isinstance(fn, types.MethodType):
+        return [
+            'method',
+            _get_value_label(fn.__self__, depth),
+            _get_fn_label(fn.__func__, depth)
+        ]
+    code = getattr(fn, '__code__', None)
+    if code is None or depth < 0:
+        return _get_unique_label()
+    label = [
+        fn.__module__,
+        _get_code_label(code),
+        _get_value_label(fn.__defaults__, depth),
+        _get_value_label(fn.__kwdefaults__, depth)
+    ]
+    for cell in (fn.__closure__ or ()):
+        try:
+            v = cell.cell_contents
+        except ValueError:
+            label.append(_get_unique_label())
+        else:
+            label.append(_get_value_label(v, depth))
+    return label
+
+
+def _get_module_label(m):
+    module_name = m.get_name()
+    start_idx = module_name.index('.') + 1
+    end_idx = len(module_name) - module_name[::-1].index('-') - 1
+    label = [
+        module_name[start_idx:end_idx], {
+            name: h.get_value()
+            for name, h in m.hyperps.items()
+            if h.has_value_assigned()
+        }
+    ]
+    # the number of modules and hyperparameters that depend on an unassigned
+    # hyperparameter distinguishes shared hyperparameters.
+    unassigned_lst = []
+    for name in sorted(m.hyperps):
+        h = m.hyperps[name]
+        if not h.has_value_assigned():
+            unassigned_lst.append([
+                name,
+                type(h).__name__,
+                h._get_domain_label(),
+                len(h.modules),
+                len(h.dependent_hyperps)
+            ])
+    # the labels of the modules of fully specified graphs are unchanged.
+    structure_label = m._get_structure_label()
+    if len(unassigned_lst) > 0 or structure_label is not None:
+        label.append([unassigned_lst, structure_label])
+    return label
+
+
+def fingerprint(inputs, outputs):
+    """Returns a hash of the structure of the (possibly partially specified)
+    search space.
+
+    Two graphs get the same fingerprint if they have the same modules (as
+    identified by their types, i.e., the names used to create them, and the
+    values of their hyperparameters) connected in the same way, regardless of
+    the unique names of the modules in the scope (e.g., ``M.Conv2D-3`` vs
+    ``M.Conv2D-7``), of the order in which the modules were created, and
+    of the values of the hyperparameters that did not end up in the graph
+    (e.g., hyperparameters of unused branches). This makes it useful to
+    detect that the same architecture has been sampled more than once, e.g.,
+    as a key to cache evaluation results.
+
+    The modules are labeled with their type, hyperparameter values, and
+    input and output names, and the labels are refined iteratively with the
+    labels of the connected modules (i.e., Weisfeiler-Lehman refinement)
+    until they stop distinguishing more modules. The fingerprint is the
+    SHA-256 hash of the resulting labels, so it is stable across processes
+    and Python versions. Non-isomorphic graphs getting the same fingerprint is
+    possible in theory, but unlikely for the graphs of typical search spaces.
+
+    In partially specified graphs, the unassigned hyperparameters are labeled
+    with the values they can take, and the modules that are not done (e.g.,
+    substitution modules) with the functions that create their replacements
+    (see :meth:`deep_architect.core.Module._get_structure_label`). The
+    functions are described by their code and by the values captured in their
+    closures. The modules and hyperparameters captured are described by their
+    positions in the graph, i.e., the position of the module in the backward
+    traversal from the outputs and the local name of the hyperparameter, so
+    search spaces created by the same code get the same fingerprint. The
+    functions that cannot be described this way (e.g., the ones capturing
+    other objects) make the fingerprint unique. These fingerprints are only
+    comparable for the same version of the code defining the search space
+    and of Python.
+
+    .. note::
+        The values of the hyperparameters need to be JSON serializable.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs of the search space.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs which by being traversed back will reach all the
+            modules in the search space.
+
+    Returns:
+        str: Hexadecimal fingerprint of the search space.
+    """
+    ms = []
+
+    def add_module(m):
+        ms.append(m)
+
+    traverse_backward(outputs, add_module)
+
+    input_to_name = {ix: name for name, ix in inputs.items()}
+    output_to_names = {}
+    for name, ox in outputs.items():
+        output_to_names.setdefault(ox, []).append(name)
+
+    # the order of the backward traversal only depends on the structure of
+    # the graph, so the positions of the modules do not depend on their names.
+    position_labels = {}
+    for i, m in enumerate(ms):
+        position_labels.setdefault(id(m), ['module', i])
+        for name, ix in m.inputs.items():
+            position_labels.setdefault(id(ix), ['input', i, name])
+        for name, ox in m.outputs.items():
+            position_labels.setdefault(id(ox), ['output', i, name])
+    for i, m in enumerate(ms):
+        for name in sorted(m.hyperps):
+            position_labels.setdefault(id(m.hyperps[name]),
+                                       ['hyperparameter', i, name])
+
+    module_to_label = {}
+    token = _position_labels.set(position_labels)
+    try:
+        for m in ms:
+            module_to_label[m] = _get_sha256(_get_module_label(m) + [
+                sorted([name, input_to_name.get(ix)]
+                       for name, ix in m.inputs.items()),
+                sorted([name, sorted(output_to_names.get(ox, []))]
+                       for name, ox in m.outputs.items()),
+            ])
+    finally:
+        _position_labels.reset(token)
+
+    num_labels = len(set(module_to_label.values()))
+    # each iteration either distinguishes more modules or stops.
+    for _ in range(len(ms)):
+        next_module_to_label = {}
+        for m in ms:
+            in_lst = []
+            for name, ix in m.inputs.items():
+                if ix.is_connected():
+                    ox = ix.get_connected_output()
+                    in_lst.append([
+                        name, ox._local_name, module_to_label[ox.get_module()]
+                    ])
+            out_lst = []
+            for name, ox in m.outputs.items():
+                for ix in ox.get_connected_inputs():
+                    m_next = ix.get_module()
+                    # modules after the outputs are not part of the graph.
+                    if m_next in module_to_label:
+                        out_lst.append(
+                            [name, ix._local_name, module_to_label[m_next]])
+            next_module_to_label[m] = _get_sha256(
+                [module_to_label[m],
+                 sorted(in_lst),
+                 sorted(out_lst)])
+        module_to_label = next_module_to_label
+
+        next_num_labels = len(set(module_to_label.values()))
+        if next_num_labels == num_labels:
+            break
+        num_labels = next_num_labels
+
+    return _get_sha256(sorted(module_to_label.values()))
+
+
+def fork(inputs, outputs):
+    """Creates a copy of a (possibly partially specified) graph in a new scope.
+
+    All the modules, inputs, outputs, and hyperparameters reachable from the
+    inputs and outputs are copied, along with their connections, the values
+    assigned to the hyperparameters, and the substitution modules that are
+    still pending. The copies are registered with the same names in a new
+    scope, so specifying the copy results in the same names as specifying the
+    original. Assigning values to the hyperparameters of the copy does not
+    affect the original, and vice versa.
+
+    The other objects referenced by these objects (e.g., through the
+    closures of the substitution functions or the attributes of user-defined
+    modules) are copied too, as :func:`copy.deepcopy` would. Only immutable
+    objects (e.g., numbers, strings, classes, and builtin functions), and
+    the objects referred to through global variables, are shared between the
+    original and the copy. Tuples, frozensets, and functions are copied only
+    if they refer to objects that are copied. The instances of classes that
+    are defined in Python and do not customize how they are copied are
+    copied attribute by attribute. Other objects (e.g., numpy arrays, or
+    framework objects created when compiling a module) are copied with
+    :func:`copy.deepcopy`, so forking fails if they cannot be copied.
+
+    .. note::
+        Modules and hyperparameters created by substitution modules after
+        forking are registered in the default scope. To get the same names
+        as for the original, the default scope should be set to the scope of
+        the copy (accessible through the ``scope`` attribute of any of its
+        elements) while specifying it.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs of the graph.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of the graph.
+
+    Returns:
+        (dict[str, deep_architect.core.Input], dict[str, deep_architect.core.Output]):
+            Tuple with dictionaries with the inputs and outputs of the copy.
+    """
+    return tuple(_fork([inputs, outputs]))
+
+
+def _fork(objs):
+    """Copies the objects in a list as done in :func:`fork`.
+
+    Objects in the list that refer to each other are copied consistently,
+    e.g., a :class:`HyperparameterFrontier` for the outputs of a graph can be
+    forked along with the graph.
+
+    Args:
+        objs (list[object]): List of objects to copy.
+
+    Returns:
+        list[object]: List with the copies of the objects.
+    """
+    return _Forker(objs).get_copies()
+
+
+# kinds of objects for the purpose of forking. Leaves are shared between the
+# original and the copy. Tuples, frozensets, functions, and methods are only
+# copied if they refer to objects that are copied. Other objects are always
+# copied.
+_LEAF, _SEQUENCE, _LIST, _DICT, _FUNCTION, _CELL, _METHOD, _SCOPE, _INSTANCE, \
+    _OTHER = range(10)
+_type_to_kind = {}
+_type_to_slots = {}
+
+# immutable objects that are shared by :func:`fork`. Classes are shared too.
+_leaf_types = frozenset([
+    type(None), bool, int, float, complex, str, bytes, range, slice,
+    type(Ellipsis),
+    type(NotImplemented), types.BuiltinFunctionType, types.ModuleType,
+    types.CodeType, weakref.ref
+])
+# methods that customize how the instances of a class are copied.
+_copy_method_names = ('__new__', '__reduce__', '__reduce_ex__', '__getstate__',
+                      '__setstate__', '__copy__', '__deepcopy__')
+_HEAPTYPE_FLAG = 1 << 9
+
+
+def _is_plain_class(t):
+    # instances of classes defined in Python that do not customize how they
+    # are copied are copied by copying their attributes.
+    for c in t.__mro__[:-1]:
+        if not c.__flags__ & _HEAPTYPE_FLAG or any(
+                name in c.__dict__ for name in _copy_method_names):
+            return False
+    return True
+
+
+def _get_kind(t):
+    kind = _type_to_kind.get(t)
+    if kind is None:
+        if t in _leaf_types or issubclass(t, type):
+            kind = _LEAF
+        elif t in (tuple, frozenset):
+            kind = _SEQUENCE
+        elif t in (list, set):
+            kind = _LIST
+        elif issubclass(t, dict):
+            kind = _DICT
+        elif t is types.FunctionType:
+            kind = _FUNCTION
+        elif t is _CellType:
+            kind = _CELL
+        elif t is types.MethodType:
+            kind = _METHOD
+        elif issubclass(t, Scope):
+            kind = _SCOPE
+        elif issubclass(t, Addressable) or _is_plain_class(t):
+            kind = _INSTANCE
+        else:
+            kind = _OTHER
+        _type_to_kind[t] = kind
+    return kind
+
+
+# kinds of the slots of the core classes for the purpose of forking. The slots
+# that refer to other addressable objects (or containers of them) are copied
+# directly. The slots of other classes are copied as any other object.
+_GENERIC_SLOT, _VALUE_SLOT, _REF_SLOT, _REF_LIST_SLOT, _REF_DICT_SLOT, \
+    _REF_KEYS_SLOT = range(6)
+_core_slot_to_kind = {
+    'd': _REF_KEYS_SLOT,
+    'scope': _REF_SLOT,
+    '_name': _VALUE_SLOT,
+    'assign_done': _VALUE_SLOT,
+    'modules': _REF_SLOT,
+    'dependent_hyperps': _REF_SLOT,
+    '_hyperps': _REF_DICT_SLOT,
+    'module': _REF_SLOT,
+    '_local_name': _VALUE_SLOT,
+    'from_output': _REF_SLOT,
+    'to_inputs': _REF_LIST_SLOT,
+    'inputs': _REF_DICT_SLOT,
+    'outputs': _REF_DICT_SLOT,
+    'hyperps': _REF_DICT_SLOT,
+    '_is_compiled': _VALUE_SLOT,
+    '_is_settled': _VALUE_SLOT,
+}
+
+
+def _get_slots(t):
+    """Returns the slots of a class grouped by kind.
+
+    Returns:
+        (list[str], list[str], list[(str, int)], list[str], bool):
+            Names of the value slots, the reference slots, the slots with
+            containers of references (along with their kinds), and the
+            other slots, and whether the instances have a ``__dict__``.
+    """
+    slots = _type_to_slots.get(t)
+    if slots is None:
+        value_names = []
+        ref_names = []
+        ref_container_slots = []
+        generic_names = []
+        for c in t.__mro__:
+            names = c.__dict__.get('__slots__', ())
+            if isinstance(names, str):
+                names = (names,)
+            is_core = c in (OrderedSet, Addressable, Hyperparameter,
+                            DependentHyperparameter, Input, Output, Module)
+            for name in names:
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                kind = _core_slot_to_kind.get(name, _GENERIC_SLOT) if \
+                    is_core else _GENERIC_SLOT
+                if kind == _VALUE_SLOT:
+                    value_names.append(name)
+                elif kind == _REF_SLOT:
+                    ref_names.append(name)
+                elif kind == _GENERIC_SLOT:
+                    generic_names.append(name)
+                else:
+                    ref_container_slots.append((name, kind))
+        slots = (value_names, ref_names, ref_container_slots, generic_names,
+                 t.__dictoffset__ != 0)
+        _type_to_slots[t] = slots
+    return slots
+
+
+def _make_cell():
+    x = None
+    return (lambda: x).__closure__[0]
+
+
+_CellType = type(_make_cell())
+_missing = object()
+
+
+class _Forker:
+    """Copies the objects reachable from a list of objects.
+
+    The copy is done in two phases. In the first phase, the reachable objects
+    are found and the mutable ones that need to be copied get an empty copy.
+    In the second phase, the empty copies are filled in, mapping the objects
+    that they refer to to their copies. Both phases avoid recursion through the
+    graph, so deep graphs can be copied.
+    """
+
+    def __init__(self, objs):
+        self.memo = {}
+        self.needs_copy = set()
+        self.scope_to_new_scope = {}
+        # instances and other mutable objects with an empty copy.
+        self.forked = []
+        self.forked_others = []
+        # containers in the slots of the core classes with an empty copy,
+        # along with the kind of the slot.
+        self.ref_containers = []
+        self._find_objects_to_copy(objs)
+
+        for x in self.forked:
+            self._fill_instance(x, self.memo[id(x)])
+        for x in self.forked_others:
+            self._fill(x, self.memo[id(x)])
+        for x, slot_kind in self.ref_containers:
+            self._fill_ref_container(x, self.memo[id(x)], slot_kind)
+        self._register_copies()
+        self.copies = [self._map(x) for x in objs]
+
+    def get_copies(self):
+        return self.copies
+
+    def _get_children(self, x, kind):
+        if kind == _SEQUENCE or kind == _LIST:
+            return x
+        elif kind == _DICT:
+            return list(x.keys()) + list(x.values())
+        elif kind == _FUNCTION:
+            children = [] if x.__closure__ is None else list(x.__closure__)
+            children.append(x.__defaults__)
+            children.append(x.__kwdefaults__)
+            return children
+        elif kind == _CELL:
+            try:
+                return [x.cell_contents]
+            except ValueError:
+                return []
+        elif kind == _METHOD:
+            return [x.__self__, x.__func__]
+        else:
+            return []
+
+    def _find_objects_to_copy(self, objs):
+        # only the objects that may need to be copied are kept track of. The
+        # instances (and scopes) always need to be copied. The parents of
+        # other objects are kept to propagate the need to copy them.
+        type_to_kind = _type_to_kind
+        memo = self.memo
+        needs_copy = self.needs_copy
+        forked = self.forked
+        ref_containers = self.ref_containers
+        id_to_obj = {}
+        id_to_parent_ids = {}
+        others = []
+        stack = []
+
+        def visit(c, parent_id):
+            t = type(c)
+            kind = type_to_kind.get(t)
+            if kind is None:
+                kind = _get_kind(t)
+            if kind == _LEAF:
+                return
+            c_id = id(c)
+            if kind == _INSTANCE or kind == _SCOPE or c_id in needs_copy:
+                if parent_id is not None:
+                    needs_copy.add(parent_id)
+                visit_ref(c)
+            elif kind == _OTHER:
+                # copied with copy.deepcopy when first needed.
+                needs_copy.add(c_id)
+                if parent_id is not None:
+                    needs_copy.add(parent_id)
+            elif c_id not in id_to_obj:
+                id_to_obj[c_id] = c
+                id_to_parent_ids[c_id] = [] if parent_id is None else [
+                    parent_id
+                ]
+                if kind == _LIST or kind == _DICT or kind == _CELL:
+                    needs_copy.add(c_id)
+                    if parent_id is not None:
+                        needs_copy.add(parent_id)
+                others.append(c)
+                stack.append((c, kind))
+            elif parent_id is not None:
+                id_to_parent_ids[c_id].append(parent_id)
+
+        def visit_ref(c):
+            c_id = id(c)
+            if c is None or c_id in needs_copy:
+                return
+            needs_copy.add(c_id)
+            if c_id in id_to_obj:
+                # container already found, which is copied along with the
+                # other containers.
+                return
+            if isinstance(c, Scope):
+                if c not in self.scope_to_new_scope:
+                    self.scope_to_new_scope[c] = Scope()
+                memo[c_id] = self.scope_to_new_scope[c]
+            else:
+                t = type(c)
+                memo[c_id] = t.__new__(t)
+                stack.append((c, _INSTANCE))
+
+        for x in objs:
+            visit(x, None)
+
+        while len(stack) > 0:
+            x, kind = stack.pop()
+            x_id = id(x)
+            if kind == _INSTANCE:
+                (_, ref_names, ref_container_slots, generic_names,
+                 has_dict) = _get_slots(type(x))
+                for name in ref_names:
+                    v = getattr(x, name, None)
+                    if v is not None and id(v) not in needs_copy:
+                        visit_ref(v)
+                for name, slot_kind in ref_container_slots:
+                    v = getattr(x, name, None)
+                    if v is None:
+                        continue
+                    # these containers may be shared with other objects,
+                    # e.g., the dictionaries returned by get_io.
+                    v_id = id(v)
+                    if v_id not in needs_copy:
+                        needs_copy.add(v_id)
+                        if v_id not in id_to_obj:
+                            memo[v_id] = type(v)()
+                            ref_containers.append((v, slot_kind))
+                            for c in (v.values()
+                                      if slot_kind == _REF_DICT_SLOT else v):
+                                if id(c) not in needs_copy:
+                                    visit_ref(c)
+                for name in generic_names:
+                    v = getattr(x, name, _missing)
+                    if v is not _missing:
+                        visit(v, x_id)
+                if has_dict:
+                    for c in x.__dict__.values():
+                        visit(c, x_id)
+                forked.append(x)
+            else:
+                for c in self._get_children(x, kind):
+                    visit(c, x_id)
+
+        # an object needs to be copied if it refers to an object that needs
+        # to be copied.
+        stack = [x_id for x_id in needs_copy if x_id in id_to_parent_ids]
+        while len(stack) > 0:
+            for parent_id in id_to_parent_ids[stack.pop()]:
+                if parent_id not in needs_copy:
+                    needs_copy.add(parent_id)
+                    stack.append(parent_id)
+
+        for x in others:
+            x_id = id(x)
+            if x_id not in needs_copy:
+                continue
+            t = type(x)
+            kind = type_to_kind[t]
+            if kind == _CELL:
+                memo[x_id] = _make_cell()
+                self.forked_others.append(x)
+            elif t is list or t is set:
+                memo[x_id] = t()
+                self.forked_others.append(x)
+            elif kind == _DICT:
+                y = x.copy()
+                y.clear()
+                memo[x_id] = y
+                self.forked_others.append(x)
+            # immutable objects (i.e., tuples, frozensets, functions, and
+            # methods) are created when they are first needed.
+
+    def _map(self, x):
+        x_id = id(x)
+        if x_id not in self.needs_copy:
+            return x
+        y = self.memo.get(x_id, _missing)
+        if y is not _missing:
+            return y
+
+        t = type(x)
+        if _type_to_kind[t] == _OTHER:
+            # the copies made so far are passed as the memo, so the objects
+            # that refer to them (e.g., to hyperparameters) are copied
+            # consistently.
+            y = copy.deepcopy(x, self.memo)
+        elif t is tuple:
+            y = tuple([self._map(c) for c in x])
+        elif t is frozenset:
+            y = frozenset([self._map(c) for c in x])
+        elif t is types.FunctionType:
+            closure = None if x.__closure__ is None else tuple(
+                [self._map(c) for c in x.__closure__])
+            y = types.FunctionType(x.__code__, x.__globals__, x.__name__,
+                                   self._map(x.__defaults__), closure)
+            y.__kwdefaults__ = self._map(x.__kwdefaults__)
+            y.__qualname__ = x.__qualname__
+            y.__dict__.update(x.__dict__)
+        else:
+            y = types.MethodType(self._map(x.__func__), self._map(x.__self__))
+        self.memo[x_id] = y
+        return y
+
+    def _fill_instance(self, x, y):
+        memo = self.memo
+        setattr_ = object.__setattr__
+        (value_names, ref_names, ref_container_slots, generic_names,
+         has_dict) = _get_slots(type(x))
+        for name in value_names:
+            v = getattr(x, name, _missing)
+            if v is not _missing:
+                setattr_(y, name, v)
+        for name in ref_names:
+            v = getattr(x, name, _missing)
+            if v is not _missing:
+                setattr_(y, name, None if v is None else memo[id(v)])
+        for name, _ in ref_container_slots:
+            v = getattr(x, name, _missing)
+            if v is not _missing:
+                setattr_(y, name, None if v is None else memo[id(v)])
+        for name in generic_names:
+            v = getattr(x, name, _missing)
+            if v is not _missing:
+                setattr_(y, name, self._map(v))
+        if has_dict:
+            for name, v in x.__dict__.items():
+                setattr_(y, name, self._map(v))
+
+    def _fill(self, x, y):
+        t = type(x)
+        _map = self._map
+        if t is _CellType:
+            try:
+                y.cell_contents = _map(x.cell_contents)
+            except ValueError:
+                del y.cell_contents
+        elif t is list:
+            y.extend([_map(c) for c in x])
+        elif t is set:
+            y.update([_map(c) for c in x])
+        else:
+            for k, v in x.items():
+                y[_map(k)] = _map(v)
+
+    def _fill_ref_container(self, x, y, slot_kind):
+        memo = self.memo
+        if slot_kind == _REF_LIST_SLOT:
+            y.extend([memo[id(c)] for c in x])
+        elif slot_kind == _REF_DICT_SLOT:
+            for k, c in x.items():
+                y[k] = memo[id(c)]
+        else:
+            for c in x:
+                y[memo[id(c)]] = None
+
+    def _register_copies(self):
+        for scope, new_scope in self.scope_to_new_scope.items():
+            for prefix, i in scope.prefix_to_count.items():
+                while prefix + str(i) in scope.name_to_elem:
+                    i += 1
+                new_scope.prefix_to_count[prefix] = i
+
+        for x in self.forked:
+            if isinstance(x, Addressable):
+                y = self.memo[id(x)]
+                if y._name is not None:
+                    y.scope.name_to_elem[y._name] = y
+                else:
+                    y.scope._register_later(y)
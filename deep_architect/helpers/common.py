@@ -0,0 +1,72 @@
+"""Functionality shared by the framework helpers.
+
+The helpers wrap framework code (e.g., Tensorflow, PyTorch, or Keras) in
+DeepArchitect modules. They only import the framework when it is needed, e.g.,
+to compile a module, so search spaces can be created and specified in
+processes without the framework (e.g., the master in a distributed search), as
+long as the search spaces do not import it themselves.
+
+The values passed to the helper modules that are not hyperparameters are
+constants. They are wrapped in singleton hyperparameters that are assigned
+upon construction, so they are skipped by the hyperparameter iterators and do
+not show up in the lists of values used by the searchers and the logs. Lists
+of values logged before constants were assigned upon construction can be
+replayed in legacy constants mode.
+"""
+import deep_architect.core as co
+from deep_architect.hyperparameters import D
+
+_is_legacy_constants = False
+
+
+def set_legacy_constants_mode(is_legacy_constants):
+    """Sets whether the constants of the helper modules are subsequently left
+    unassigned upon construction.
+
+    This is needed to replay lists of values that were logged when the
+    constants were specified as any other hyperparameter, i.e., lists of values
+    that contain the values of the constants.
+
+    Args:
+        is_legacy_constants (bool): Whether to leave the singleton
+            hyperparameters wrapping the constants unassigned.
+    """
+    global _is_legacy_constants
+    _is_legacy_constants = is_legacy_constants
+
+
+def is_legacy_constants_mode():
+    """Checks if the constants of the helper modules are left unassigned upon
+    construction.
+
+    Returns:
+        bool: ``True`` if legacy constants mode is on, ``False`` otherwise.
+    """
+    return _is_legacy_constants
+
+
+def get_hyperp_dict(name_to_hyperp):
+    """Wraps the values that are not hyperparameters in singleton hyperparameters.
+
+    The singleton hyperparameters are assigned their value right away, unless
+    legacy constants mode is on.
+
+    Args:
+        name_to_hyperp (dict[str, object]): Dictionary mapping hyperparameter
+            names to hyperparameters or to values.
+
+    Returns:
+        dict[str, deep_architect.core.Hyperparameter]: Dictionary mapping
+            hyperparameter names to hyperparameters.
+    """
+    hyperparam_dict = {}
+    for h in name_to_hyperp:
+        if not isinstance(name_to_hyperp[h], co.Hyperparameter):
+            v = name_to_hyperp[h]
+            hyperparam_dict[h] = D([v])
+            if not _is_legacy_constants:
+                hyperparam_dict[h]._assign_value(v)
+        else:
+            hyperparam_dict[h] = name_to_hyperp[h]
+    return hyperparam_dict
+
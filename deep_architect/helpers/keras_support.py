@@ -1,7 +1,7 @@
 import deep_architect.core as co
+import deep_architect.helpers.common as hco
 import deep_architect.modules as mo
 import deep_architect.searchers.common as seco
-from deep_architect.hyperparameters import D
 
 
 class KerasModule(co.Module):
@@ -56,6 +56,8 @@ class KerasModule(co.Module):
 
     """
 
+    __slots__ = ('_compile_fn', '_fn')
+
     def __init__(self,
                  name,
                  compile_fn,
@@ -64,14 +66,8 @@ class KerasModule(co.Module):
                  output_names,
                  scope=None):
         co.Module.__init__(self, scope, name)
-        hyperparam_dict = {}
-        for h in name_to_hyperp:
-            if not isinstance(name_to_hyperp[h], co.Hyperparameter):
-                hyperparam_dict[h] = D([name_to_hyperp[h]])
-            else:
-                hyperparam_dict[h] = name_to_hyperp[h]
-
-        self._register(input_names, output_names, hyperparam_dict)
+        self._register(input_names, output_names,
+                       hco.get_hyperp_dict(name_to_hyperp))
         self._compile_fn = compile_fn
 
     def _compile(self):
@@ -88,6 +84,9 @@ class KerasModule(co.Module):
     def _update(self):
         pass
 
+    def _forward_with_values(self, input_name_to_val):
+        return self._fn(input_name_to_val)
+
 
 def keras_module(name,
                  compile_fn,
@@ -137,17 +136,10 @@ class KerasRandomModel:
         self.inputs = inputs
         self.outputs = outputs
         # precomputed for efficiency reasons. not necessary for static graphs.
-        self._module_seq = co.determine_module_eval_seq(inputs)
+        self._plan = co.compile_plan(inputs, outputs)
 
     def forward(self, input_name_to_val):
-        input_to_val = {
-            self.inputs[name]: val for (name, val) in input_name_to_val.items()
-        }
-        co.forward(input_to_val, self._module_seq)
-        output_name_to_val = {
-            name: ox.val for (name, ox) in self.outputs.items()
-        }
-        return output_name_to_val
+        return self._plan.forward(input_name_to_val)
 
     def get_hyperp_values(self):
         return self.hyperp_value_lst
\ No newline at end of file
@@ -1,6 +1,5 @@
-import torch.nn as nn
 import deep_architect.core as co
-from deep_architect.hyperparameters import D
+import deep_architect.helpers.common as hco
 
 
 class PyTorchModule(co.Module):
@@ -59,6 +58,8 @@ class PyTorchModule(co.Module):
             registered.
     """
 
+    __slots__ = ('_compile_fn', '_fn', 'pyth_modules')
+
     def __init__(self,
                  name,
                  compile_fn,
@@ -67,17 +68,13 @@ class PyTorchModule(co.Module):
                  output_names,
                  scope=None):
         co.Module.__init__(self, scope, name)
-        hyperparam_dict = {}
-        for h in name_to_hyperp:
-            if not isinstance(name_to_hyperp[h], co.Hyperparameter):
-                hyperparam_dict[h] = D([name_to_hyperp[h]])
-            else:
-                hyperparam_dict[h] = name_to_hyperp[h]
-
-        self._register(input_names, output_names, hyperparam_dict)
+        self._register(input_names, output_names,
+                       hco.get_hyperp_dict(name_to_hyperp))
         self._compile_fn = compile_fn
 
     def _compile(self):
+        import torch.nn as nn
+
         input_name_to_val = self._get_input_values()
         hyperp_name_to_val = self._get_hyperp_values()
         self._fn, self.pyth_modules = self._compile_fn(input_name_to_val,
@@ -93,6 +90,9 @@ class PyTorchModule(co.Module):
     def _update(self):
         pass
 
+    def _forward_with_values(self, input_name_to_val):
+        return self._fn(input_name_to_val)
+
 
 def siso_pytorch_module(name, compile_fn, name_to_hyperp, scope=None):
     return PyTorchModule(name, compile_fn, name_to_hyperp, ['in'], ['out'],
@@ -166,48 +166,56 @@ def parameters(outputs):
     return ps
 
 
-class PyTorchModel(nn.Module):
-    """Encapsulates a network of modules of type :class:`deep_architect.helpers.pytorch_support.PyTorchModule`
-    in a way that they can be used as :class:`torch.nn.Module`, e.g.,
-    functionality to move the computation of the GPU or to get all the parameters
-    involved in the computation are available.
+def _get_pytorch_model_class():
+    import torch.nn as nn
 
-    Using this class is the recommended way of wrapping a Pytorch architecture
-    sampled from a search space. The topological order for evaluating for
-    doing the forward computation of the architecture is computed by the
-    container and cached for future calls to forward.
+    class PyTorchModel(nn.Module):
+        """Encapsulates a network of modules of type :class:`deep_architect.helpers.pytorch_support.PyTorchModule`
+        in a way that they can be used as :class:`torch.nn.Module`, e.g.,
+        functionality to move the computation of the GPU or to get all the parameters
+        involved in the computation are available.
 
-    Args:
-        inputs (dict[str,deep_architect.core.Input]): Dictionary of names to inputs.
-        outputs (dict[str,deep_architect.core.Output]): Dictionary of names to outputs.
-    """
+        Using this class is the recommended way of wrapping a Pytorch architecture
+        sampled from a search space. The forward evaluation plan of the
+        architecture (see :func:`deep_architect.core.compile_plan`) is computed by
+        the container and cached for future calls to forward.
 
-    def __init__(self, inputs, outputs, init_input_name_to_val):
-        nn.Module.__init__(self)
-
-        self.outputs = outputs
-        self.inputs = inputs
-        self._module_seq = co.determine_module_eval_seq(self.inputs)
-        self.forward(init_input_name_to_val)
-        modules = get_pytorch_modules(self.outputs)
-        for i, m in enumerate(modules):
-            self.add_module(str(i), m)
-
-    def __call__(self, input_name_to_val):
-        return self.forward(input_name_to_val)
-
-    # TODO: needs additional error checking to make sure that the set of
-    # outputs is correct.
-    def forward(self, input_name_to_val):
-        """Forward computation of the module that is represented through the
-        graph of DeepArchitect modules.
+        Args:
+            inputs (dict[str,deep_architect.core.Input]): Dictionary of names to inputs.
+            outputs (dict[str,deep_architect.core.Output]): Dictionary of names to outputs.
         """
 
-        input_to_val = {
-            ix: input_name_to_val[name] for (name, ix) in self.inputs.items()
-        }
-        co.forward(input_to_val, self._module_seq)
-        output_name_to_val = {
-            name: ox.val for (name, ox) in self.outputs.items()
-        }
-        return output_name_to_val
\ No newline at end of file
+        def __init__(self, inputs, outputs, init_input_name_to_val):
+            nn.Module.__init__(self)
+
+            self.outputs = outputs
+            self.inputs = inputs
+            self._plan = co.compile_plan(self.inputs, self.outputs)
+            self.forward(init_input_name_to_val)
+            modules = get_pytorch_modules(self.outputs)
+            for i, m in enumerate(modules):
+                self.add_module(str(i), m)
+
+        def __call__(self, input_name_to_val):
+            return self.forward(input_name_to_val)
+
+        # TODO: needs additional error checking to make sure that the set of
+        # outputs is correct.
+        def forward(self, input_name_to_val):
+            """Forward computation of the module that is represented through the
+            graph of DeepArchitect modules.
+            """
+            return self._plan.forward(input_name_to_val)
+
+    PyTorchModel.__qualname__ = 'PyTorchModel'
+    return PyTorchModel
+
+
+def __getattr__(name):
+    # PyTorchModel subclasses torch.nn.Module, so it is only defined when it
+    # is first used, and importing this module does not import PyTorch.
+    if name == 'PyTorchModel':
+        cls = _get_pytorch_model_class()
+        globals()[name] = cls
+        return cls
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
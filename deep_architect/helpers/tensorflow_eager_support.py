@@ -1,8 +1,7 @@
 import numpy as np
-import tensorflow as tf
 
 import deep_architect.core as co
-from deep_architect.hyperparameters import D
+import deep_architect.helpers.common as hco
 
 
 class TensorflowEagerModule(co.Module):
@@ -56,6 +55,8 @@ class TensorflowEagerModule(co.Module):
             registered.
     """
 
+    __slots__ = ('_compile_fn', '_fn', 'is_training')
+
     def __init__(self,
                  name,
                  compile_fn,
@@ -64,14 +65,8 @@ class TensorflowEagerModule(co.Module):
                  output_names,
                  scope=None):
         co.Module.__init__(self, scope, name)
-        hyperparam_dict = {}
-        for h in name_to_hyperp:
-            if not isinstance(name_to_hyperp[h], co.Hyperparameter):
-                hyperparam_dict[h] = D([name_to_hyperp[h]])
-            else:
-                hyperparam_dict[h] = name_to_hyperp[h]
-
-        self._register(input_names, output_names, hyperparam_dict)
+        self._register(input_names, output_names,
+                       hco.get_hyperp_dict(name_to_hyperp))
         self._compile_fn = compile_fn
         self.is_training = True
 
@@ -89,6 +84,9 @@ class TensorflowEagerModule(co.Module):
     def _update(self):
         pass
 
+    def _forward_with_values(self, input_name_to_val):
+        return self._fn(input_name_to_val, is_training=self.is_training)
+
 
 def set_is_training(outputs, is_training):
 
@@ -124,5 +122,7 @@ def siso_tensorflow_eager_module_from_tensorflow_op_fn(layer_fn,
 
 
 def get_num_trainable_parameters():
+    import tensorflow as tf
+
     return np.sum(
         [np.prod(v.get_shape().as_list()) for v in tf.trainable_variables()])
\ No newline at end of file
@@ -1,7 +1,6 @@
-import tensorflow as tf
 import numpy as np
 import deep_architect.core as co
-from deep_architect.hyperparameters import D
+import deep_architect.helpers.common as hco
 
 
 class TensorflowModule(co.Module):
@@ -58,6 +57,8 @@ class TensorflowModule(co.Module):
 
     """
 
+    __slots__ = ('_compile_fn', '_fn', 'train_feed', 'eval_feed')
+
     def __init__(self,
                  name,
                  compile_fn,
@@ -66,14 +67,8 @@ class TensorflowModule(co.Module):
                  output_names,
                  scope=None):
         co.Module.__init__(self, scope, name)
-        hyperparam_dict = {}
-        for h in name_to_hyperp:
-            if not isinstance(name_to_hyperp[h], co.Hyperparameter):
-                hyperparam_dict[h] = D([name_to_hyperp[h]])
-            else:
-                hyperparam_dict[h] = name_to_hyperp[h]
-
-        self._register(input_names, output_names, hyperparam_dict)
+        self._register(input_names, output_names,
+                       hco.get_hyperp_dict(name_to_hyperp))
         self._compile_fn = compile_fn
 
     def _compile(self):
@@ -94,6 +89,9 @@ class TensorflowModule(co.Module):
     def _update(self):
         pass
 
+    def _forward_with_values(self, input_name_to_val):
+        return self._fn(input_name_to_val)
+
 
 def siso_tensorflow_module(name, compile_fn, name_to_hyperp, scope=None):
     return TensorflowModule(name, compile_fn, name_to_hyperp, ['in'], ['out'],
@@ -150,5 +148,7 @@ def get_feed_dicts(outputs):
 
 
 def get_num_trainable_parameters():
+    import tensorflow as tf
+
     return np.sum(
         [np.prod(v.get_shape().as_list()) for v in tf.trainable_variables()])
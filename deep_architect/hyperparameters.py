@@ -1,4 +1,6 @@
-import numpy as np
+import math
+import numbers
+import sys
 from collections import OrderedDict
 import deep_architect.core as co
 
@@ -67,40 +69,135 @@ class Discrete(co.Hyperparameter):
             in the scope is derived.
     """
 
+    __slots__ = ('vs', '_val_to_idx')
+
     def __init__(self, vs, scope=None, name=None):
         assert len(vs) > 0
         co.Hyperparameter.__init__(self, scope, name)
         self.vs = vs
+        self._val_to_idx = None
+
+    def assign_index(self, idx):
+        """Assigns the value at the given position in the list of values.
+
+        The value is in the list of values, so it is assigned without
+        checking it (see :meth:`deep_architect.core.Hyperparameter.assign_value`),
+        which takes constant time, even for values that are not hashable.
+
+        Args:
+            idx (int): Position of the value in the list of values.
+        """
+        assert 0 <= idx < len(self.vs)
+        self._assign_value(self.vs[idx])
+
+    def get_index(self, val):
+        """Returns the position of the value in the list of values.
+
+        If the value appears multiple times, the first position is returned.
+        A dictionary from values to positions is built on the first call, so
+        the following calls take constant time for hashable values.
+
+        Args:
+            val (object): Value in the list of values.
+
+        Returns:
+            int: Position of the value in the list of values.
+
+        Raises:
+            ValueError: If the value is not in the list of values.
+        """
+        idx = self._find_index(val)
+        if idx < 0:
+            raise ValueError("%s is not a value of %s" % (val, self.get_name()))
+        return idx
+
+    def _find_index(self, val):
+        if self._val_to_idx is None:
+            val_to_idx = {}
+            try:
+                for idx, v in enumerate(self.vs):
+                    val_to_idx.setdefault(v, idx)
+            except TypeError:
+                # some of the values are not hashable.
+                val_to_idx = False
+            self._val_to_idx = val_to_idx
+
+        if self._val_to_idx is not False:
+            try:
+                return self._val_to_idx.get(val, -1)
+            except TypeError:
+                pass
+        for idx, v in enumerate(self.vs):
+            if v == val:
+                return idx
+        return -1
 
     def _check_value(self, val):
         """Checks if the chosen values is in the list of valid values.
 
         Asserts ``False`` if the value is not in the list.
         """
-        if val not in self.vs:
-            print(self.get_name())
-            print(self.vs)
-            print(val)
-        assert val in self.vs
+        # the dictionary of values is only built if the index is needed.
+        if self._val_to_idx is None:
+            assert val in self.vs
+        else:
+            assert self._find_index(val) >= 0
+
+    def _get_domain_label(self):
+        return self.vs
 
 
 class Bool(Discrete):
+    __slots__ = ()
 
     def __init__(self, scope=None, name=None):
         Discrete.__init__(self, [0, 1], scope, name)
 
 
 class OneOfK(Discrete):
+    __slots__ = ()
 
     def __init__(self, k, scope=None, name=None):
         Discrete.__init__(self, list(range(k)), scope, name)
 
 
 class OneOfKFactorial(Discrete):
+    """Hyperparameter that takes one of ``k!`` values, e.g., to index the
+    permutations of ``k`` elements (see
+    :func:`deep_architect.modules.siso_permutation`).
+
+    The values are kept in a ``range`` rather than a list, so the number of
+    values does not affect the memory used, or the time to check or draw
+    a value. The length of the ``range`` has to fit in a machine integer
+    (as for ``len``, and for drawing a value with numpy), which limits ``k``
+    to at most 20 on 64-bit platforms.
+
+    Raises:
+        ValueError: If ``k!`` does not fit in a machine integer.
+    """
+
+    __slots__ = ()
 
     def __init__(self, k, scope=None, name=None):
-        Discrete.__init__(self, list(range(np.product(np.arange(1, k + 1)))),
-                          scope, name)
+        num_vals = math.factorial(k)
+        if num_vals > sys.maxsize:
+            raise ValueError(
+                "Too many permutations of %d elements: %d! does not fit in "
+                "a machine integer." % (k, k))
+        Discrete.__init__(self, range(num_vals), scope, name)
+
+    def _find_index(self, val):
+        # also constant time for integer types that are not int, e.g., numpy.
+        if isinstance(val, numbers.Integral) and 0 <= val < len(self.vs):
+            return int(val)
+        return -1
+
+    def _check_value(self, val):
+        assert self._find_index(val) >= 0
+
+    def _get_domain_label(self):
+        # the range is not JSON serializable.
+        return ['range', len(self.vs)]
 
 
 # abbreviations
@@ -1,5 +1,5 @@
 import deep_architect.core as co
-import itertools
+import math
 
 
 class Identity(co.Module):
@@ -13,6 +13,8 @@ class Identity(co.Module):
             the name.
     """
 
+    __slots__ = ()
+
     def __init__(self, scope=None, name=None):
         co.Module.__init__(self, scope, name)
         self._register_input("in")
@@ -26,6 +28,7 @@ class Identity(co.Module):
 
 
 class HyperparameterAggregator(co.Module):
+    __slots__ = ()
 
     def __init__(self, name_to_hyperp, scope=None, name=None):
         co.Module.__init__(self, scope, name)
@@ -76,6 +79,9 @@ class SubstitutionModule(co.Module):
             substitution function must contain exactly the same output names.
     """
 
+    __slots__ = ('allow_input_subset', 'allow_output_subset',
+                 '_substitution_fn', '_is_done')
+
     def __init__(self,
                  name,
                  substitution_fn,
@@ -92,7 +98,11 @@ class SubstitutionModule(co.Module):
         self._register(input_names, output_names, name_to_hyperp)
         self._substitution_fn = substitution_fn
         self._is_done = False
-        self._update()
+        co._request_update(self)
+
+    def _get_structure_label(self):
+        return None if self._is_done else co._get_fn_label(
+            self._substitution_fn)
 
     def _update(self):
         """Implements the substitution operation.
@@ -232,6 +242,22 @@ def _get_name(name, default_name):
     return name if name is not None else default_name
 
 
+def _get_permutation(n, perm_idx):
+    """Returns the permutation of ``range(n)`` at position ``perm_idx`` in the
+    lexicographic order (i.e., the order of ``itertools.permutations``).
+
+    The digits of the index in the factorial number system (i.e., its Lehmer
+    code) determine the element picked at each position.
+    """
+    assert 0 <= perm_idx < math.factorial(n)
+    remaining = list(range(n))
+    idxs = []
+    for i in range(n - 1, -1, -1):
+        k, perm_idx = divmod(perm_idx, math.factorial(i))
+        idxs.append(remaining.pop(k))
+    return idxs
+
+
 # TODO: perhaps make the most general behavior with fn_lst being a general
 # indexable object more explicit.
 def mimo_or(fn_lst, h_or, input_names, output_names, scope=None, name=None):
@@ -515,9 +541,7 @@ def siso_permutation(fn_lst, h_perm, scope=None, name=None):
     """
 
     def substitution_fn(dh):
-        g = itertools.permutations(range(len(fn_lst)))
-        for _ in range(dh["perm_idx"] + 1):
-            idxs = next(g)
+        idxs = _get_permutation(len(fn_lst), dh["perm_idx"])
 
         inputs_lst = []
         outputs_lst = []
@@ -744,4 +768,4 @@ class SearchSpaceFactory:
             co.Scope.reset_default_scope()
 
         (inputs, outputs) = buffer_io(*self.search_space_fn())
-        return inputs, outputs
\ No newline at end of file
+        return inputs, outputs
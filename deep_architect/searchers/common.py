@@ -1,7 +1,13 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import deep_architect.core as co
 import deep_architect.modules as mo
 import deep_architect.hyperparameters as hp
+import deep_architect.surrogates.common as suco
 
 
 class Searcher:
@@ -22,14 +28,20 @@ class Searcher:
             encoding the search space from which models can be sampled by
             specifying all hyperparameters (i.e., both those arising in the
             graph part and those in the dictionary of hyperparameters).
+            A :class:`deep_architect.modules.SearchSpaceFactory` can also be
+            given, in which case its search spaces are used directly and
+            ``reset_default_scope_upon_sample`` is ignored.
         reset_default_scope_upon_get (bool): Whether to clean the scope upon getting
             a new search space. Should be ``True`` unless you want to persist models
             across samples.
     """
 
     def __init__(self, search_space_fn, reset_default_scope_upon_sample=True):
-        x = mo.SearchSpaceFactory(search_space_fn,
-                                  reset_default_scope_upon_sample)
+        if isinstance(search_space_fn, mo.SearchSpaceFactory):
+            x = search_space_fn
+        else:
+            x = mo.SearchSpaceFactory(search_space_fn,
+                                      reset_default_scope_upon_sample)
         self.search_space_fn = x.get_search_space
 
     def sample(self):
@@ -67,6 +79,45 @@ class Searcher:
         """
         raise NotImplementedError
 
+    def sample_batch(self, num_samples, num_workers=None, seed=None):
+        """Samples multiple models from the search space.
+
+        Only the values and the searcher evaluation tokens are returned, so
+        the models can be sampled in worker processes, each creating and
+        specifying its own search spaces. Each model is sampled with its own
+        seed for the ``random`` and ``numpy.random`` generators, so the result
+        only depends on ``seed`` (or on the state of ``numpy.random`` if no seed
+        is given), and not on the number of workers.
+
+        The default implementation calls :meth:`sample` in forked worker
+        processes, so it is only valid for searchers whose :meth:`sample` does
+        not change the state of the searcher. Changes made in the workers are
+        lost. Other searchers should override this method (see
+        :func:`map_with_searcher`). If forking is not available, the models
+        are sampled sequentially in the current process.
+
+        .. note::
+            Forking a process that runs other threads is unsafe, as locks
+            held by those threads stay locked in the workers. Only use worker
+            processes from single-threaded processes.
+
+        Args:
+            num_samples (int): Number of models to sample.
+            num_workers (int, optional): Number of worker processes. If none
+                is given, the models are sampled sequentially in the current
+                process.
+            seed (int, optional): Seed from which the seeds of the samples are
+                drawn.
+
+        Returns:
+            list[(list[object], dict[str, object])]:
+                List with the list of values and the searcher evaluation token
+                for each model sampled. See :meth:`sample`.
+        """
+        seeds = get_sample_seeds(num_samples, seed)
+        return map_with_searcher(self, sample_with_seed, [(s,) for s in seeds],
+                                 num_workers)
+
     # TODO: needs to be changed to a nicer API. use sparsely.
     # NOTE: this solution only allows a single saved state per frolder.
     def save_state(self, folderpath):
@@ -76,26 +127,121 @@ class Searcher:
         raise NotImplementedError
 
 
+def get_sample_seeds(num_samples, seed=None):
+    """Draws the seeds of the models sampled by :meth:`Searcher.sample_batch`.
+
+    Args:
+        num_samples (int): Number of seeds to draw.
+        seed (int, optional): Seed from which the seeds are drawn. If none is
+            given, the seeds are drawn with ``numpy.random``.
+
+    Returns:
+        list[int]: Seeds of the models.
+    """
+    rs = np.random.RandomState(seed) if seed is not None else np.random
+    return [int(s) for s in rs.randint(2**31 - 1, size=num_samples)]
+
+
+def sample_with_seed(searcher, seed):
+    """Calls :meth:`Searcher.sample` with the random number generators seeded.
+
+    Args:
+        searcher (deep_architect.searchers.common.Searcher): Searcher to
+            sample a model from.
+        seed (int): Seed for the ``random`` and ``numpy.random`` generators.
+
+    Returns:
+        (list[object], dict[str, object]):
+            List of values and searcher evaluation token of the model sampled.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    _, _, vs, searcher_eval_token = searcher.sample()
+    return vs, searcher_eval_token
+
+
+# searcher of the worker processes of map_with_searcher. it is inherited upon
+# forking, so it does not need to be picklable.
+_worker_searcher = None
+
+
+def _set_worker_searcher(searcher):
+    global _worker_searcher
+    _worker_searcher = searcher
+
+
+def _call_with_worker_searcher(fn, args):
+    return fn(_worker_searcher, *args)
+
+
+def map_with_searcher(searcher, fn, args_lst, num_workers=None):
+    """Calls ``fn(searcher, *args)`` for each of the arguments in forked worker
+    processes, and returns the results in order.
+
+    Used to implement :meth:`Searcher.sample_batch`. The calls are done
+    sequentially in the current process if no number of workers or a single
+    worker is given, or if forking is not available. In that case, the state
+    of the ``random`` and ``numpy.random`` generators is restored afterwards,
+    as it is not changed by the calls done in worker processes.
+
+    Args:
+        searcher (deep_architect.searchers.common.Searcher): Searcher passed
+            to ``fn``. Each worker process gets a copy upon forking.
+        fn ((deep_architect.searchers.common.Searcher, ...) -> object):
+            Function to call. It must be picklable, e.g., defined at the
+            module level.
+        args_lst (list[tuple]): Arguments of each call, after the searcher.
+        num_workers (int, optional): Number of worker processes.
+
+    Returns:
+        list[object]: Results of the calls.
+    """
+    can_fork = 'fork' in multiprocessing.get_all_start_methods()
+    if (num_workers is None or num_workers == 1 or len(args_lst) <= 1 or
+            not can_fork):
+        random_state = random.getstate()
+        np_random_state = np.random.get_state()
+        try:
+            return [fn(searcher, *args) for args in args_lst]
+        finally:
+            random.setstate(random_state)
+            np.random.set_state(np_random_state)
+
+    with ProcessPoolExecutor(num_workers,
+                             mp_context=multiprocessing.get_context('fork'),
+                             initializer=_set_worker_searcher,
+                             initargs=(searcher,)) as executor:
+        # sends the arguments in chunks to reduce the communication overhead.
+        chunksize = max(1, len(args_lst) // (4 * num_workers))
+        return list(
+            executor.map(_call_with_worker_searcher, [fn] * len(args_lst),
+                         args_lst,
+                         chunksize=chunksize))
+
+
 # TODO: generalize this for other types of hyperparameters. currently only supports
 # discrete hyperparameters.
-def random_specify_hyperparameter(hyperp):
+def random_specify_hyperparameter(hyperp, return_idx=False):
     """Choose a random value for an unspecified hyperparameter.
 
     The hyperparameter becomes specified after the call.
 
     hyperp (deep_architect.core.Hyperparameter): Hyperparameter to specify.
+    return_idx (bool, optional): Whether to also return the position of the
+        value in the list of values of the hyperparameter.
     """
     assert not hyperp.has_value_assigned()
 
     if isinstance(hyperp, hp.Discrete):
-        v = hyperp.vs[np.random.randint(len(hyperp.vs))]
-        hyperp.assign_value(v)
+        idx = np.random.randint(len(hyperp.vs))
+        hyperp.assign_index(idx)
+        v = hyperp.get_value()
     else:
         raise ValueError
-    return v
+    return (v, idx) if return_idx else v
 
 
-def random_specify(outputs):
+def random_specify(outputs, return_idxs=False):
     """Chooses random values to all the unspecified hyperparameters.
 
     The hyperparameters will be specified after this call, meaning that the
@@ -106,15 +252,57 @@ def random_specify(outputs):
             outputs which by being traversed back will reach all the modules
             in the search space, and correspondingly all the current
             unspecified hyperparameters of the search space.
+        return_idxs (bool, optional): Whether to also return the positions
+            of the values in the lists of values of the hyperparameters.
+
+    Returns:
+        list[object] or (list[object], numpy.ndarray):
+            List of values assigned to the hyperparameters. If ``return_idxs``
+            is ``True``, also an ``int32`` array with the positions of the
+            values (see :func:`specify_idxs`).
     """
     hyperp_value_lst = []
+    hyperp_idx_lst = []
     for h in co.unassigned_independent_hyperparameter_iterator(outputs):
-        v = random_specify_hyperparameter(h)
+        v, idx = random_specify_hyperparameter(h, return_idx=True)
         hyperp_value_lst.append(v)
+        hyperp_idx_lst.append(idx)
+    if return_idxs:
+        return hyperp_value_lst, np.array(hyperp_idx_lst, dtype=np.int32)
+    else:
+        return hyperp_value_lst
+
+
+def specify_idxs(outputs, hyperp_idxs):
+    """Specify the parameters in the search space using the sequence of
+    positions of the values in the lists of values of the hyperparameters.
+
+    Same as :func:`specify`, but with the architecture encoded as a vector of
+    integers, e.g., as returned by :func:`random_specify`. These vectors take
+    less memory than the lists of values and can be operated on with NumPy,
+    e.g., to compare or mutate many architectures at once. Only supports
+    discrete hyperparameters.
+
+    Args:
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs which by being traversed back will reach all the modules
+            in the search space, and correspondingly all the current
+            unspecified hyperparameters of the search space.
+        hyperp_idxs (list[int] or numpy.ndarray): Positions of the values
+            used to specify the hyperparameters.
+
+    Returns:
+        list[object]: List of values assigned to the hyperparameters.
+    """
+    hyperp_value_lst = []
+    for i, h in enumerate(
+            co.unassigned_independent_hyperparameter_iterator(outputs)):
+        h.assign_index(int(hyperp_idxs[i]))
+        hyperp_value_lst.append(h.get_value())
     return hyperp_value_lst
 
 
-def specify(outputs, hyperp_value_lst):
+def specify(outputs, hyperp_value_lst, return_idxs=False):
     """Specify the parameters in the search space using the sequence of values
     passed as argument.
 
@@ -132,7 +320,511 @@ def specify(outputs, hyperp_value_lst):
             in the search space, and correspondingly all the current
             unspecified hyperparameters of the search space.
         hyperp_value_lst (list[object]): List of values used to specify the hyperparameters.
+        return_idxs (bool, optional): Whether to return the positions of the
+            values in the lists of values of the hyperparameters (see
+            :func:`specify_idxs`). Only supports discrete hyperparameters.
+
+    Returns:
+        numpy.ndarray or None:
+            If ``return_idxs`` is ``True``, ``int32`` array with the positions
+            of the values. Otherwise, ``None``.
     """
+    hyperp_idx_lst = []
     for i, h in enumerate(
             co.unassigned_independent_hyperparameter_iterator(outputs)):
-        h.assign_value(hyperp_value_lst[i])
+        if return_idxs:
+            idx = h.get_index(hyperp_value_lst[i])
+            h.assign_index(idx)
+            hyperp_idx_lst.append(idx)
+        else:
+            h.assign_value(hyperp_value_lst[i])
+    if return_idxs:
+        return np.array(hyperp_idx_lst, dtype=np.int32)
+
+
+class _ValueTrieNode:
+    """Node of a trie over lists of hyperparameter values.
+
+    The trie is built as it is traversed. The lists going through a node are
+    only grouped into its children once the hyperparameter to assign at the
+    node is known, keyed by the position of their value in the list of values
+    of the hyperparameter, so the child of each list is found in constant time
+    (see :meth:`deep_architect.hyperparameters.Discrete.get_index`).
+
+    Once a single list goes through a node, its remaining values are
+    assigned directly, and the node has a single child for all of them.
+
+    Args:
+        lst_idxs (list[int]): Indices of the lists going through the node.
+        depth (int): Number of values assigned up to the node.
+        parent (_ValueTrieNode, optional): Parent of the node.
+        idxs (list[int], optional): Positions of the values assigned to get
+            from the parent to the node.
+        vs (list[object], optional): Values assigned to get from the parent
+            to the node.
+    """
+
+    def __init__(self, lst_idxs, depth, parent=None, idxs=(), vs=()):
+        self.lst_idxs = lst_idxs
+        self.depth = depth
+        self.parent = parent
+        self.idxs = idxs
+        self.vs = vs
+        self.children = None
+
+    def get_children(self, h, lsts, are_idxs):
+        """Groups the lists going through the node by their next value.
+
+        Args:
+            h (deep_architect.hyperparameters.Discrete): Hyperparameter to
+                assign at the node.
+            lsts (list[list[object]]): Lists of values, or of positions of
+                values if ``are_idxs`` is ``True``.
+            are_idxs (bool): Whether the lists have positions of values.
+
+        Returns:
+            list[_ValueTrieNode]: Children of the node, in the order of the
+                first list going through each of them.
+
+        Raises:
+            ValueError: If a list ends at the node.
+        """
+        if self.children is None:
+            idx_to_lst_idxs = {}
+            for i in self.lst_idxs:
+                lst = lsts[i]
+                if len(lst) <= self.depth:
+                    raise ValueError(
+                        "Not enough values to specify the search space: %s" %
+                        lst)
+                v = lst[self.depth]
+                idx = int(v) if are_idxs else h.get_index(v)
+                lst_idxs = idx_to_lst_idxs.get(idx)
+                if lst_idxs is None:
+                    idx_to_lst_idxs[idx] = [i]
+                else:
+                    lst_idxs.append(i)
+            self.children = [
+                _ValueTrieNode(lst_idxs, self.depth + 1, self, [idx],
+                               [h.vs[idx]])
+                for idx, lst_idxs in idx_to_lst_idxs.items()
+            ]
+        return self.children
+
+    def get_path(self):
+        """Returns the nodes from the root (excluded) to the node."""
+        path = []
+        node = self
+        while node.parent is not None:
+            path.append(node)
+            node = node.parent
+        path.reverse()
+        return path
+
+
+class _StateCopier:
+    """Gets copies of the partially specified search spaces of
+    :func:`_specify_many`.
+
+    A copy is obtained either by forking the search space, or by creating a
+    new search space and assigning the values again, whichever is expected
+    to be faster given the times measured so far. Forking takes time linear
+    in the size of the graph, so it pays off for long prefixes of values.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Function that returns a new search space when called.
+    """
+
+    def __init__(self, search_space_fn):
+        self.search_space_fn = search_space_fn
+        # the minimum times are kept for creating a search space and forking,
+        # as they are less affected by pauses (e.g., for garbage collection).
+        self.build_time = None
+        self.fork_time_per_elem = None
+        self.assign_time = 0.0
+        self.num_assigned = 0
+
+    def build(self):
+        """Creates a new search space in a new scope.
+
+        Returns:
+            list[object]: Inputs, outputs, hyperparameter iterator, and scope
+                of the search space.
+        """
+        start = time.perf_counter()
+        co.Scope.set_default_scope(co.Scope())
+        inputs, outputs = self.search_space_fn()
+        state = [
+            inputs, outputs,
+            co.unassigned_independent_hyperparameter_iterator(outputs),
+            co.Scope.get_default_scope()
+        ]
+        build_time = time.perf_counter() - start
+        if self.build_time is None or build_time < self.build_time:
+            self.build_time = build_time
+        return state
+
+    def record_assign_time(self, assign_time, num_assigned):
+        self.assign_time += assign_time
+        self.num_assigned += num_assigned
+
+    def copy(self, state, node):
+        """Copies the state of a search space specified up to a node.
+
+        Args:
+            state (list[object]): Inputs, outputs, hyperparameter iterator,
+                scope, and possibly the next hyperparameter to assign.
+            node (_ValueTrieNode): Node up to which the search space is
+                specified.
+
+        Returns:
+            list[object]: Copy of the state, with the scope of the copy set
+                as the default scope.
+        """
+        replay_time = self.build_time
+        if self.num_assigned > 0:
+            replay_time += node.depth * self.assign_time / self.num_assigned
+        # the time to fork is taken to be proportional to the number of
+        # elements in the scope. forks at least once to measure it.
+        num_elems = max(1, len(state[3].name_to_elem))
+        if (self.fork_time_per_elem is None or
+                num_elems * self.fork_time_per_elem < replay_time):
+            start = time.perf_counter()
+            state = co._fork(state)
+            fork_time_per_elem = (time.perf_counter() - start) / num_elems
+            if (self.fork_time_per_elem is None or
+                    fork_time_per_elem < self.fork_time_per_elem):
+                self.fork_time_per_elem = fork_time_per_elem
+        else:
+            new_state = self.build()
+            start = time.perf_counter()
+            it = new_state[2]
+            for path_node in node.get_path():
+                for idx in path_node.idxs:
+                    next(it).assign_index(idx)
+            if len(state) == 5:
+                new_state.append(next(it))
+            self.record_assign_time(time.perf_counter() - start, node.depth)
+            state = new_state
+        co.Scope.set_default_scope(state[3])
+        return state
+
+
+def _assign_rest(node, h, it, lsts, are_idxs):
+    # assigns the rest of the values of the single list going through the
+    # node, starting with the hyperparameter given, and returns the child.
+    lst = lsts[node.lst_idxs[0]]
+    depth = node.depth
+    idxs = []
+    vs = []
+    while h is not None:
+        if len(lst) <= depth:
+            raise ValueError(
+                "Not enough values to specify the search space: %s" % lst)
+        idx = int(lst[depth]) if are_idxs else h.get_index(lst[depth])
+        h.assign_index(idx)
+        idxs.append(idx)
+        vs.append(h.vs[idx])
+        depth += 1
+        h = next(it, None)
+    node.children = [_ValueTrieNode(node.lst_idxs, depth, node, idxs, vs)]
+    return node.children[0]
+
+
+def _specify_many(search_space_fn, lsts, are_idxs):
+    """Specifies many search spaces as done in :func:`specify_many` and
+    :func:`specify_idxs_many`.
+
+    Yields:
+        (int, dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output], _ValueTrieNode):
+            Index of the list, inputs and outputs of the search space
+            specified with it, and node of the trie where it was specified.
+    """
+    if len(lsts) == 0:
+        return
+    root = _ValueTrieNode(list(range(len(lsts))), 0)
+    copier = _StateCopier(search_space_fn)
+    default_scope = co.Scope.get_default_scope()
+    try:
+        state = copier.build()
+        state.append(None)
+        # each entry has the node in the trie, the state of the search space
+        # before assigning the value of one of its children (i.e., inputs,
+        # outputs, hyperparameter iterator, scope, and hyperparameter to
+        # assign), and the index of the next child to go through.
+        stack = [[root, state, -1]]
+        while len(stack) > 0:
+            entry = stack[-1]
+            node, state, j = entry
+            start = time.perf_counter()
+            num_assigned = 0
+            if j >= 0:
+                node = node.children[j]
+                if j == len(entry[0].children) - 1:
+                    stack.pop()
+                    co.Scope.set_default_scope(state[3])
+                else:
+                    state = copier.copy(state, entry[0])
+                    start = time.perf_counter()
+                entry[2] += 1
+                state[4].assign_index(node.idxs[0])
+                num_assigned += 1
+            else:
+                stack.pop()
+
+            # assigns the values while there is a single way to go.
+            inputs, outputs, it, scope, _ = state
+            while True:
+                h = next(it, None)
+                if h is None:
+                    break
+                if len(node.lst_idxs) == 1:
+                    node = _assign_rest(node, h, it, lsts, are_idxs)
+                    num_assigned += len(node.idxs)
+                    h = None
+                    break
+                children = node.get_children(h, lsts, are_idxs)
+                if len(children) != 1:
+                    break
+                node = children[0]
+                h.assign_index(node.idxs[0])
+                num_assigned += 1
+            copier.record_assign_time(time.perf_counter() - start,
+                                      num_assigned)
+
+            if h is None:
+                lst_idxs = node.lst_idxs
+                for k, i in enumerate(lst_idxs):
+                    if k < len(lst_idxs) - 1:
+                        fork_inputs, fork_outputs, _, _ = copier.copy(
+                            [inputs, outputs, it, scope], node)
+                        yield i, fork_inputs, fork_outputs, node
+                    else:
+                        co.Scope.set_default_scope(scope)
+                        yield i, inputs, outputs, node
+            else:
+                stack.append([node, [inputs, outputs, it, scope, h], 0])
+    finally:
+        co.Scope.set_default_scope(default_scope)
+
+
+def specify_many(search_space_fn, hyperp_value_lsts):
+    """Specifies many search spaces using the lists of values passed as
+    argument, sharing the work for the common prefixes of the lists.
+
+    The lists of values are organized in a trie. When lists diverge, the
+    partially specified search space is copied for all but the last of the
+    branches, which continues with the original. The copy is made with
+    :func:`deep_architect.core.fork` if it is expected to be faster than
+    creating the search space again and assigning the values of the common
+    prefix, given the times measured so far. Forking takes time linear in the
+    size of the graph, so it only pays off for search spaces that are costly
+    to create or specify. The trie is traversed depth first, so only the
+    search spaces for the branching points in the current path are kept
+    alive.
+
+    Each fully specified search space is in its own scope, which is set as the
+    default scope while specifying it. The specified search spaces have the
+    same names as the ones obtained with :func:`specify`. The default scope
+    when the generator is created is restored when it finishes or is closed.
+
+    .. note::
+        As in :func:`specify`, values at the end of a list that are not
+        needed to specify the search space are ignored. The values are
+        assigned by their positions in the lists of values of the
+        hyperparameters (see :func:`specify_idxs`), so only discrete
+        hyperparameters are supported.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Function that returns a new search space when called.
+        hyperp_value_lsts (list[list[object]]): List of lists of values used
+            to specify the hyperparameters.
+
+    Yields:
+        (int, dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output]):
+            Index of the list of values in ``hyperp_value_lsts``, and inputs
+            and outputs of the search space specified with it. Each index is
+            yielded once, with lists sharing prefixes yielded consecutively.
+    """
+    gen = _specify_many(search_space_fn, hyperp_value_lsts, False)
+    try:
+        for i, inputs, outputs, _ in gen:
+            yield i, inputs, outputs
+    finally:
+        # restores the default scope if closed before finishing.
+        gen.close()
+
+
+def specify_idxs_many(search_space_fn, hyperp_idxs_lst):
+    """Same as :func:`specify_many`, but with the architectures encoded as
+    vectors of positions of the values, as in :func:`specify_idxs`.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Function that returns a new search space when called.
+        hyperp_idxs_lst (list[list[int] or numpy.ndarray]): List of vectors
+            of positions of the values used to specify the hyperparameters.
+
+    Yields:
+        (int, dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output], list[object]):
+            Index of the vector of positions in ``hyperp_idxs_lst``, inputs
+            and outputs of the search space specified with it, and list of
+            values assigned to the hyperparameters.
+    """
+    gen = _specify_many(search_space_fn, hyperp_idxs_lst, True)
+    try:
+        for i, inputs, outputs, node in gen:
+            yield i, inputs, outputs, [
+                v for path_node in node.get_path() for v in path_node.vs
+            ]
+    finally:
+        gen.close()
+
+
+def _is_structural(h):
+    """Whether the value of the hyperparameter may change the structure of the
+    search space, i.e., the hyperparameters that follow it.
+
+    The hyperparameters of substitution modules are structural even if all
+    their values lead to the same structure. Modules that change the
+    structure without being substitution modules are not detected.
+    """
+    return len(h.dependent_hyperps) > 0 or any(
+        isinstance(m, mo.SubstitutionModule) for m in h.modules)
+
+
+class _DecisionNode:
+    """Node of a :class:`DecisionTrie`.
+
+    Until the node is visited while specifying a search space, it is unknown.
+    After, it either has the list of values of the next hyperparameter to
+    assign (``vs``), or it is a leaf for a fully specified search space
+    (``template`` has the template for its features).
+    """
+
+    __slots__ = ('vs', 'is_structural', 'children', 'template')
+
+    def __init__(self):
+        self.vs = None
+        self.is_structural = None
+        # child for each position of the value if structural; otherwise,
+        # single child.
+        self.children = None
+        self.template = None
+
+    def is_known(self):
+        return self.vs is not None or self.template is not None
+
+    def get_child(self, idx):
+        if self.is_structural:
+            node = self.children.get(idx)
+            if node is None:
+                node = _DecisionNode()
+                self.children[idx] = node
+            return node
+        else:
+            return self.children
+
+
+class DecisionTrie:
+    """Cache of the decision structure of a search space.
+
+    Records which hyperparameter (i.e., its list of values) comes next given
+    the values assigned so far, as observed when specifying actual search
+    spaces. Hyperparameters that are not used by substitution modules (and
+    have no dependent hyperparameters) do not change the structure of the
+    search space, so a single path in the trie follows them regardless of
+    their values. Paths for which the structure is known can then be followed
+    to generate lists of values (and the features of the corresponding
+    architectures, see :func:`deep_architect.surrogates.common.extract_features`)
+    without creating any module. Unknown paths are recorded by specifying a
+    search space.
+
+    .. note::
+        The names of the modules and hyperparameters in the features are the
+        ones of the search spaces used to record the paths. The search space
+        function should reset the default scope upon each call (see
+        :class:`deep_architect.modules.SearchSpaceFactory`) for them to match
+        the names of the search spaces returned by the searcher.
+
+    Args:
+        search_space_fn (() -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])):
+            Function that returns a new search space when called.
+    """
+
+    def __init__(self, search_space_fn):
+        self.search_space_fn = search_space_fn
+        self.root = _DecisionNode()
+
+    def random_specify(self):
+        """Chooses random values for the hyperparameters as in
+        :func:`random_specify`, creating a search space only if the structure
+        for the values chosen has not been recorded yet.
+
+        Returns:
+            list[object]: List of values chosen for the hyperparameters.
+        """
+        hyperp_value_lst = []
+        node = self.root
+        while node.is_known():
+            if node.vs is None:
+                return hyperp_value_lst
+            idx = np.random.randint(len(node.vs))
+            hyperp_value_lst.append(node.vs[idx])
+            node = node.get_child(idx)
+        return self._record(hyperp_value_lst, True)[0]
+
+    def get_features(self, hyperp_value_lst):
+        """Returns the features of the architecture specified with the list of
+        values (see :func:`deep_architect.surrogates.common.extract_features`).
+
+        Args:
+            hyperp_value_lst (list[object]): List of values used to specify
+                the hyperparameters.
+
+        Returns:
+            dict[str, list[str]]: Features of the architecture.
+        """
+        node = self.root
+        for v in hyperp_value_lst:
+            if node.vs is None:
+                break
+            node = node.get_child(
+                node.vs.index(v) if node.is_structural else None)
+        if node.template is None:
+            node = self._record(hyperp_value_lst, False)[1]
+        return suco.fill_features_template(node.template, hyperp_value_lst)
+
+    def _record(self, hyperp_value_lst, is_random):
+        """Specifies a search space with the values, or random values after
+        the values if ``is_random`` is ``True``, recording the structure."""
+        hyperp_value_lst = list(hyperp_value_lst)
+        inputs, outputs = self.search_space_fn()
+        hyperp_to_idx = {}
+        node = self.root
+        for i, h in enumerate(
+                co.unassigned_independent_hyperparameter_iterator(outputs)):
+            if node.vs is None:
+                node.vs = h.vs
+                node.is_structural = _is_structural(h)
+                node.children = {} if node.is_structural else _DecisionNode()
+            else:
+                assert len(node.vs) == len(h.vs)
+
+            if i < len(hyperp_value_lst):
+                idx = h.get_index(hyperp_value_lst[i])
+            else:
+                assert is_random
+                idx = np.random.randint(len(h.vs))
+                hyperp_value_lst.append(h.vs[idx])
+            h.assign_index(idx)
+            if not node.is_structural:
+                hyperp_to_idx[h] = i
+            node = node.get_child(idx)
+
+        if node.template is None:
+            node.template = suco.extract_features_template(
+                inputs, outputs, hyperp_to_idx)
+        return hyperp_value_lst, node
@@ -1,102 +1,321 @@
 import deep_architect.core as co
 import deep_architect.hyperparameters as hp
-from deep_architect.searchers.common import Searcher
+from deep_architect.searchers.common import (Searcher, get_sample_seeds,
+                                             map_with_searcher,
+                                             sample_with_seed)
 import numpy as np
 import deep_architect.utils as ut
+import itertools
 import os
+from collections import OrderedDict
 
 
-# keeps the statistics and knows how to update information related to a node.
-class MCTSTreeNode:
-    """Encapsulates the information contained in a single node of the MCTS tree.
+class MCTSTree:
+    """MCTS tree with the information of the nodes kept in growable arrays.
 
-    See also :class:`deep_architect.searchers.MCTSSearcher`.
-    """
-
-    def __init__(self, parent_node):
-        self.num_trials = 0
-        self.sum_scores = 0.0
-
-        self.parent = parent_node
-        self.children = None
-
-    def is_leaf(self):
-        return self.children == None
-
-    def update_stats(self, score):
-        self.sum_scores += score
-        self.num_trials += 1
+    Nodes are identified by their position in the arrays, with the root at
+    position zero. The children of a node are contiguous, so they are given by
+    the position of the first child and the number of children, and the
+    statistics of all the children of a node can be operated on at once. This
+    takes a few tens of bytes per node, and the tree is saved to and loaded
+    from a single ``.npz`` file.
 
-    # returns the child with the highest UCT score.
-    def best_child(self, exploration_bonus):
-        assert not self.is_leaf()
+    Besides the statistics of the evaluations, each node keeps the number of
+    pending evaluations, i.e., of models sampled through the node whose
+    results have not been used to update the tree yet. See
+    :meth:`best_child`.
 
-        # if two nodes have the same score.
-        best_inds = None
-        best_score = -np.inf
+    Nodes reached through different paths may correspond to the same
+    partially specified search space. The statistics and the children of the
+    first of these nodes are then shared by the others, which keep their own
+    statistics only for the choice of the path leading to them. The node
+    whose statistics and children are used for each node is given by
+    :meth:`get_canonical`.
 
-        best_child = best_i = None
-
-        parent_log_nt = np.log(self.num_trials)
-        for (i, node) in enumerate(self.children):
-            # NOTE: potentially, do a different definition for the scores.
-            # especially once the surrogate model is introduced.
-            # selection policy may be somewhat biased towards what the
-            # rollout policy based on surrogate functions says.
-            # think about how to extend this.
-            if node.num_trials > 0:
-                score = (node.sum_scores / node.num_trials + exploration_bonus *
-                         np.sqrt(2.0 * parent_log_nt / node.num_trials))
-            else:
-                score = np.inf
-
-            # keep the best node.
-            if score > best_score:
-                best_inds = [i]
-                best_score = score
-            elif score == best_score:
-                best_inds.append(i)
+    See also :class:`deep_architect.searchers.MCTSSearcher`.
 
-            # draw a child at random and expand.
-            best_i = np.random.choice(best_inds)
-            best_child = self.children[best_i]
+    Args:
+        capacity (int, optional): Number of nodes for which memory is allocated
+            initially. The arrays double in size when they are full.
+    """
 
-        assert best_child is not None and best_i is not None
-        return (best_child, best_i)
+    def __init__(self, capacity=1024):
+        self.num_nodes = 1
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        # position of the first child, or -1 if the node is a leaf.
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.num_trials = np.zeros(capacity, dtype=np.int64)
+        self.sum_scores = np.zeros(capacity, dtype=np.float64)
+        self.num_pending = np.zeros(capacity, dtype=np.int32)
+        # position of the node with the same partial state that is used in
+        # place of the node, or -1 if it has not been determined.
+        self.canonical = np.full(capacity, -1, dtype=np.int32)
+
+    def is_leaf(self, node):
+        return self.first_child[node] < 0
+
+    def get_child(self, node, i):
+        return self.first_child[node] + i
+
+    def get_canonical(self, node):
+        canonical = self.canonical[node]
+        return node if canonical < 0 else canonical
+
+    def set_canonical(self, node, canonical):
+        assert self.canonical[node] < 0 and self.get_canonical(
+            canonical) == canonical
+        self.canonical[node] = canonical
+
+    def update_stats(self, nodes, score):
+        """Updates the statistics of the nodes with the score.
+
+        Args:
+            nodes (int or numpy.ndarray): Position of the node or positions of
+                distinct nodes (e.g., a path from the root).
+            score (float): Score to add.
+        """
+        assert np.unique(nodes).size == np.size(nodes)
+        self.sum_scores[nodes] += score
+        self.num_trials[nodes] += 1
+
+    def add_pending(self, nodes, num_pending):
+        """Adds to the number of pending evaluations of the nodes.
+
+        Args:
+            nodes (int or numpy.ndarray): Position of the node or positions of
+                distinct nodes (e.g., a path from the root).
+            num_pending (int): Number to add, e.g., ``1`` when a model is
+                sampled and ``-1`` when its results arrive.
+        """
+        assert np.unique(nodes).size == np.size(nodes)
+        self.num_pending[nodes] += num_pending
+        assert (self.num_pending[nodes] >= 0).all()
+
+    def best_child(self, node, exploration_bonus, virtual_loss=0.0):
+        """Returns the child with the highest UCT score.
+
+        Pending evaluations count as trials with the mean score of the child
+        (or of the node, for children without results) minus
+        ``virtual_loss``, so that models sampled before the results of the
+        previous ones arrive spread over the tree rather than all going to
+        the same child. The loss is relative to the scores, so it does not
+        depend on their range.
+
+        Args:
+            node (int): Position of the node, which must have been expanded.
+            exploration_bonus (float): Weight of the exploration term.
+            virtual_loss (float, optional): Amount by which the score of each
+                pending evaluation is below the mean score.
+
+        Returns:
+            (int, int): Position of the child in the tree and among the
+                children of the node.
+        """
+        assert not self.is_leaf(node)
+        begin = self.first_child[node]
+        end = begin + self.num_children[node]
+        num_pending = self.num_pending[begin:end]
+        num_trials = self.num_trials[begin:end] + num_pending
+
+        # children that have not been tried yet have an infinite score.
+        scores = np.full(end - begin, np.inf)
+        is_tried = num_trials > 0
+        if is_tried.any():
+            n = num_trials[is_tried]
+            child_num_trials = self.num_trials[begin:end][is_tried]
+            sum_scores = self.sum_scores[begin:end][is_tried]
+            node_mean = self.sum_scores[node] / max(self.num_trials[node], 1)
+            means = np.where(child_num_trials > 0,
+                             sum_scores / np.maximum(child_num_trials, 1),
+                             node_mean)
+            sum_scores = (sum_scores +
+                          (means - virtual_loss) * num_pending[is_tried])
+            parent_num_trials = self.num_trials[node] + self.num_pending[node]
+            scores[is_tried] = (
+                sum_scores / n + exploration_bonus *
+                np.sqrt(2.0 * np.log(parent_num_trials) / n))
+
+        # if two nodes have the same score, draw one of them at random.
+        best_inds = np.flatnonzero(scores == scores.max())
+        best_i = best_inds[0] if len(best_inds) == 1 else np.random.choice(
+            best_inds)
+        return (begin + best_i, int(best_i))
 
     # expands a node creating all the placeholders for the children.
-    def expand(self, num_children):
-        self.children = [MCTSTreeNode(self) for _ in range(num_children)]
+    def expand(self, node, num_children):
+        assert self.is_leaf(node)
+        begin = self.num_nodes
+        end = begin + num_children
+        if end > len(self.parent):
+            self._grow(end)
+        self.parent[begin:end] = node
+        self.first_child[node] = begin
+        self.num_children[node] = num_children
+        self.num_nodes = end
+
+    def _grow(self, min_capacity):
+        capacity = max(min_capacity, 2 * len(self.parent))
+        for name, fill_val in [('parent', -1), ('first_child', -1),
+                               ('num_children', 0), ('num_trials', 0),
+                               ('sum_scores', 0), ('num_pending', 0),
+                               ('canonical', -1)]:
+            arr = getattr(self, name)
+            new_arr = np.full(capacity, fill_val, dtype=arr.dtype)
+            new_arr[:len(arr)] = arr
+            setattr(self, name, new_arr)
+
+    def save(self, filepath):
+        n = self.num_nodes
+        np.savez(filepath,
+                 parent=self.parent[:n],
+                 first_child=self.first_child[:n],
+                 num_children=self.num_children[:n],
+                 num_trials=self.num_trials[:n],
+                 sum_scores=self.sum_scores[:n],
+                 canonical=self.canonical[:n])
 
-    #### TODO: remove serialize and deserialize and
     @staticmethod
-    def serialize(node):
-        children = [] if node.children is None else [
-            MCTSTreeNode.serialize(child) for child in node.children
-        ]
-        return (node.num_trials, node.sum_scores, children)
+    def load(filepath):
+        """Loads a tree saved with :meth:`save`.
+
+        The pending evaluations are not saved, so the loaded tree has none.
+        """
+        data = np.load(filepath)
+        tree = MCTSTree(max(1, len(data['parent'])))
+        tree.num_nodes = len(data['parent'])
+        for name in [
+                'parent', 'first_child', 'num_children', 'num_trials',
+                'sum_scores'
+        ]:
+            getattr(tree, name)[:tree.num_nodes] = data[name]
+        # trees saved without transpositions have none.
+        if 'canonical' in data:
+            tree.canonical[:tree.num_nodes] = data['canonical']
+        return tree
 
     @staticmethod
-    def deserialize(serialization, parent=None):
-        node = MCTSTreeNode(parent)
-        node.num_trials = serialization[0]
-        node.sum_scores = serialization[1]
-        node.children = [
-            MCTSTreeNode.deserialize(child, node) for child in serialization[2]
-        ]
+    def from_serialization(serialization):
+        """Creates the tree from the nested ``(num_trials, sum_scores,
+        children)`` tuples used by previous versions of the searcher to save
+        its state."""
+        tree = MCTSTree()
+        stack = [(0, serialization)]
+        while len(stack) > 0:
+            node, (num_trials, sum_scores, children) = stack.pop()
+            tree.num_trials[node] = num_trials
+            tree.sum_scores[node] = sum_scores
+            if len(children) > 0:
+                tree.expand(node, len(children))
+                for i, child in enumerate(children):
+                    stack.append((tree.get_child(node, i), child))
+        return tree
+
+
+class TranspositionTable:
+    """Maps fingerprints of partially specified search spaces to the nodes of
+    a :class:`MCTSTree` where they were first reached.
+
+    Only the ``max_size`` most recently used fingerprints are kept, i.e., the
+    most recently added or found. Each entry takes a few hundred bytes. When a
+    fingerprint is dropped, the nodes that were already mapped to its node
+    keep sharing it, but the nodes reached afterwards with the same partial
+    state start a separate subtree.
+
+    See also :func:`deep_architect.core.fingerprint`.
+
+    Args:
+        max_size (int): Maximum number of fingerprints kept.
+    """
+
+    def __init__(self, max_size):
+        assert max_size > 0
+        self.max_size = max_size
+        self.key_to_node = OrderedDict()
+
+    def __len__(self):
+        return len(self.key_to_node)
+
+    def get(self, key):
+        node = self.key_to_node.get(key)
+        if node is not None:
+            self.key_to_node.move_to_end(key)
         return node
 
+    def add(self, key, node):
+        self.key_to_node[key] = node
+        self.key_to_node.move_to_end(key)
+        if len(self.key_to_node) > self.max_size:
+            self.key_to_node.popitem(last=False)
+
 
 class MCTSSearcher(Searcher):
+    """Searcher that samples architectures with Monte Carlo tree search.
+
+    When the models are evaluated by asynchronous workers, many models are
+    sampled before the results of the previous ones are available. Without
+    further accounting, these are sampled from the same statistics and tend to
+    follow the same path in the tree. If ``virtual_loss`` is not ``None``, the
+    models sampled and not yet used to update the searcher count as
+    evaluations along their paths in the tree, with the mean score of each
+    node minus ``virtual_loss``, which steers the following samples to other
+    paths. The pending evaluations are replaced by the actual results in
+    :meth:`update`. Every model sampled must then be eventually used to
+    update the searcher. The pending evaluations are not saved by
+    :meth:`save_state`: after :meth:`load_state`, the models sampled before
+    only update the statistics. How far the search with many workers stays from the
+    sequential one depends on ``virtual_loss`` and ``exploration_bonus`` (see
+    ``dev/performance/mcts_virtual_loss_benchmark.py``).
+
+    Different prefixes of values often lead to the same partially specified
+    search space, e.g., when they only differ in the values of hyperparameters
+    of a module that is then left out, or when different branches create the
+    same modules. If ``transposition_table_size`` is
+    not ``None``, the partial search spaces reached in the tree are looked up
+    by their fingerprints in a :class:`TranspositionTable`, and the nodes that
+    reach the same one share its statistics and subtree. This requires the
+    values of the hyperparameters to be JSON serializable. The fingerprints
+    are computed once per node, the first time that the node is reached.
+
+    Args:
+        search_space_fn: Function returning the inputs and outputs of the
+            search space, or a search space factory.
+        exploration_bonus (float, optional): Weight of the exploration term of
+            the UCT score.
+        reset_default_scope_upon_sample (bool, optional): Whether to reset the
+            default scope before sampling each model.
+        virtual_loss (float, optional): Amount by which the scores assumed
+            for the models that were sampled but whose results have not
+            arrived yet are below the mean scores of the nodes. It should be
+            small compared to the spread of the scores (e.g., ``0.0`` to
+            ``0.05`` for validation accuracies). If ``None``, the default,
+            pending evaluations are not taken into account, so models can be
+            sampled without updating the searcher with their results.
+        transposition_table_size (int, optional): Maximum number of partial
+            search spaces kept in the transposition table. If ``None``, nodes
+            reached through different paths are not shared.
+    """
 
     def __init__(self,
                  search_space_fn,
                  exploration_bonus=1.0,
-                 reset_default_scope_upon_sample=True):
+                 reset_default_scope_upon_sample=True,
+                 virtual_loss=None,
+                 transposition_table_size=None):
         Searcher.__init__(self, search_space_fn,
                           reset_default_scope_upon_sample)
         self.exploration_bonus = exploration_bonus
-        self.mcts_root_node = MCTSTreeNode(None)
+        self.virtual_loss = virtual_loss
+        self.mcts_tree = MCTSTree()
+        # identifiers of the models sampled whose results have not arrived.
+        self._num_sampled = 0
+        self._pending_ids = set()
+        self.transposition_table = (
+            TranspositionTable(transposition_table_size)
+            if transposition_table_size is not None else None)
+        # hashes of the values of the hyperparameters expanded at the nodes,
+        # kept with the transposition table.
+        self._node_to_domain = {}
 
     # NOTE: this operation changes the state of the tree.
     def sample(self):
@@ -106,55 +325,148 @@ class MCTSSearcher(Searcher):
 
                 h_it = co.unassigned_independent_hyperparameter_iterator(
                     outputs)
-                tree_hist, tree_vs = self._tree_walk(h_it)
+                tree_hist, tree_vs, h_it = self._tree_walk(
+                    h_it, inputs, outputs)
                 rollout_hist, rollout_vs = self._rollout_walk(h_it)
                 vs = tree_vs + rollout_vs
                 searcher_eval_token = {
                     'tree_hist': tree_hist,
                     'rollout_hist': rollout_hist
                 }
+                if self.virtual_loss is not None:
+                    self.mcts_tree.add_pending(self._get_path(tree_hist), 1)
+                    searcher_eval_token['sample_id'] = self._num_sampled
+                    self._pending_ids.add(self._num_sampled)
+                    self._num_sampled += 1
 
                 return inputs, outputs, vs, searcher_eval_token
             except ValueError:
                 pass
 
-    def update(self, val, searcher_eval_token):
-        node = self.mcts_root_node
-        node.update_stats(val)
+    def sample_batch(self, num_samples, num_workers=None, seed=None):
+        # sample expands the tree, so the models are sampled sequentially in
+        # the current process.
+        seeds = get_sample_seeds(num_samples, seed)
+        return map_with_searcher(self,
+                                 sample_with_seed, [(s,) for s in seeds],
+                                 num_workers=1)
 
-        for i in searcher_eval_token['tree_hist']:
-            node = node.children[i]
-            node.update_stats(val)
-
-    def _tree_walk(self, h_it):
+    def update(self, val, searcher_eval_token):
+        path = self._get_path(searcher_eval_token['tree_hist'])
+        # models sampled before the state was loaded are not pending.
+        sample_id = searcher_eval_token.get('sample_id')
+        if sample_id in self._pending_ids:
+            self._pending_ids.remove(sample_id)
+            self.mcts_tree.add_pending(path, -1)
+        self.mcts_tree.update_stats(path, val)
+
+    # returns the distinct positions of the nodes from the root along the tree
+    # history, including the nodes used in place of the nodes in the tree
+    # history. as in the tree walk, it stops at the first repeated node.
+    def _get_path(self, tree_hist):
+        tree = self.mcts_tree
+        path = [0]
+        node = 0
+        for i in tree_hist:
+            child = tree.get_child(node, i)
+            if child in path:
+                break
+            path.append(child)
+            node = tree.get_canonical(child)
+            if node != child:
+                if node in path:
+                    break
+                path.append(node)
+        return np.array(path)
+
+    # returns the node used in place of the child, looking up the partial
+    # search space in the transposition table on the first visit.
+    def _transpose(self, child, path, inputs, outputs):
+        tree = self.mcts_tree
+        if tree.canonical[child] < 0:
+            key = co.fingerprint(inputs, outputs)
+            node = self.transposition_table.get(key)
+            # a node is not shared with the nodes before it in the path.
+            if node is None or node in path:
+                self.transposition_table.add(key, child)
+                node = child
+            tree.set_canonical(child, node)
+        return tree.get_canonical(child)
+
+    # checks if the children of the node correspond to the values of the
+    # hyperparameter. nodes without recorded values (e.g., in states saved by
+    # previous versions of the searcher) only check the number of children.
+    def _matches_domain(self, node, h):
+        domain = self._node_to_domain.get(int(node))
+        if domain is None:
+            return len(h.vs) == self.mcts_tree.num_children[node]
+        return domain == co._get_sha256(h.vs)
+
+    # returns the history and values of the tree walk, and the iterator over
+    # the hyperparameters left for the rollout.
+    def _tree_walk(self, h_it, inputs, outputs):
         hist = []
         vs = []
 
-        node = self.mcts_root_node
+        tree = self.mcts_tree
+        node = 0
+        path = [0]
         for h in h_it:
-            if not node.is_leaf():
-                node, i = node.best_child(self.exploration_bonus)
-                v = h.vs[i]
-                h.assign_value(v)
+            if not tree.is_leaf(node):
+                # a shared node whose children do not match the values of the
+                # hyperparameter (i.e., fingerprints colliding) ends the tree
+                # walk.
+                if self.transposition_table is not None and (
+                        not isinstance(h, hp.Discrete) or
+                        not self._matches_domain(node, h)):
+                    return hist, vs, itertools.chain([h], h_it)
+
+                child, i = tree.best_child(
+                    node, self.exploration_bonus,
+                    0.0 if self.virtual_loss is None else self.virtual_loss)
+                h.assign_index(i)
+                v = h.get_value()
 
                 hist.append(i)
                 vs.append(v)
+                is_expanded = False
             else:
                 # NOTE: only implemented for discrete hyperparameters.
                 # does the expansion after tree walk.
                 if isinstance(h, hp.Discrete):
-                    node.expand(len(h.vs))
+                    tree.expand(node, len(h.vs))
+                    if self.transposition_table is not None:
+                        self._node_to_domain[int(node)] = co._get_sha256(h.vs)
 
                     i = np.random.randint(0, len(h.vs))
-                    v = h.vs[i]
-                    h.assign_value(v)
+                    h.assign_index(i)
+                    v = h.get_value()
 
                     hist.append(i)
                     vs.append(v)
+                    child = tree.get_child(node, i)
+                    is_expanded = True
                 else:
                     raise ValueError
+
+            node = child
+            if self.transposition_table is not None:
+                # a node that is already in the path (e.g., a node shared in
+                # an earlier walk through other nodes) ends the tree walk, so
+                # the statistics of each node are updated once per model.
+                if child in path:
+                    break
+                path.append(child)
+                node = self._transpose(child, path, inputs, outputs)
+                if node != child:
+                    if node in path:
+                        break
+                    path.append(node)
+            # after the expansion, the walk only continues if the new node is
+            # used in place of a node that has been expanded.
+            if is_expanded and tree.is_leaf(node):
                 break
-        return hist, vs
+        return hist, vs, h_it
 
     def _rollout_walk(self, h_it):
         hist = []
@@ -163,8 +475,8 @@ class MCTSSearcher(Searcher):
         for h in h_it:
             if isinstance(h, hp.Discrete):
                 i = np.random.randint(0, len(h.vs))
-                v = h.vs[i]
-                h.assign_value(v)
+                h.assign_index(i)
+                v = h.get_value()
 
                 hist.append(i)
                 vs.append(v)
@@ -173,12 +485,49 @@ class MCTSSearcher(Searcher):
         return hist, vs
 
     def save_state(self, folderpath):
-        ut.write_jsonfile(
-            {
-                'mcts_root_node': MCTSTreeNode.serialize(self.mcts_root_node),
-            }, ut.join_paths([folderpath, 'mcts_searcher_state.json']))
+        self.mcts_tree.save(
+            ut.join_paths([folderpath, 'mcts_searcher_state.npz']))
+        if self.transposition_table is not None:
+            ut.write_jsonfile([[key, int(node)] for key, node in
+                               self.transposition_table.key_to_node.items()],
+                              ut.join_paths([
+                                  folderpath,
+                                  'mcts_searcher_transpositions.json'
+                              ]))
+            ut.write_jsonfile(
+                [[node, domain] for node, domain in
+                 self._node_to_domain.items()],
+                ut.join_paths([folderpath, 'mcts_searcher_domains.json']))
+        ut.write_jsonfile({'num_sampled': self._num_sampled},
+                          ut.join_paths(
+                              [folderpath, 'mcts_searcher_num_sampled.json']))
 
     def load_state(self, folderpath):
-        state = ut.read_jsonfile(
-            ut.join_paths([folderpath, 'mcts_searcher_state.json']))
-        self.mcts_root_node = MCTSTreeNode.deserialize(state['mcts_root_node'])
+        filepath = ut.join_paths([folderpath, 'mcts_searcher_state.npz'])
+        if ut.file_exists(filepath):
+            self.mcts_tree = MCTSTree.load(filepath)
+        else:
+            # state saved by previous versions of the searcher.
+            state = ut.read_jsonfile(
+                ut.join_paths([folderpath, 'mcts_searcher_state.json']))
+            self.mcts_tree = MCTSTree.from_serialization(
+                state['mcts_root_node'])
+
+        # the identifiers of the models sampled afterwards are different from
+        # the ones of the models sampled before the state was saved.
+        self._pending_ids = set()
+        filepath = ut.join_paths([folderpath, 'mcts_searcher_num_sampled.json'])
+        if ut.file_exists(filepath):
+            self._num_sampled = max(self._num_sampled,
+                                    ut.read_jsonfile(filepath)['num_sampled'])
+
+        filepath = ut.join_paths(
+            [folderpath, 'mcts_searcher_transpositions.json'])
+        if self.transposition_table is not None and ut.file_exists(filepath):
+            for key, node in ut.read_jsonfile(filepath):
+                self.transposition_table.add(key, node)
+        self._node_to_domain = {}
+        filepath = ut.join_paths([folderpath, 'mcts_searcher_domains.json'])
+        if self.transposition_table is not None and ut.file_exists(filepath):
+            for node, domain in ut.read_jsonfile(filepath):
+                self._node_to_domain[node] = domain
@@ -5,7 +5,12 @@ import random
 from collections import deque
 
 import deep_architect.utils as ut
-from deep_architect.searchers.common import Searcher, random_specify_hyperparameter
+from deep_architect.searchers.common import (Searcher,
+                                             random_specify_hyperparameter,
+                                             specify_idxs_many,
+                                             get_sample_seeds,
+                                             map_with_searcher,
+                                             sample_with_seed)
 import deep_architect.core as co
 import numpy as np
 
@@ -14,59 +19,98 @@ def mutatable(h):
     return len(h.vs) > 1
 
 
-def mutate(outputs, user_vs, all_vs, mutatable_fn, search_space_fn):
+def mutate(outputs, user_idxs, all_idxs, mutatable_fn, search_space_fn):
     mutate_candidates = []
-    new_vs = list(user_vs)
+    new_idxs = [int(idx) for idx in user_idxs]
     for i, h in enumerate(
             co.unassigned_independent_hyperparameter_iterator(outputs)):
         if mutatable_fn(h):
             mutate_candidates.append(h)
-        h.assign_value(all_vs[i])
+        h.assign_index(int(all_idxs[i]))
 
     # mutate a random hyperparameter
-    assert len(mutate_candidates) == len(user_vs)
+    assert len(mutate_candidates) == len(user_idxs)
     m_ind = random.randint(0, len(mutate_candidates) - 1)
     m_h = mutate_candidates[m_ind]
-    v = m_h.vs[random.randint(0, len(m_h.vs) - 1)]
 
-    # ensure that same value is not chosen again
-    while v == user_vs[m_ind]:
-        v = m_h.vs[random.randint(0, len(m_h.vs) - 1)]
-    new_vs[m_ind] = v
+    # ensure that same value is not chosen again. the current index is always
+    # excluded, and so are the other positions of the current value if the
+    # list of values has other values.
+    cur_idx = new_idxs[m_ind]
+    cur_v = m_h.vs[cur_idx]
+    idxs = [idx for idx, v in enumerate(m_h.vs) if idx != cur_idx]
+    diff_idxs = [idx for idx in idxs if m_h.vs[idx] != cur_v]
+    if len(diff_idxs) > 0:
+        idxs = diff_idxs
+    new_idxs[m_ind] = idxs[random.randint(0, len(idxs) - 1)]
     if 'sub' in m_h.get_name():
-        new_vs = new_vs[:m_ind + 1]
+        new_idxs = new_idxs[:m_ind + 1]
 
     inputs, outputs = search_space_fn()
-    all_vs = specify_evolution(outputs, mutatable_fn, new_vs)
-    return inputs, outputs, new_vs, all_vs
+    user_vs, all_vs, all_idxs = specify_evolution(outputs, mutatable_fn,
+                                                  new_idxs)
+    return inputs, outputs, user_vs, all_vs, new_idxs, all_idxs
 
 
 def random_specify_evolution(outputs, mutatable_fn):
     user_vs = []
     all_vs = []
+    user_idxs = []
+    all_idxs = []
     for h in co.unassigned_independent_hyperparameter_iterator(outputs):
-        v = random_specify_hyperparameter(h)
+        v, idx = random_specify_hyperparameter(h, return_idx=True)
         if mutatable_fn(h):
             user_vs.append(v)
+            user_idxs.append(idx)
         all_vs.append(v)
-    return user_vs, all_vs
+        all_idxs.append(idx)
+    return user_vs, all_vs, user_idxs, all_idxs
 
 
-def specify_evolution(outputs, mutatable_fn, user_vs):
+def specify_evolution(outputs, mutatable_fn, user_idxs):
     vs_idx = 0
+    user_vs = []
     vs = []
+    idxs = []
     for i, h in enumerate(
             co.unassigned_independent_hyperparameter_iterator(outputs)):
         if mutatable_fn(h):
-            if vs_idx >= len(user_vs):
-                user_vs.append(h.vs[random.randint(0, len(h.vs) - 1)])
-            h.assign_value(user_vs[vs_idx])
-            vs.append(user_vs[vs_idx])
+            if vs_idx >= len(user_idxs):
+                user_idxs.append(random.randint(0, len(h.vs) - 1))
+            h.assign_index(user_idxs[vs_idx])
+            user_vs.append(h.get_value())
+            vs.append(h.get_value())
+            idxs.append(user_idxs[vs_idx])
             vs_idx += 1
         else:
-            v = random_specify_hyperparameter(h)
+            v, idx = random_specify_hyperparameter(h, return_idx=True)
             vs.append(v)
-    return vs
+            idxs.append(idx)
+    return user_vs, vs, idxs
+
+
+def _get_evolution_idxs(search_space_fn, all_vs, mutatable_fn):
+    # specifies the search space with the values of an architecture to get
+    # their positions. used for tokens and states that only have the values.
+    # the search space is created in its own scope, so the default scope of
+    # the caller is left unchanged.
+    user_idxs = []
+    all_idxs = []
+    with co.scope_context():
+        _, outputs = search_space_fn()
+        for i, h in enumerate(
+                co.unassigned_independent_hyperparameter_iterator(outputs)):
+            h.assign_value(all_vs[i])
+            idx = h.get_index(all_vs[i])
+            if mutatable_fn(h):
+                user_idxs.append(idx)
+            all_idxs.append(idx)
+    return user_idxs, all_idxs
+
+
+def _sample_evolution(searcher, seed, initializing):
+    searcher.initializing = initializing
+    return sample_with_seed(searcher, seed)
 
 
 class EvolutionSearcher(Searcher):
@@ -95,12 +139,15 @@ class EvolutionSearcher(Searcher):
     def sample(self):
         if self.initializing:
             inputs, outputs = self.search_space_fn()
-            user_vs, all_vs = random_specify_evolution(outputs, self.mutatable)
+            user_vs, all_vs, user_idxs, all_idxs = random_specify_evolution(
+                outputs, self.mutatable)
             if len(self.population) >= self.P - 1:
                 self.initializing = False
             return inputs, outputs, all_vs, {
                 'user_vs': user_vs,
-                'all_vs': all_vs
+                'all_vs': all_vs,
+                'user_idxs': user_idxs,
+                'all_idxs': all_idxs
             }
         else:
             sample_inds = sorted(
@@ -110,31 +157,64 @@ class EvolutionSearcher(Searcher):
 
             # mutate strongest model
             inputs, outputs = self.search_space_fn()
-            user_vs, all_vs, _ = self.population[
+            user_idxs, all_idxs, _ = self.population[
                 self._get_strongest_model_index(sample_inds)]
-            inputs, outputs, new_user_vs, new_all_vs = mutate(
-                outputs, user_vs, all_vs, self.mutatable, self.search_space_fn)
+            (inputs, outputs, new_user_vs, new_all_vs, new_user_idxs,
+             new_all_idxs) = mutate(outputs, user_idxs, all_idxs,
+                                    self.mutatable, self.search_space_fn)
 
             # self.processing.append(self.population[weak_ind])
             # del self.population[weak_ind]
             return inputs, outputs, new_all_vs, {
                 'user_vs': new_user_vs,
-                'all_vs': new_all_vs
+                'all_vs': new_all_vs,
+                'user_idxs': new_user_idxs,
+                'all_idxs': new_all_idxs
             }
 
+    def sample_batch(self, num_samples, num_workers=None, seed=None):
+        # sample only changes the state of the searcher when it ends the
+        # initialization, which only depends on the size of the population.
+        # the value of the flag for each sample is determined upfront.
+        seeds = get_sample_seeds(num_samples, seed)
+        initializing_lst = []
+        initializing = self.initializing
+        for _ in range(num_samples):
+            initializing_lst.append(initializing)
+            if initializing and len(self.population) >= self.P - 1:
+                initializing = False
+        samples = map_with_searcher(self, _sample_evolution,
+                                    list(zip(seeds, initializing_lst)),
+                                    num_workers)
+        self.initializing = initializing
+        return samples
+
     def update(self, val, searcher_eval_token):
         if not self.initializing:
             weak_ind = self._get_weakest_model_index()
             del self.population[weak_ind]
-        self.population.append((searcher_eval_token['user_vs'],
-                                searcher_eval_token['all_vs'], val))
+        # architectures are kept as vectors of positions of the values in the
+        # lists of values of the hyperparameters to reduce memory. tokens
+        # without the positions (e.g., from older logs) are also accepted.
+        if 'all_idxs' in searcher_eval_token:
+            user_idxs = searcher_eval_token['user_idxs']
+            all_idxs = searcher_eval_token['all_idxs']
+        else:
+            user_idxs, all_idxs = _get_evolution_idxs(
+                self.search_space_fn, searcher_eval_token['all_vs'],
+                self.mutatable)
+        self.population.append((np.array(user_idxs, dtype=np.int32),
+                                np.array(all_idxs, dtype=np.int32), val))
 
     def save_state(self, folderpath):
         filepath = ut.join_paths([folderpath, 'evolution_searcher.json'])
         state = {
             "P": self.P,
             "S": self.S,
-            "population": list(self.population),
+            "population_idxs": [
+                (user_idxs.tolist(), all_idxs.tolist(), val)
+                for (user_idxs, all_idxs, val) in self.population
+            ],
             "regularized": self.regularized,
             "initializing": self.initializing,
         }
@@ -146,7 +226,19 @@ class EvolutionSearcher(Searcher):
         self.P = state["P"]
         self.S = state["S"]
         self.regularized = state['regularized']
-        self.population = deque(state['population'])
+        if 'population_idxs' in state:
+            population = state['population_idxs']
+        else:
+            # states saved before the positions were kept have the values.
+            population = []
+            for (_, all_vs, val) in state['population']:
+                user_idxs, all_idxs = _get_evolution_idxs(
+                    self.search_space_fn, all_vs, self.mutatable)
+                population.append((user_idxs, all_idxs, val))
+        self.population = deque(
+            [(np.array(user_idxs, dtype=np.int32),
+              np.array(all_idxs, dtype=np.int32), val)
+             for (user_idxs, all_idxs, val) in population])
         self.initializing = state['initializing']
 
     def _get_weakest_model_index(self):
@@ -177,5 +269,11 @@ class EvolutionSearcher(Searcher):
                                    reverse=True,
                                    key=lambda tup: tup[2])
 
-        return [(model[2], model[1]) for model in ranked_population[:num_models]
-               ]
+        # the values are obtained by specifying the search spaces, which
+        # restores the default scope of the caller.
+        ranked_population = ranked_population[:num_models]
+        idxs_lst = [all_idxs for (_, all_idxs, _) in ranked_population]
+        best = [None] * len(idxs_lst)
+        for i, _, _, vs in specify_idxs_many(self.search_space_fn, idxs_lst):
+            best[i] = (ranked_population[i][2], vs)
+        return best
@@ -8,17 +8,25 @@ import numpy as np
 # surrogate with MCTS optimization.
 # TODO: make sure that can keep the tree while the surrogate changes below me.
 # TODO: I would just compute the std for the scores.
+# NOTE: the candidates are generated from the tree in batches of
+# num_samples_per_batch and each batch is scored with a single call to the
+# surrogate model. the tree is updated with the scores after each batch, so
+# the candidates of a batch do not take into account the scores of the other
+# candidates of the same batch. num_samples_per_batch=1 updates the tree after
+# each candidate.
 class SMBOSearcherWithMCTSOptimizer(Searcher):
 
     def __init__(self, search_space_fn, surrogate_model, num_samples,
                  exploration_prob, tree_refit_interval,
-                 reset_default_scope_upon_sample=True):
+                 reset_default_scope_upon_sample=True,
+                 num_samples_per_batch=1):
         Searcher.__init__(self, search_space_fn, reset_default_scope_upon_sample)
         self.surr_model = surrogate_model
         self.mcts = MCTSSearcher(self.search_space_fn)
         self.num_samples = num_samples
         self.exploration_prob = exploration_prob
         self.tree_refit_interval = tree_refit_interval
+        self.num_samples_per_batch = num_samples_per_batch
         self.cnt = 0
 
     def sample(self):
@@ -28,20 +36,31 @@ class SMBOSearcherWithMCTSOptimizer(Searcher):
         # TODO: ignoring the size of the model here.
         # TODO: needs to add the exploration bonus.
         else:
-            best_model = None
             best_vs = None
             best_score = -np.inf
-            for _ in range(self.num_samples):
-                (inputs, outputs, vs, m_cfg_d) = self.mcts.sample()
-                feats = extract_features(inputs, outputs)
-                score = self.surr_model.eval(feats)
-                if score > best_score:
-                    best_model = (inputs, outputs)
-                    best_vs = vs
-                    best_score = score
+            num_left = self.num_samples
+            while num_left > 0:
+                vs_lst = []
+                feats_lst = []
+                m_cfg_d_lst = []
+                for _ in range(min(self.num_samples_per_batch, num_left)):
+                    (inputs, outputs, vs, m_cfg_d) = self.mcts.sample()
+                    vs_lst.append(vs)
+                    feats_lst.append(extract_features(inputs, outputs))
+                    m_cfg_d_lst.append(m_cfg_d)
+                num_left -= len(vs_lst)
 
-                self.mcts.update(score, m_cfg_d)
-            inputs, outputs = best_model
+                scores = self.surr_model.eval_batch(feats_lst)
+                for vs, score, m_cfg_d in zip(vs_lst, scores, m_cfg_d_lst):
+                    if score > best_score:
+                        best_vs = vs
+                        best_score = score
+                    self.mcts.update(score, m_cfg_d)
+
+            # the best candidate is specified again rather than keeping the
+            # search spaces of all the candidates.
+            inputs, outputs = self.search_space_fn()
+            specify(outputs, best_vs)
 
         searcher_eval_token = {'vs': best_vs}
         return inputs, outputs, best_vs, searcher_eval_token
@@ -1,5 +1,5 @@
 import numpy as np
-from deep_architect.searchers.common import random_specify, specify, Searcher
+from deep_architect.searchers.common import random_specify, specify, Searcher, DecisionTrie
 from deep_architect.surrogates.common import extract_features
 
 
@@ -10,40 +10,56 @@ class SMBOSearcher(Searcher):
                  surrogate_model,
                  num_samples,
                  exploration_prob,
-                 reset_default_scope_upon_sample=True):
+                 reset_default_scope_upon_sample=True,
+                 use_decision_trie=False):
         Searcher.__init__(self, search_space_fn, reset_default_scope_upon_sample)
         self.surr_model = surrogate_model
         self.num_samples = num_samples
         self.exploration_prob = exploration_prob
+        # candidates are generated without creating the search spaces for the
+        # structures already seen. see DecisionTrie.
+        if use_decision_trie:
+            self.decision_trie = DecisionTrie(self.search_space_fn)
+        else:
+            self.decision_trie = None
 
     def sample(self):
         if np.random.rand() < self.exploration_prob:
             inputs, outputs = self.search_space_fn()
             best_vs = random_specify(outputs)
         else:
-            best_model = None
-            best_vs = None
-            best_score = -np.inf
+            # the whole pool of candidates is generated first and then scored
+            # with a single call to the surrogate model.
+            vs_lst = []
+            feats_lst = []
             for i in range(self.num_samples):
-                inputs, outputs = self.search_space_fn()
-                vs = random_specify(outputs)
-
-                feats = extract_features(inputs, outputs)
-                score = self.surr_model.eval(feats)
-                if score > best_score:
-                    best_model = (inputs, outputs)
-                    best_vs = vs
-                    best_score = score
+                if self.decision_trie is not None:
+                    vs = self.decision_trie.random_specify()
+                    feats = self.decision_trie.get_features(vs)
+                else:
+                    inputs, outputs = self.search_space_fn()
+                    vs = random_specify(outputs)
+                    feats = extract_features(inputs, outputs)
+                vs_lst.append(vs)
+                feats_lst.append(feats)
 
-            inputs, outputs = best_model
+            scores = self.surr_model.eval_batch(feats_lst)
+            best_vs = vs_lst[int(np.argmax(scores))]
+            # the best candidate is specified again rather than keeping the
+            # search spaces of all the candidates.
+            inputs, outputs = self.search_space_fn()
+            specify(outputs, best_vs)
 
         searcher_eval_token = {'vs': best_vs}
         return inputs, outputs, best_vs, searcher_eval_token
 
     def update(self, val, searcher_eval_token):
-        (inputs, outputs) = self.search_space_fn()
-        specify(outputs, searcher_eval_token['vs'])
-        feats = extract_features(inputs, outputs)
+        if self.decision_trie is not None:
+            feats = self.decision_trie.get_features(searcher_eval_token['vs'])
+        else:
+            (inputs, outputs) = self.search_space_fn()
+            specify(outputs, searcher_eval_token['vs'])
+            feats = extract_features(inputs, outputs)
         self.surr_model.update(val, feats)
 
     def save_state(self, folderpath):
@@ -2,6 +2,14 @@ import deep_architect.searchers.common as se
 import numpy as np
 
 
+def _specify_idxs_many(searcher, hyperp_idxs_lst):
+    vs_lst = [None] * len(hyperp_idxs_lst)
+    for i, _, _, vs in se.specify_idxs_many(searcher.search_space_fn,
+                                            hyperp_idxs_lst):
+        vs_lst[i] = vs
+    return vs_lst
+
+
 # NOTE: this searcher does not do any budget adjustment and needs to be
 # combined with an evaluator that does.
 class SuccessiveNarrowing(se.Searcher):
@@ -16,21 +24,48 @@ class SuccessiveNarrowing(se.Searcher):
         self.num_remaining = num_initial_samples
         self.idx = 0
 
+        # architectures are kept as vectors of positions of the values in the
+        # lists of values of the hyperparameters to reduce memory.
         self.queue = []
         for _ in range(num_initial_samples):
             inputs, outputs = search_space_fn()
-            hyperp_value_lst = se.random_specify(outputs)
-            self.queue.append(hyperp_value_lst)
+            _, hyperp_idxs = se.random_specify(outputs, return_idxs=True)
+            self.queue.append(hyperp_idxs)
 
     def sample(self):
         assert self.idx < len(self.queue)
-        hyperp_value_lst = self.queue[self.idx]
         (inputs, outputs) = self.search_space_fn()
-        se.specify(outputs, hyperp_value_lst)
+        hyperp_value_lst = se.specify_idxs(outputs, self.queue[self.idx])
         idx = self.idx
         self.idx += 1
         return inputs, outputs, hyperp_value_lst, {"idx": idx}
 
+    def sample_batch(self, num_samples, num_workers=None, seed=None):
+        # the architectures to sample are known in advance, so the workers only
+        # specify them to get the values. no randomness is involved. the
+        # architectures are sorted and split in contiguous chunks, one per
+        # worker, so the ones sharing prefixes are specified together.
+        assert self.idx + num_samples <= len(self.queue)
+        idxs = sorted(range(self.idx, self.idx + num_samples),
+                      key=lambda idx: list(self.queue[idx]))
+        num_chunks = 1 if num_workers is None else min(num_workers,
+                                                       num_samples)
+        chunks = [
+            idxs[k * num_samples // num_chunks:(k + 1) * num_samples //
+                 num_chunks] for k in range(num_chunks)
+        ]
+        vs_lst_lst = se.map_with_searcher(
+            self, _specify_idxs_many,
+            [([self.queue[idx] for idx in chunk],) for chunk in chunks],
+            num_workers)
+        idx_to_vs = {}
+        for chunk, vs_lst in zip(chunks, vs_lst_lst):
+            idx_to_vs.update(zip(chunk, vs_lst))
+        samples = [(idx_to_vs[idx], {"idx": idx})
+                   for idx in range(self.idx, self.idx + num_samples)]
+        self.idx += num_samples
+        return samples
+
     def update(self, val, searcher_eval_token):
         assert self.num_remaining > 0
         idx = searcher_eval_token["idx"]
@@ -0,0 +1,343 @@
+"""Compact binary serialization of fully specified architectures.
+
+An architecture is encoded as a table of interned strings (module types and
+names, input, output, and hyperparameter names, and hyperparameter values
+encoded as JSON) followed by flat arrays of integers. The modules are
+numbered by their position in the module evaluation sequence, and the
+inputs and outputs of all modules are numbered consecutively in that order.
+The arrays refer to the table of strings and to these numbers: the inputs,
+outputs, and hyperparameters of each module, the connections between them,
+the inputs and outputs of the graph, and the input and output cleanup
+sequences (see :func:`deep_architect.core.determine_input_output_cleanup_seq`).
+
+The graph can be rebuilt from the bytes with :func:`build_graph`, which
+creates each module with a function looked up by module type, without having
+to run the search space function and specify it again with the
+hyperparameter values.
+
+The functions to create the modules are looked up in a registry mapping module
+types to functions. The module type is the name used to create the module,
+i.e., the name without the scope prefix and the numeric suffix (e.g.,
+``Conv2D`` for ``M.Conv2D-3``), which for modules created without a name is
+the class name. Each function is called as ``fn(dh, input_names,
+output_names)`` with the dictionary of hyperparameter values of the module
+and the lists of local names of its inputs and outputs, and returns the
+dictionaries of inputs and outputs of a single new module with exactly these
+inputs and outputs. The module may be created with unassigned
+hyperparameters with the same names, which are then assigned the decoded
+values. :data:`default_module_type_to_fn` registers the modules in
+:mod:`deep_architect.modules` that remain in fully specified graphs; the
+modules of the helpers (e.g.,
+:func:`deep_architect.helpers.keras_support.siso_keras_module_from_keras_layer_fn`)
+and user defined modules are registered by the caller of
+:func:`build_graph`. Substitution modules are never serialized, as they are
+replaced when the graph is fully specified.
+"""
+import json
+import struct
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.utils as ut
+from deep_architect.hyperparameters import D
+
+_MAGIC = b'DAAR'
+_VERSION = 1
+
+# functions to create the modules in modules.py that remain in fully specified
+# graphs. the values of the hyperparameters are assigned by build_graph.
+default_module_type_to_fn = {
+    'Identity':
+    lambda dh, input_names, output_names: mo.identity(),
+    'HyperparameterAggregator':
+    lambda dh, input_names, output_names: mo.hyperparameter_aggregator(
+        {name: D([v]) for name, v in dh.items()}),
+}
+
+
+class Architecture:
+    """Fully specified architecture decoded from bytes.
+
+    The modules are numbered by their position in the module evaluation
+    sequence. The inputs of all the modules are numbered consecutively in this
+    order, i.e., the inputs of module ``i`` are the ones from
+    ``input_offsets[i]`` to ``input_offsets[i + 1]``. The same holds for the
+    outputs and the hyperparameters.
+
+    Attributes:
+        module_types (list[str]): Type of each module, i.e., the name used to
+            create the module, e.g., ``Conv2D`` for ``M.Conv2D-3``.
+        module_names (list[str]): Name of each module in the original scope.
+        input_offsets (tuple[int]): Offsets of the inputs of each module.
+        input_names (list[str]): Local name of each input.
+        output_offsets (tuple[int]): Offsets of the outputs of each module.
+        output_names (list[str]): Local name of each output.
+        hyperp_offsets (tuple[int]): Offsets of the hyperparameters of each module.
+        hyperp_names (list[str]): Local name of each hyperparameter.
+        hyperp_vals (list[object]): Value of each hyperparameter.
+        connection_outputs (tuple[int]): Output of each connection.
+        connection_inputs (tuple[int]): Input of each connection.
+        unconnected_inputs (dict[str, int]): Inputs of the graph.
+        unconnected_outputs (dict[str, int]): Outputs of the graph.
+        input_cleanup_offsets (tuple[int]): Offsets of the inputs whose values
+            can be released after the forward of each module.
+        input_cleanup_seq (tuple[int]): Inputs whose values can be released.
+        output_cleanup_offsets (tuple[int]): Offsets of the outputs whose
+            values can be released after the forward of each module.
+        output_cleanup_seq (tuple[int]): Outputs whose values can be released.
+    """
+
+    __slots__ = ('module_types', 'module_names', 'input_offsets',
+                 'input_names', 'output_offsets', 'output_names',
+                 'hyperp_offsets', 'hyperp_names', 'hyperp_vals',
+                 'connection_outputs', 'connection_inputs',
+                 'unconnected_inputs', 'unconnected_outputs',
+                 'input_cleanup_offsets', 'input_cleanup_seq',
+                 'output_cleanup_offsets', 'output_cleanup_seq')
+
+    def get_hyperp_values(self, i):
+        """Returns the dictionary of hyperparameter values of module ``i``."""
+        start = self.hyperp_offsets[i]
+        end = self.hyperp_offsets[i + 1]
+        return dict(
+            zip(self.hyperp_names[start:end], self.hyperp_vals[start:end]))
+
+
+class _Writer:
+
+    def __init__(self):
+        self.chunks = []
+        self.string_to_idx = {}
+        self.strings = []
+
+    def intern(self, s):
+        idx = self.string_to_idx.get(s)
+        if idx is None:
+            idx = len(self.strings)
+            self.string_to_idx[s] = idx
+            self.strings.append(s)
+        return idx
+
+    def write_ints(self, lst):
+        self.chunks.append(struct.pack('<I%dI' % len(lst), len(lst), *lst))
+
+    def write_strings(self, lst):
+        self.write_ints([self.intern(s) for s in lst])
+
+    def write_groups(self, groups):
+        offsets = [0]
+        for g in groups:
+            offsets.append(offsets[-1] + len(g))
+        self.write_ints(offsets)
+        self.write_ints([x for g in groups for x in g])
+
+    def get_bytes(self):
+        # strings are separated by null characters, so they are all decoded
+        # with a single call when reading.
+        for s in self.strings:
+            if '\0' in s:
+                raise ValueError("Null character in string: %r" % s)
+        encoded = '\0'.join(self.strings).encode('utf-8')
+        header = struct.pack('<HII', _VERSION, len(self.strings), len(encoded))
+        return b''.join([_MAGIC, header, encoded] + self.chunks)
+
+
+class _Reader:
+
+    def __init__(self, data):
+        if data[:len(_MAGIC)] != _MAGIC:
+            raise ValueError("Not a serialized architecture.")
+        offset = len(_MAGIC)
+        version, num_strings, num_bytes = struct.unpack_from(
+            '<HII', data, offset)
+        if version != _VERSION:
+            raise ValueError(
+                "Unsupported serialization version: %d" % version)
+        offset += struct.calcsize('<HII')
+        if num_strings > 0:
+            self.strings = data[offset:offset + num_bytes].decode(
+                'utf-8').split('\0')
+        else:
+            self.strings = []
+        self.data = data
+        self.offset = offset + num_bytes
+
+    def read_ints(self):
+        n, = struct.unpack_from('<I', self.data, self.offset)
+        lst = struct.unpack_from('<%dI' % n, self.data, self.offset + 4)
+        self.offset += 4 * (n + 1)
+        return lst
+
+    def read_strings(self):
+        return list(map(self.strings.__getitem__, self.read_ints()))
+
+
+def serialize(inputs, outputs):
+    """Encodes a fully specified graph in the compact binary format.
+
+    The values of the hyperparameters need to be JSON serializable. All the
+    modules in the graph need to be reachable from the inputs.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary of named
+            inputs of the graph.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary of named
+            outputs of the graph.
+
+    Returns:
+        bytes: Encoding of the graph.
+    """
+    module_seq = co.determine_module_eval_seq(inputs)
+    input_to_idx = {}
+    output_to_idx = {}
+    for m in module_seq:
+        for ix in m.inputs.values():
+            input_to_idx[ix] = len(input_to_idx)
+        for ox in m.outputs.values():
+            output_to_idx[ox] = len(output_to_idx)
+
+    connection_outputs = []
+    connection_inputs = []
+    for m in module_seq:
+        for ox in m.outputs.values():
+            for ix in ox.get_connected_inputs():
+                if ix not in input_to_idx:
+                    raise ValueError(
+                        "Module %s is not reachable from the inputs." %
+                        ix.get_module().get_name())
+                connection_outputs.append(output_to_idx[ox])
+                connection_inputs.append(input_to_idx[ix])
+
+    w = _Writer()
+    w.write_strings(
+        [ut.extract_simple_name(m.get_name()) for m in module_seq])
+    w.write_strings([m.get_name() for m in module_seq])
+    w.write_groups([[w.intern(name) for name in m.inputs] for m in module_seq])
+    w.write_groups(
+        [[w.intern(name) for name in m.outputs] for m in module_seq])
+    name_to_val_lst = [m._get_hyperp_values() for m in module_seq]
+    w.write_groups([[w.intern(name)
+                     for name in name_to_val]
+                    for name_to_val in name_to_val_lst])
+    w.write_strings([
+        json.dumps(v, sort_keys=True)
+        for name_to_val in name_to_val_lst
+        for v in name_to_val.values()
+    ])
+    w.write_ints(connection_outputs)
+    w.write_ints(connection_inputs)
+    for name_to_x, x_to_idx in [(inputs, input_to_idx),
+                                (outputs, output_to_idx)]:
+        names = sorted(name_to_x)
+        w.write_strings(names)
+        w.write_ints([x_to_idx[name_to_x[name]] for name in names])
+
+    ixs_lst, oxs_lst = co._get_input_output_cleanup_seq(module_seq)
+    w.write_groups([[input_to_idx[ix] for ix in ixs] for ixs in ixs_lst])
+    w.write_groups([[output_to_idx[ox] for ox in oxs] for oxs in oxs_lst])
+    return w.get_bytes()
+
+
+def deserialize(data):
+    """Decodes the bytes returned by :func:`serialize`.
+
+    Args:
+        data (bytes): Encoding of the graph.
+
+    Returns:
+        deep_architect.serialization.Architecture: Decoded architecture.
+    """
+    r = _Reader(data)
+    a = Architecture()
+    a.module_types = r.read_strings()
+    a.module_names = r.read_strings()
+    a.input_offsets = r.read_ints()
+    a.input_names = r.read_strings()
+    a.output_offsets = r.read_ints()
+    a.output_names = r.read_strings()
+    a.hyperp_offsets = r.read_ints()
+    a.hyperp_names = r.read_strings()
+    # the values are decoded with a single call.
+    a.hyperp_vals = json.loads('[%s]' % ','.join(r.read_strings()))
+    a.connection_outputs = r.read_ints()
+    a.connection_inputs = r.read_ints()
+    a.unconnected_inputs = dict(zip(r.read_strings(), r.read_ints()))
+    a.unconnected_outputs = dict(zip(r.read_strings(), r.read_ints()))
+    a.input_cleanup_offsets = r.read_ints()
+    a.input_cleanup_seq = r.read_ints()
+    a.output_cleanup_offsets = r.read_ints()
+    a.output_cleanup_seq = r.read_ints()
+    return a
+
+
+def build_graph(data, module_type_to_fn):
+    """Builds a fully specified graph from its encoding.
+
+    Each module is created by calling the function associated to its type
+    with the dictionary of hyperparameter values of the module and the lists
+    of names of its inputs and outputs (e.g., for modules with a variable
+    number of inputs). The function returns the dictionaries of inputs and
+    outputs of a single module, e.g.,
+    ``lambda dh, input_names, output_names: siso_keras_module_from_keras_layer_fn(Dense, dh)``.
+    Hyperparameters of the module that are not assigned by the
+    function are assigned the decoded values. The modules are then
+    connected as in the encoded graph. The modules are registered in the
+    default scope, so their names may differ from the original ones.
+
+    Args:
+        data (bytes or deep_architect.serialization.Architecture): Encoding
+            of the graph, or the decoded architecture.
+        module_type_to_fn (dict[str, (dict[str, object], list[str], list[str]) -> (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output])]):
+            Functions to create the modules for each module type (see the
+            module docstring). The functions in
+            ``default_module_type_to_fn`` are used for types that are not in
+            the dictionary.
+
+    Returns:
+        (dict[str,deep_architect.core.Input], dict[str,deep_architect.core.Output], list[deep_architect.core.Module]):
+            Tuple with the dictionaries of inputs and outputs of the graph
+            and the module evaluation sequence.
+    """
+    a = deserialize(data) if isinstance(data, bytes) else data
+
+    module_seq = []
+    input_lst = []
+    output_lst = []
+    for i, module_type in enumerate(a.module_types):
+        if module_type in module_type_to_fn:
+            fn = module_type_to_fn[module_type]
+        elif module_type in default_module_type_to_fn:
+            fn = default_module_type_to_fn[module_type]
+        else:
+            raise ValueError(
+                "No function to create modules of type %s." % module_type)
+        name_to_val = a.get_hyperp_values(i)
+        input_names = a.input_names[a.input_offsets[i]:a.input_offsets[i + 1]]
+        output_names = a.output_names[a.output_offsets[i]:a.
+                                      output_offsets[i + 1]]
+        m_inputs, m_outputs = fn(name_to_val, input_names, output_names)
+        m = co.extract_unique_modules(
+            list(m_inputs.values()) + list(m_outputs.values()))[0]
+        if (sorted(m.inputs) != sorted(input_names) or
+                sorted(m.outputs) != sorted(output_names)):
+            raise ValueError(
+                "Module created for %s does not have the same inputs and "
+                "outputs as in the encoding." % a.module_names[i])
+        # dependent hyperparameters may get their values from the others.
+        for is_dependent in [False, True]:
+            for name, h in m.hyperps.items():
+                if (isinstance(h, co.DependentHyperparameter) == is_dependent
+                        and not h.has_value_assigned()):
+                    h.assign_value(name_to_val[name])
+        module_seq.append(m)
+        input_lst.extend(m.inputs[name] for name in input_names)
+        output_lst.extend(m.outputs[name] for name in output_names)
+
+    for ox_idx, ix_idx in zip(a.connection_outputs, a.connection_inputs):
+        output_lst[ox_idx].connect(input_lst[ix_idx])
+
+    inputs = {name: input_lst[idx] for name, idx in a.unconnected_inputs.items()}
+    outputs = {
+        name: output_lst[idx] for name, idx in a.unconnected_outputs.items()
+    }
+    return inputs, outputs, module_seq
@@ -11,6 +11,23 @@ class SurrogateModel:
         """
         raise NotImplementedError
 
+    def eval_batch(self, feats_lst):
+        """Returns the predictions for multiple architectures.
+
+        The default implementation calls :meth:`eval` for each architecture.
+        Surrogate models should override it if they can make the predictions
+        for all the architectures at once, e.g., with a single call to the
+        underlying model.
+
+        Args:
+            feats_lst (list[dict[str, list[str]]]): List of feature
+                representations of the architectures.
+
+        Returns:
+            list[float]: Predictions for the architectures, in the same order.
+        """
+        return [self.eval(feats) for feats in feats_lst]
+
     def update(self, val, feats):
         """Updates the state of the surrogate function given the feature
         representation for the architecture and the corresponding ground truth
@@ -47,8 +64,32 @@ def extract_features(inputs, outputs):
             Representation of the architecture as a dictionary where each
             key is associated to a list with different types of features.
     """
-    module_memo = co.OrderedSet()
+    return extract_features_template(inputs, outputs, {})
+
+
+def extract_features_template(inputs, outputs, hyperp_to_idx):
+    """Same as :func:`extract_features`, but the features for the values of
+    some hyperparameters are left to be filled in later.
+
+    The features for the hyperparameters in ``hyperp_to_idx`` are replaced
+    by pairs with the beginning of the feature and the position of the value
+    of the hyperparameter in a list of values. The features for a list of
+    values are then obtained with :func:`fill_features_template`. This is
+    useful when many architectures only differ in the values of these
+    hyperparameters.
+
+    Args:
+        inputs (dict[str, deep_architect.core.Input]): Dictionary mapping names
+            to inputs of the architecture.
+        outputs (dict[str, deep_architect.core.Output]): Dictionary mapping names to outputs
+            of the architecture.
+        hyperp_to_idx (dict[deep_architect.core.Hyperparameter, int]): Position
+            of the value of each hyperparameter in the list of values.
 
+    Returns:
+        dict[str, list[str or (str, int)]]:
+            Template for the representation of the architecture.
+    """
     module_feats = []
     connection_feats = []
     module_hyperp_feats = []
@@ -76,12 +117,39 @@ def extract_features(inputs, outputs):
 
         # module hyperparameters
         for h_localname, h in m.hyperps.items():
-            mh_feats = "%s/%s : %s = %s" % (m.get_name(), h_localname,
-                                            h.get_name(), h.get_value())
-            module_hyperp_feats.append(mh_feats)
+            mh_prefix = "%s/%s : %s = " % (m.get_name(), h_localname,
+                                           h.get_name())
+            if h in hyperp_to_idx:
+                module_hyperp_feats.append((mh_prefix, hyperp_to_idx[h]))
+            else:
+                module_hyperp_feats.append(mh_prefix + "%s" %
+                                           (h.get_value(),))
 
     return {
         'module_feats': module_feats,
         'connection_feats': connection_feats,
         'module_hyperp_feats': module_hyperp_feats,
     }
+
+
+def fill_features_template(template, hyperp_value_lst):
+    """Fills the template returned by :func:`extract_features_template` with
+    the values of the hyperparameters.
+
+    Args:
+        template (dict[str, list[str or (str, int)]]): Template for the
+            representation of the architecture.
+        hyperp_value_lst (list[object]): List of values of the hyperparameters.
+
+    Returns:
+        dict[str, list[str]]:
+            Representation of the architecture as returned by
+            :func:`extract_features`.
+    """
+    feats = {}
+    for name, fs in template.items():
+        feats[name] = [
+            f if isinstance(f, str) else f[0] + "%s" % (hyperp_value_lst[f[1]],)
+            for f in fs
+        ]
+    return feats
@@ -13,5 +13,11 @@ class DummySurrogate(SurrogateModel):
         else:
             return np.mean(self.val_lst)
 
+    def eval_batch(self, feats_lst):
+        if len(feats_lst) == 0:
+            return []
+        else:
+            return [self.eval(feats_lst[0])] * len(feats_lst)
+
     def update(self, val, feats):
         self.val_lst.append(val)
\ No newline at end of file
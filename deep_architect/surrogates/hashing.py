@@ -41,6 +41,14 @@ class HashingSurrogate(SurrogateModel):
             vec = self._feats2vec(feats)
             return self.model.predict(vec)[0]
 
+    def eval_batch(self, feats_lst):
+        if self.model == None:
+            return [0.0] * len(feats_lst)
+        else:
+            # a single prediction for the matrix with all the architectures.
+            X = self._feats_lst2mat(feats_lst)
+            return self.model.predict(X).tolist()
+
     def update(self, val, feats):
         vec = self._feats2vec(feats)
         self.vecs_lst.append(vec)
@@ -49,13 +57,21 @@ class HashingSurrogate(SurrogateModel):
             self._refit()
 
     def _feats2vec(self, feats):
-        vec = sp.dok_matrix((1, self.hash_size), dtype='float')
-        for name, fs in feats.items():
-            if self.feats_name_to_use_flag[name]:
-                for f in fs:
-                    idx = hash(f) % self.hash_size
-                    vec[0, idx] += 1.0
-        return vec.tocsr()
+        return self._feats_lst2mat([feats])
+
+    def _feats_lst2mat(self, feats_lst):
+        # the counts of repeated indices are summed when converting to csr.
+        row_idxs = []
+        col_idxs = []
+        for i, feats in enumerate(feats_lst):
+            for name, fs in feats.items():
+                if self.feats_name_to_use_flag[name]:
+                    col_idxs.extend([hash(f) % self.hash_size for f in fs])
+                    row_idxs.extend([i] * (len(col_idxs) - len(row_idxs)))
+        mat = sp.coo_matrix(
+            (np.ones(len(col_idxs)), (row_idxs, col_idxs)),
+            shape=(len(feats_lst), self.hash_size))
+        return mat.tocsr()
 
     def _refit(self):
         if self.model == None:
@@ -0,0 +1,104 @@
+"""Compares the time per forward call of a compiled plan and of forward.
+
+The graph is a chain of modules adding one to a number, so the time measured
+is the overhead of passing the values between the modules. The modules are
+implemented as the framework helpers, and either override
+:meth:`deep_architect.core.Module._forward_with_values`, as the helpers do, or
+only implement the forward through the graph. For each kind of module, the
+time of :func:`deep_architect.core.forward` with a precomputed module
+evaluation sequence, of the same with ``release_intermediates``, and of
+:meth:`deep_architect.core.ForwardPlan.forward` are printed, e.g.::
+
+                 modules      forward      release         plan    speedup
+                  AddOne      642.8us     1429.1us      829.3us      0.78x
+        AddOneWithValues      765.9us     1699.2us      309.4us      2.48x
+
+The plan calls the modules overriding ``_forward_with_values`` directly on the
+values. The other modules go through the graph, and the plan clears the
+values set in the graph after each of them, which costs more than not
+releasing them as in :func:`deep_architect.core.forward`.
+
+Example::
+
+    python dev/performance/forward_plan_benchmark.py --num_modules 400
+"""
+import argparse
+import time
+
+import deep_architect.core as co
+
+
+class AddOne(co.Module):
+    # implemented as the framework helpers, e.g.,
+    # :class:`deep_architect.helpers.pytorch_support.PyTorchModule`.
+
+    def __init__(self):
+        co.Module.__init__(self, name='AddOne')
+        self._register(['in'], ['out'], {})
+
+    def _compile(self):
+        self._fn = lambda di: {'out': di['in'] + 1}
+
+    def _forward(self):
+        self._set_output_values(self._fn(self._get_input_values()))
+
+
+class AddOneWithValues(AddOne):
+
+    def _forward_with_values(self, input_name_to_val):
+        return self._fn(input_name_to_val)
+
+
+def get_chain(module_type, num_modules):
+    ms = [module_type() for _ in range(num_modules)]
+    for m_prev, m in zip(ms[:-1], ms[1:]):
+        m.inputs['in'].connect(m_prev.outputs['out'])
+    return {'in': ms[0].inputs['in']}, {'out': ms[-1].outputs['out']}
+
+
+def measure(fn, num_repeats):
+    # the first call compiles the modules.
+    fn()
+    start = time.time()
+    for _ in range(num_repeats):
+        fn()
+    return (time.time() - start) / num_repeats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_modules', type=int, default=400)
+    parser.add_argument('--num_repeats', type=int, default=1000)
+    args = parser.parse_args()
+
+    print("%20s %12s %12s %12s %10s" %
+          ('modules', 'forward', 'release', 'plan', 'speedup'))
+    for module_type in [AddOne, AddOneWithValues]:
+        co.Scope.reset_default_scope()
+        inputs, outputs = get_chain(module_type, args.num_modules)
+        module_seq = co.determine_module_eval_seq(inputs)
+        input_to_val = {inputs['in']: 0}
+        plan = co.compile_plan(inputs, outputs)
+
+        def run_forward():
+            co.forward(input_to_val, module_seq)
+            return outputs['out'].val
+
+        def run_release():
+            co.forward(input_to_val, module_seq, release_intermediates=True)
+            return outputs['out'].val
+
+        def run_plan():
+            return plan.forward({'in': 0})['out']
+
+        assert run_forward() == run_release() == run_plan() == args.num_modules
+        forward_time = measure(run_forward, args.num_repeats)
+        release_time = measure(run_release, args.num_repeats)
+        plan_time = measure(run_plan, args.num_repeats)
+        print("%20s %10.1fus %10.1fus %10.1fus %9.2fx" %
+              (module_type.__name__, forward_time * 1e6, release_time * 1e6,
+               plan_time * 1e6, forward_time / plan_time))
+
+
+if __name__ == '__main__':
+    main()
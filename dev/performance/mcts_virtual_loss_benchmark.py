@@ -0,0 +1,141 @@
+"""Simulates MCTS with asynchronous workers, with and without virtual loss.
+
+The search space is a sequence of ``num_hyperps`` discrete hyperparameters with
+``num_values`` values each. The score of an architecture is the mean of the
+entries of a fixed random table indexed by the values chosen, so the models
+are not compiled or trained. The evaluations are simulated with an event queue:
+each worker takes a random amount of time to evaluate a model, and samples a
+new model as soon as it returns the result of the previous one, before the
+results of the models being evaluated by the other workers are available.
+
+For each number of workers, the searcher is run for the same number of
+evaluations, and the mean and best scores of the models evaluated, and the
+fraction of distinct architectures among them are printed. The scores are
+normalized so that a random architecture has score 0 and the best one has
+score 1. With a single worker, this is sequential MCTS.
+
+With many workers, the models are sampled from statistics that miss the
+results of the models being evaluated, and without virtual loss they follow
+the same paths in the tree, so the mean score drops with the number of
+workers. With virtual loss, each pending evaluation counts as an evaluation
+with the mean score of the node minus ``virtual_loss``, which moves the
+following samples to the paths that are nearly as good. Averaged over 64
+repeats, e.g., with ``--num_workers 1 8 32 64``::
+
+     workers   virtual loss       mean       best   distinct
+           1           None     0.8994     0.9338      0.045
+           1           0.05     0.8994     0.9338      0.045
+           8           None     0.8853     0.9478      0.077
+           8           0.05     0.9167     0.9660      0.067
+          32           None     0.8554     0.9584      0.124
+          32           0.05     0.8822     0.9645      0.101
+          64           None     0.8254     0.9691      0.165
+          64           0.05     0.8593     0.9665      0.129
+
+With several workers, virtual loss raises the mean score, and the best score
+stays within the variation across repeats. With 8 workers, both are above the
+ones of the sequential search. Larger values push the workers away from the
+good paths: with 64 workers, the mean score is ``0.835`` with
+``--virtual_loss 0.1``. A virtual loss equal to the score of a random
+architecture, as in the usual absolute form, lowers the mean score below the
+one without virtual loss (``0.767`` with 64 workers), as it makes the paths
+with pending evaluations look worse than unexplored ones.
+
+Example::
+
+    python dev/performance/mcts_virtual_loss_benchmark.py --num_evals 2000
+"""
+import argparse
+import heapq
+import random
+
+import numpy as np
+
+import deep_architect.modules as mo
+from deep_architect.hyperparameters import D
+from deep_architect.searchers.mcts import MCTSSearcher
+
+
+def get_search_space(num_hyperps, num_values):
+    return mo.siso_sequential([
+        mo.hyperparameter_aggregator({'h': D(list(range(num_values)))})
+        for _ in range(num_hyperps)
+    ])
+
+
+def run_search(num_workers, virtual_loss, args, score_table, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    rs = np.random.RandomState(seed)
+    searcher = MCTSSearcher(
+        lambda: get_search_space(args.num_hyperps, args.num_values),
+        exploration_bonus=args.exploration_bonus,
+        virtual_loss=virtual_loss)
+
+    def evaluate(token):
+        idxs = token['tree_hist'] + token['rollout_hist']
+        return float(score_table[np.arange(len(idxs)), idxs].mean())
+
+    # each event is (end time, tie breaker, score, searcher evaluation token).
+    events = []
+    num_sampled = 0
+    for i in range(min(num_workers, args.num_evals)):
+        _, _, _, token = searcher.sample()
+        heapq.heappush(events, (rs.exponential(), i, evaluate(token), token))
+        num_sampled += 1
+
+    scores = []
+    archs = set()
+    while len(events) > 0:
+        t, _, score, token = heapq.heappop(events)
+        searcher.update(score, token)
+        scores.append(score)
+        archs.add(tuple(token['tree_hist'] + token['rollout_hist']))
+        if num_sampled < args.num_evals:
+            _, _, _, token = searcher.sample()
+            heapq.heappush(events, (t + rs.exponential(), num_sampled,
+                                    evaluate(token), token))
+            num_sampled += 1
+    # the scores are normalized so that a random architecture has score 0 and
+    # the best architecture has score 1.
+    random_score = score_table.mean()
+    best_score = score_table.max(axis=1).mean()
+    mean_score, max_score = (
+        (np.array([np.mean(scores), np.max(scores)]) - random_score) /
+        (best_score - random_score))
+    return mean_score, max_score, len(archs) / float(len(scores))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_evals', type=int, default=2000)
+    parser.add_argument('--num_hyperps', type=int, default=8)
+    parser.add_argument('--num_values', type=int, default=4)
+    parser.add_argument('--exploration_bonus', type=float, default=0.05)
+    parser.add_argument('--virtual_loss', type=float, default=0.05)
+    parser.add_argument('--num_repeats', type=int, default=64)
+    parser.add_argument('--num_workers',
+                        type=int,
+                        nargs='+',
+                        default=[1, 8, 32, 64])
+    args = parser.parse_args()
+
+    print("%8s %14s %10s %10s %10s" %
+          ('workers', 'virtual loss', 'mean', 'best', 'distinct'))
+    for num_workers in args.num_workers:
+        for virtual_loss in [None, args.virtual_loss]:
+            results = []
+            for seed in range(args.num_repeats):
+                score_table = np.random.RandomState(seed).rand(
+                    args.num_hyperps, args.num_values)
+                results.append(
+                    run_search(num_workers, virtual_loss, args, score_table,
+                               seed))
+            mean_score, best_score, frac_distinct = np.mean(results, axis=0)
+            print("%8d %14s %10.4f %10.4f %10.3f" %
+                  (num_workers, virtual_loss, mean_score, best_score,
+                   frac_distinct))
+
+
+if __name__ == '__main__':
+    main()
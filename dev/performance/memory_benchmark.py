@@ -0,0 +1,168 @@
+"""Measures the memory used by a population of sampled architectures.
+
+The architectures are sampled at random from a search space and kept alive,
+as in the population of an evolutionary searcher. The memory allocated while
+sampling them is divided by the total number of modules to get an estimate of
+the number of bytes per module.
+
+The default search space does not need any framework. It is built from the
+substitution modules in :mod:`deep_architect.modules` and from modules shaped
+as the framework helpers, i.e., retaining a compile function and wrapping
+their constants in hyperparameters. It only uses functionality available in
+older versions, so it can be run on both checkouts. The NASBench and NASNet
+search spaces in :mod:`deep_architect.contrib` need Tensorflow.
+
+To compare two versions of the core object model, run this script on both
+checkouts, e.g.::
+
+    python dev/performance/memory_benchmark.py --num_samples 200
+    python dev/performance/memory_benchmark.py --search_space nasnet
+
+With the default search space and 200 architectures (5968 modules), the
+memory per module went from about 6.1KB to about 3.2KB with the slotted
+object model.
+"""
+import argparse
+import gc
+import tracemalloc
+
+import numpy as np
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.searchers.common as seco
+from deep_architect.hyperparameters import D
+
+
+class HelperModule(co.Module):
+    # implemented as the framework helpers, e.g.,
+    # :class:`deep_architect.helpers.tensorflow_support.TensorflowModule`.
+    __slots__ = ('_compile_fn', '_fn')
+
+    def __init__(self, name, compile_fn, name_to_hyperp, input_names):
+        co.Module.__init__(self, name=name)
+        self._register(input_names, ['out'],
+                       {
+                           k: h if isinstance(h, co.Hyperparameter) else D([h])
+                           for k, h in name_to_hyperp.items()
+                       })
+        self._compile_fn = compile_fn
+
+    def _compile(self):
+        self._fn = self._compile_fn(self._get_input_values(),
+                                    self._get_hyperp_values())
+
+    def _forward(self):
+        self._set_output_values(self._fn(self._get_input_values()))
+
+
+def helper_module(name, name_to_hyperp, input_names=('in',)):
+
+    def compile_fn(di, dh):
+        return lambda di: {'out': sum(di.values())}
+
+    return HelperModule(name, compile_fn, name_to_hyperp,
+                        list(input_names)).get_io()
+
+
+def conv(h_filters):
+    return helper_module(
+        'Conv2D', {
+            'filters': h_filters,
+            'kernel_size': D([1, 3, 5]),
+            'strides': 1,
+            'padding': 'SAME'
+        })
+
+
+def pool():
+    return helper_module('MaxPool2D', {
+        'pool_size': D([2, 3]),
+        'strides': 1,
+        'padding': 'SAME'
+    })
+
+
+def cell(h_filters):
+    return mo.siso_split_combine(
+        lambda: mo.siso_sequential([
+            mo.siso_or([lambda: conv(h_filters), pool, mo.identity],
+                       D([0, 1, 2])),
+            mo.siso_optional(lambda: helper_module('BatchNorm', {}),
+                             D([0, 1]))
+        ]), lambda num_splits: helper_module(
+            'Add', {}, ['in%d' % i for i in range(num_splits)]), D([2, 3]))
+
+
+def get_generic_search_space():
+    h_filters = D([32, 64, 128])
+    return mo.siso_sequential([
+        conv(h_filters),
+        mo.siso_repeat(lambda: cell(h_filters), D([2, 4, 6])),
+        helper_module('GlobalAvgPool', {}),
+        helper_module('Dense', {'units': 10})
+    ])
+
+
+def get_search_space_factory(search_space):
+    if search_space == 'generic':
+        return mo.SearchSpaceFactory(get_generic_search_space)
+    elif search_space == 'nasbench':
+        from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasbench_space import SSF_Nasbench
+        return SSF_Nasbench()
+    elif search_space == 'nasnet':
+        from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasnet_space import SSF_NasnetA
+        return SSF_NasnetA()
+    else:
+        raise ValueError("Unknown search space: %s" % search_space)
+
+
+def sample_architecture(search_space_factory, max_num_tries=100):
+    # some spaces (e.g., nasbench) reject some of the sampled cells.
+    for _ in range(max_num_tries):
+        inputs, outputs = search_space_factory.get_search_space()
+        try:
+            seco.random_specify(outputs)
+            return inputs, outputs
+        except ValueError:
+            pass
+    raise ValueError("Could not sample a valid architecture.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--search_space',
+        choices=['generic', 'nasbench', 'nasnet'],
+        default='generic')
+    parser.add_argument('--num_samples', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    search_space_factory = get_search_space_factory(args.search_space)
+    # samples one architecture upfront to exclude one-time allocations.
+    sample_architecture(search_space_factory)
+
+    gc.collect()
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    population = []
+    num_modules = 0
+    for _ in range(args.num_samples):
+        inputs, outputs = sample_architecture(search_space_factory)
+        population.append((inputs, outputs))
+        num_modules += len(co.get_modules_with_cond(outputs, lambda m: True))
+    gc.collect()
+    num_bytes = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+
+    print("search space: %s" % args.search_space)
+    print("architectures: %d" % args.num_samples)
+    print("modules: %d" % num_modules)
+    print("total MB: %.1f" % (num_bytes / 2.0**20))
+    print("bytes per module: %.1f" % (float(num_bytes) / num_modules))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Measures the speedup of evaluating independent modules with a thread pool.
+
+The search space is a sequence of wide split-combine blocks with NumPy
+matrix multiplications in the branches. NumPy releases the GIL during these
+operations, so the branches of a block can be evaluated concurrently with
+:func:`deep_architect.core.forward` and ``num_workers``. The outputs of
+the sequential and the concurrent evaluations are checked to be the same.
+
+Example::
+
+    python dev/performance/parallel_forward_benchmark.py --num_splits 8 --num_workers 1 2 4 8
+"""
+import argparse
+import time
+
+import numpy as np
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.searchers.common as seco
+from deep_architect.hyperparameters import D
+
+
+class NumpyModule(co.Module):
+
+    def __init__(self, name, compile_fn, name_to_hyperp, input_names,
+                 output_names):
+        co.Module.__init__(self, None, name)
+        self._register(input_names, output_names, name_to_hyperp)
+        self._compile_fn = compile_fn
+
+    def _compile(self):
+        self._fn = self._compile_fn(self._get_hyperp_values())
+
+    def _forward(self):
+        self._set_output_values(self._fn(self._get_input_values()))
+
+    def _update(self):
+        pass
+
+
+def matmul(dim, seed):
+
+    def compile_fn(dh):
+        rs = np.random.RandomState(seed)
+        w = rs.randn(dim, dim) / np.sqrt(dim)
+
+        def fn(di):
+            return {'out': np.tanh(di['in'].dot(w))}
+
+        return fn
+
+    return NumpyModule('MatMul', compile_fn, {}, ['in'], ['out']).get_io()
+
+
+def add(num_inputs):
+
+    def compile_fn(dh):
+
+        def fn(di):
+            return {'out': sum(di['in%d' % i] for i in range(num_inputs))}
+
+        return fn
+
+    return NumpyModule('Add', compile_fn, {},
+                       ['in%d' % i for i in range(num_inputs)],
+                       ['out']).get_io()
+
+
+def get_search_space(num_blocks, num_splits, branch_depth, dim):
+    counter = [0]
+
+    def branch():
+        ios = []
+        for _ in range(branch_depth):
+            counter[0] += 1
+            ios.append(matmul(dim, counter[0]))
+        return mo.siso_sequential(ios)
+
+    return mo.siso_sequential([
+        mo.siso_split_combine(branch, add, D([num_splits]))
+        for _ in range(num_blocks)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_blocks', type=int, default=4)
+    parser.add_argument('--num_splits', type=int, default=8)
+    parser.add_argument('--branch_depth', type=int, default=2)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--batch_size', type=int, default=256)
+    parser.add_argument('--num_repeats', type=int, default=10)
+    parser.add_argument(
+        '--num_workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    search_space_fn = lambda: get_search_space(
+        args.num_blocks, args.num_splits, args.branch_depth, args.dim)
+    inputs, outputs = mo.SearchSpaceFactory(search_space_fn).get_search_space()
+    seco.random_specify(outputs)
+    module_seq = co.determine_module_eval_seq(inputs)
+    x = np.random.RandomState(0).randn(args.batch_size, args.dim)
+    input_to_val = {inputs['in']: x}
+
+    # the first call compiles the modules.
+    co.forward(input_to_val, module_seq)
+    expected = outputs['out'].val
+
+    def measure(num_workers):
+        start = time.time()
+        for _ in range(args.num_repeats):
+            co.forward(input_to_val, module_seq, num_workers=num_workers)
+        assert np.array_equal(outputs['out'].val, expected)
+        return (time.time() - start) / args.num_repeats
+
+    print("modules: %d" % len(module_seq))
+    sequential_time = measure(None)
+    print("sequential: %.4f s" % sequential_time)
+    for num_workers in args.num_workers:
+        t = measure(num_workers)
+        print("num_workers %d: %.4f s (speedup %.2fx)" %
+              (num_workers, t, sequential_time / t))
+
+
+if __name__ == '__main__':
+    main()
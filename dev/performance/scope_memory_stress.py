@@ -0,0 +1,71 @@
+"""Checks that the memory of a scope kept across samples stays bounded.
+
+Architectures are sampled at random from a search space with substitution
+modules (or, repeat, and optional) by a searcher that does not reset the
+default scope upon sampling. Only the last architecture sampled is kept alive,
+so the scope is the only reference to the others and to the substitution
+modules replaced while specifying them. Every ``compact_every`` samples, the
+scope is compacted with :meth:`deep_architect.core.Scope.compact`. The resident
+memory and the number of elements in the scope are printed periodically; with
+compaction they stay flat, and without it (``--compact_every 0``) they grow with
+the number of samples.
+
+Example::
+
+    python dev/performance/scope_memory_stress.py --num_samples 100000
+"""
+import argparse
+import gc
+import resource
+import time
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.hyperparameters import D
+from deep_architect.searchers.random import RandomSearcher
+
+
+def get_search_space(num_blocks):
+
+    def block():
+        return mo.siso_sequential([
+            mo.siso_or([
+                mo.identity,
+                lambda: mo.siso_optional(mo.identity, D([0, 1])),
+            ], D([0, 1])),
+            mo.siso_repeat(mo.identity, D([1, 2, 4])),
+        ])
+
+    return mo.siso_sequential([block() for _ in range(num_blocks)])
+
+
+def get_rss_in_mb():
+    # maximum resident set size, which only grows if memory keeps growing.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_samples', type=int, default=100000)
+    parser.add_argument('--num_blocks', type=int, default=4)
+    parser.add_argument('--compact_every', type=int, default=100)
+    parser.add_argument('--report_every', type=int, default=10000)
+    args = parser.parse_args()
+
+    searcher = RandomSearcher(lambda: get_search_space(args.num_blocks),
+                              reset_default_scope_upon_sample=False)
+    scope = co.Scope.get_default_scope()
+    start = time.time()
+    for i in range(1, args.num_samples + 1):
+        _, outputs, _, _ = searcher.sample()
+        if args.compact_every > 0 and i % args.compact_every == 0:
+            scope.compact(outputs)
+        if i % args.report_every == 0:
+            gc.collect()
+            print("samples: %d, elements in scope: %d, max rss: %.1f MB, "
+                  "time: %.1f s" % (i, len(scope.name_to_elem),
+                                    get_rss_in_mb(), time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
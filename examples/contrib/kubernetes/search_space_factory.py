@@ -1,23 +1,45 @@
-from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasnet_space import SSF_NasnetA
-from deep_architect.contrib.misc.search_spaces.tensorflow_eager.genetic_space import SSF_Genetic
-from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasbench_space import SSF_Nasbench
-from deep_architect.contrib.misc.search_spaces.tensorflow_eager.hierarchical_space import flat_search_space, hierarchical_search_space
-from deep_architect.contrib.misc.search_spaces.tensorflow import dnn
 import deep_architect.modules as mo
 
+# the search spaces are imported when they are used, so only the frameworks
+# needed by the search space chosen are imported.
+
+
+def _get_dnn(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow import dnn
+    return mo.SearchSpaceFactory(lambda: dnn.dnn_net(num_classes))
+
+
+def _get_nasnet(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasnet_space import SSF_NasnetA
+    return SSF_NasnetA()
+
+
+def _get_hierarchical(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow_eager.hierarchical_space import hierarchical_search_space
+    return mo.SearchSpaceFactory(
+        lambda: hierarchical_search_space(num_classes))
+
+
+def _get_flat(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow_eager.hierarchical_space import flat_search_space
+    return mo.SearchSpaceFactory(lambda: flat_search_space(num_classes))
+
+
+def _get_genetic(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow_eager.genetic_space import SSF_Genetic
+    return SSF_Genetic()
+
+
+def _get_nasbench(num_classes):
+    from deep_architect.contrib.misc.search_spaces.tensorflow_eager.nasbench_space import SSF_Nasbench
+    return SSF_Nasbench()
+
+
 name_to_search_space_factory_fn = {
-    'dnn':
-    lambda num_classes: mo.SearchSpaceFactory(lambda: dnn.dnn_net(num_classes)),
-    'nasnet':
-    lambda num_classes: SSF_NasnetA(),
-    'hierarchical':
-    lambda num_classes: mo.SearchSpaceFactory(lambda: hierarchical_search_space(
-        num_classes)),
-    'flat':
-    lambda num_classes: mo.SearchSpaceFactory(lambda: flat_search_space(
-        num_classes)),
-    'genetic':
-    lambda num_classes: SSF_Genetic(),
-    'nasbench':
-    lambda num_classes: SSF_Nasbench()
+    'dnn': _get_dnn,
+    'nasnet': _get_nasnet,
+    'hierarchical': _get_hierarchical,
+    'flat': _get_flat,
+    'genetic': _get_genetic,
+    'nasbench': _get_nasbench
 }
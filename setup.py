@@ -53,11 +53,10 @@ setup(
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Science/Research',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7'
     ],
     packages=find_packages(include=["deep_architect*"]),
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=[
         'numpy',
         'scipy',
@@ -0,0 +1,784 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+from deep_architect.hyperparameters import D, Bool, OneOfK, OneOfKFactorial
+
+
+def test_is_specified_after_rewiring_settled_modules():
+    co.Scope.reset_default_scope()
+    inputs, outputs = mo.siso_sequential([
+        mo.hyperparameter_aggregator({'a': D([1, 2])}),
+        mo.hyperparameter_aggregator({'b': D([3, 4])}),
+    ])
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        h.assign_value(h.vs[0])
+    assert co.is_specified(outputs)
+
+    # a module with an unassigned hyperparameter put before settled modules.
+    new_inputs, new_outputs = mo.hyperparameter_aggregator({'c': D([5, 6])})
+    inputs['in'].connect(new_outputs['out'])
+    assert not co.is_specified(outputs)
+
+
+class _AddOne(co.Module):
+
+    def __init__(self):
+        co.Module.__init__(self)
+        self._register(['in'], ['out'], {})
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        self.outputs['out'].val = self.inputs['in'].val + 1
+
+    def _forward_with_values(self, input_name_to_val):
+        return {'out': input_name_to_val['in'] + 1}
+
+
+class _Sum(co.Module):
+
+    def __init__(self, num_inputs):
+        co.Module.__init__(self)
+        self._register(['in%d' % i for i in range(num_inputs)], ['out'], {})
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        self.outputs['out'].val = sum(ix.val for ix in self.inputs.values())
+
+
+def _get_branching_graph():
+    # the input goes through branches of different lengths that are summed.
+    m_in = _AddOne()
+    m_sum = _Sum(3)
+    for i in range(3):
+        ox = m_in.outputs['out']
+        for _ in range(i + 1):
+            m = _AddOne()
+            m.inputs['in'].connect(ox)
+            ox = m.outputs['out']
+        m_sum.inputs['in%d' % i].connect(ox)
+    return {'in': m_in.inputs['in']}, {'out': m_sum.outputs['out']}
+
+
+def _get_random_graph(num_modules, seed):
+    # each module sums the outputs of up to three of the previous modules, so
+    # outputs fan out to several modules and modules fan in several outputs.
+    rs = np.random.RandomState(seed)
+    ms = [_AddOne()]
+    for i in range(1, num_modules):
+        num_inputs = rs.randint(1, min(i, 3) + 1)
+        m = _Sum(num_inputs)
+        for j, k in enumerate(rs.choice(i, num_inputs, replace=False)):
+            m.inputs['in%d' % j].connect(ms[k].outputs['out'])
+        ms.append(m)
+    return {'in': ms[0].inputs['in']}, ms
+
+
+def _get_baseline_module_eval_seq(inputs):
+    # traversal that determine_module_eval_seq used to do, which checks all
+    # the inputs of a module each time that it is reached.
+    module_seq = []
+    module_memo = set()
+    input_memo = set(inputs.values())
+    ms = co.extract_unique_modules(list(inputs.values()))
+    for m in ms:
+        if m not in module_memo and all(
+                ix in input_memo for ix in m.inputs.values()):
+            module_seq.append(m)
+            module_memo.add(m)
+            for ox in m.outputs.values():
+                ix_lst = ox.get_connected_inputs()
+                input_memo.update(ix_lst)
+                ms.extend([ix.get_module() for ix in ix_lst])
+    return module_seq
+
+
+def _get_ancestors(m):
+    ms = set()
+    stack = [m]
+    while len(stack) > 0:
+        m = stack.pop()
+        if m not in ms:
+            ms.add(m)
+            stack.extend(ix.get_connected_output().get_module()
+                         for ix in m.inputs.values()
+                         if ix.is_connected())
+    return ms
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_determine_module_eval_seq(seed):
+    co.Scope.reset_default_scope()
+    for inputs, _ in [_get_branching_graph(), _get_random_graph(30, seed)]:
+        module_seq = _get_baseline_module_eval_seq(inputs)
+        assert co.determine_module_eval_seq(inputs) == module_seq
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_determine_module_eval_seq_with_outputs(seed):
+    co.Scope.reset_default_scope()
+    inputs, ms = _get_random_graph(30, seed)
+    module_seq = _get_baseline_module_eval_seq(inputs)
+    rs = np.random.RandomState(seed)
+    for _ in range(5):
+        out_ms = [ms[k] for k in rs.choice(len(ms), 2, replace=False)]
+        needed = _get_ancestors(out_ms[0]) | _get_ancestors(out_ms[1])
+        outputs = {
+            'out%d' % i: m.outputs['out'] for i, m in enumerate(out_ms)
+        }
+        assert co.determine_module_eval_seq(inputs, outputs) == [
+            m for m in module_seq if m in needed
+        ]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_determine_module_eval_seq_levels(seed):
+    co.Scope.reset_default_scope()
+    inputs, ms = _get_random_graph(30, seed)
+    module_seq, levels = co.determine_module_eval_seq(inputs,
+                                                      return_levels=True)
+    assert len(module_seq) == len(ms)
+    assert sum(len(level) for level in levels) == len(ms)
+    assert set(m for level in levels for m in level) == set(ms)
+    module_to_level = {m: i for i, level in enumerate(levels) for m in level}
+    for m in ms:
+        prev_levels = [
+            module_to_level[ix.get_connected_output().get_module()]
+            for ix in m.inputs.values()
+            if ix.is_connected()
+        ]
+        # each module is in the level after the last module it depends on.
+        assert module_to_level[m] == max(prev_levels, default=-1) + 1
+
+
+@pytest.mark.parametrize('num_workers', [None, 1, 4])
+def test_forward_with_num_workers(num_workers):
+    co.Scope.reset_default_scope()
+    inputs, outputs = _get_branching_graph()
+    co.forward({inputs['in']: 1}, num_workers=num_workers)
+    assert outputs['out'].val == 3 + 4 + 5
+
+    _, levels = co.determine_module_eval_seq(inputs, return_levels=True)
+    assert [len(ms) for ms in levels] == [1, 3, 2, 1, 1]
+
+
+def _get_chain(num_modules):
+    ms = [_AddOne() for _ in range(num_modules)]
+    for m_prev, m in zip(ms[:-1], ms[1:]):
+        m.inputs['in'].connect(m_prev.outputs['out'])
+    return ms
+
+
+@pytest.mark.parametrize('num_workers', [None, 2])
+def test_forward_release_intermediates(num_workers):
+    co.Scope.reset_default_scope()
+    ms = _get_chain(5)
+    x = np.zeros(8)
+    input_to_val = {ms[0].inputs['in']: x}
+    stats = co.forward(input_to_val,
+                       release_intermediates=True,
+                       num_workers=num_workers)
+    assert np.array_equal(ms[-1].outputs['out'].val, x + 5)
+    for m in ms:
+        assert m.inputs['in'].val is None
+    for m in ms[:-1]:
+        assert m.outputs['out'].val is None
+    # the input or output being read and the output being computed.
+    assert stats == {
+        'peak_num_live_values': 2,
+        'peak_num_live_bytes': 2 * x.nbytes
+    }
+
+    assert co.forward(input_to_val, num_workers=num_workers) is None
+    for i, m in enumerate(ms):
+        assert np.array_equal(m.outputs['out'].val, x + i + 1)
+
+
+@pytest.mark.parametrize('num_workers', [None, 2])
+def test_forward_release_intermediates_branching(num_workers):
+    co.Scope.reset_default_scope()
+    inputs, outputs = _get_branching_graph()
+    stats = co.forward({inputs['in']: 1},
+                       release_intermediates=True,
+                       num_workers=num_workers)
+    assert outputs['out'].val == 3 + 4 + 5
+    ms = co.get_modules_with_cond(outputs, lambda m: True)
+    for m in ms:
+        for ix in m.inputs.values():
+            assert ix.val is None
+        for ox in m.outputs.values():
+            assert ox is outputs['out'] or ox.val is None
+    # the values of the three branches are live at once.
+    assert 3 <= stats['peak_num_live_values'] < len(ms)
+
+
+@pytest.mark.parametrize('num_workers', [None, 2])
+def test_forward_with_module_seq(num_workers):
+    co.Scope.reset_default_scope()
+    ms = _get_chain(5)
+    inputs = {'in': ms[0].inputs['in']}
+    module_seq = co.determine_module_eval_seq(inputs,
+                                              {'out': ms[2].outputs['out']})
+    co.forward({inputs['in']: 0}, module_seq, num_workers=num_workers)
+    assert ms[2].outputs['out'].val == 3
+    # the modules after the ones in the sequence are not evaluated.
+    assert getattr(ms[3].outputs['out'], 'val', None) is None
+
+
+class _CountingAddOne(_AddOne):
+    # records the number of values held by the plan when the values are
+    # passed directly, and counts the calls going through the graph.
+    plan = None
+    num_live_values = []
+
+    def __init__(self):
+        _AddOne.__init__(self)
+        self.num_forward_calls = 0
+
+    def _forward(self):
+        self.num_forward_calls += 1
+        _AddOne._forward(self)
+
+    def _forward_with_values(self, input_name_to_val):
+        _CountingAddOne.num_live_values.append(
+            sum(v is not None for v in _CountingAddOne.plan.vals))
+        return _AddOne._forward_with_values(self, input_name_to_val)
+
+
+def test_forward_plan_releases_values():
+    co.Scope.reset_default_scope()
+    ms = [_CountingAddOne() for _ in range(10)]
+    for m_prev, m in zip(ms[:-1], ms[1:]):
+        m.inputs['in'].connect(m_prev.outputs['out'])
+    m_sum = _Sum(2)
+    m_sum.inputs['in0'].connect(ms[0].outputs['out'])
+    m_sum.inputs['in1'].connect(ms[-1].outputs['out'])
+    inputs = {'in': ms[0].inputs['in']}
+    outputs = {'out': m_sum.outputs['out'], 'last': ms[-1].outputs['out']}
+    plan = co.compile_plan(inputs, outputs)
+    _CountingAddOne.plan = plan
+    _CountingAddOne.num_live_values = []
+    for x in [0, 10]:
+        assert plan.forward({'in': x}) == {'out': 2 * x + 11, 'last': x + 10}
+        # nothing is kept in the plan or in the graph.
+        assert all(v is None for v in plan.vals)
+        for m in ms + [m_sum]:
+            for ix in m.inputs.values():
+                assert ix.val is None
+            for ox in m.outputs.values():
+                assert ox.val is None
+    # only the first call goes through the graph to compile the modules.
+    assert all(m.num_forward_calls == 1 for m in ms)
+    # besides the value passed to the module being called, only the output
+    # of the first module is kept for the sum.
+    assert _CountingAddOne.num_live_values == [1, 1] + [2] * 8
+
+
+def test_forward_plan_unconnected_input():
+    co.Scope.reset_default_scope()
+    m1 = _AddOne()
+    m2 = _AddOne()
+    m2.inputs['in'].connect(m1.outputs['out'])
+    with pytest.raises(ValueError):
+        co.compile_plan({}, {'out': m2.outputs['out']})
+
+    plan = co.compile_plan({'in': m1.inputs['in']},
+                           {'out': m2.outputs['out']})
+    with pytest.raises(ValueError):
+        plan.forward({})
+
+
+def _fork_search_space():
+
+    def agg(name):
+        return mo.hyperparameter_aggregator({'k': D([1, 2, 3])}, name=name)
+
+    return mo.siso_sequential([
+        mo.siso_or([
+            lambda: agg('A'),
+            lambda: mo.siso_repeat(lambda: agg('B'), D([1, 2])),
+        ], D([0, 1])),
+        mo.siso_optional(lambda: agg('C'), D([0, 1])),
+        agg('D'),
+    ])
+
+
+def _assign_values(outputs, vs, random_state=None):
+    # assigns the values, and random values after them if a random state is
+    # given. returns the values assigned.
+    vs = list(vs)
+    for i, h in enumerate(
+            co.unassigned_independent_hyperparameter_iterator(outputs)):
+        if i == len(vs):
+            if random_state is None:
+                break
+            vs.append(h.vs[random_state.randint(len(h.vs))])
+        h.assign_value(vs[i])
+    return vs
+
+
+def _get_partial_search_space(prefix):
+    inputs, outputs = _fork_search_space()
+    _assign_values(outputs, prefix)
+    return inputs, outputs
+
+
+def _get_rest(prefix, seed):
+    with co.scope_context():
+        _, outputs = _get_partial_search_space(prefix)
+        return _assign_values(outputs, [], np.random.RandomState(seed))
+
+
+def _get_jsonified(prefix, rest):
+    with co.scope_context():
+        inputs, outputs = _get_partial_search_space(prefix)
+        _assign_values(outputs, rest)
+        return co.jsonify(inputs, outputs)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_fork_diverges_independently(seed):
+    with co.scope_context():
+        _, outputs = _fork_search_space()
+        vs = _assign_values(outputs, [], np.random.RandomState(seed))
+
+    # forks after each number of values assigned.
+    for cut in range(len(vs) + 1):
+        prefix = vs[:cut]
+        rest = _get_rest(prefix, seed + 100)
+        fork_rest = _get_rest(prefix, seed + 200)
+        with co.scope_context():
+            inputs, outputs = _get_partial_search_space(prefix)
+            fork_inputs, fork_outputs = co.fork(inputs, outputs)
+            fork_scope = fork_outputs['out'].scope
+            assert fork_scope is not co.Scope.get_default_scope()
+
+            # specifying the copy leaves the original unchanged.
+            with co.scope_context(fork_scope):
+                _assign_values(fork_outputs, fork_rest)
+            assert co.is_specified(fork_outputs)
+            assert len(rest) == 0 or not co.is_specified(outputs)
+
+            _assign_values(outputs, rest)
+            assert co.is_specified(outputs)
+            assert co.jsonify(inputs, outputs) == _get_jsonified(prefix, rest)
+            assert co.jsonify(fork_inputs, fork_outputs) == _get_jsonified(
+                prefix, fork_rest)
+
+
+class _Recorder:
+    # user-defined object that is not part of the graph.
+
+    def __init__(self, h):
+        self.h = h
+        self.vs = []
+
+
+class _RecordingModule(co.Module):
+
+    def __init__(self, recorder):
+        co.Module.__init__(self, name='Recording')
+        self._register(['in'], ['out'], {'h': recorder.h})
+        self.recorder = recorder
+        self.counts = np.zeros(2)
+
+
+def test_fork_copies_user_objects():
+    with co.scope_context():
+        recorder = _Recorder(D([1, 2]))
+
+        def fn():
+            recorder.vs.append(len(recorder.vs))
+            return _RecordingModule(recorder).get_io()
+
+        inputs, outputs = mo.siso_sequential([
+            mo.siso_optional(fn, D([0, 1])),
+            _RecordingModule(recorder).get_io()
+        ])
+        fork_inputs, fork_outputs = co.fork(inputs, outputs)
+        m = outputs['out'].get_module()
+        fork_m = fork_outputs['out'].get_module()
+        fork_recorder = fork_m.recorder
+        assert fork_recorder is not recorder
+        assert fork_recorder.h is fork_m.hyperps['h']
+        assert fork_recorder.h is not recorder.h
+
+        fork_m.counts[0] += 1
+        assert m.counts[0] == 0
+        with co.scope_context(fork_m.scope):
+            _assign_values(fork_outputs, [1, 1])
+        assert fork_recorder.vs == [0]
+        assert recorder.vs == []
+        assert not recorder.h.has_value_assigned()
+
+
+def test_scope_context():
+    scope = co.Scope.get_default_scope()
+    with co.scope_context() as new_scope:
+        assert new_scope is not scope
+        assert co.Scope.get_default_scope() is new_scope
+        h = D([1, 2])
+        assert h.scope is new_scope
+        other_scope = co.Scope()
+        with co.scope_context(other_scope) as x:
+            assert x is other_scope
+            assert co.Scope.get_default_scope() is other_scope
+        assert co.Scope.get_default_scope() is new_scope
+        co.Scope.reset_default_scope()
+        assert co.Scope.get_default_scope() is not new_scope
+    assert co.Scope.get_default_scope() is scope
+
+
+def _specify_in_thread(i):
+    # the search spaces of the different threads are created and specified
+    # concurrently, each in its own scope.
+    co.Scope.reset_default_scope()
+    inputs, outputs = _fork_search_space()
+    vs = _assign_values(outputs, [], np.random.RandomState(i))
+    return vs, co.jsonify(inputs, outputs), co.Scope.get_default_scope()
+
+
+def test_default_scope_of_threads():
+    scope = co.Scope.get_default_scope()
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(_specify_in_thread, range(16)))
+    assert co.Scope.get_default_scope() is scope
+    assert len(set(id(x) for _, _, x in results)) == len(results)
+    for vs, jsonified, _ in results:
+        assert jsonified == _get_jsonified(vs, [])
+    # threads that did not set it use the default scope of the process.
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(
+            co.Scope.get_default_scope).result() is co.Scope.default_scope
+
+
+def test_scope_compact():
+    with co.scope_context() as scope:
+        _, old_outputs = _fork_search_space()
+        _assign_values(old_outputs, [], np.random.RandomState(0))
+        h = D([1, 2])
+        h_dep = co.DependentHyperparameter(lambda dh: dh['x'], {'x': h})
+        inputs, outputs = mo.siso_sequential([
+            mo.siso_or([
+                lambda: mo.hyperparameter_aggregator({'a': h_dep}),
+                lambda: mo.hyperparameter_aggregator({'b': D([3, 4])}),
+            ], D([0, 1])),
+        ])
+        subst_names = [m.get_name() for m in co.get_modules_with_cond(
+            outputs, lambda m: isinstance(m, mo.SubstitutionModule))]
+        _assign_values(outputs, [0, 2])
+        names = [m.get_name() for m in co.get_modules_with_cond(
+            outputs, lambda m: True)]
+        jsonified = co.jsonify(inputs, outputs)
+        old_names = [m.get_name() for m in co.get_modules_with_cond(
+            old_outputs, lambda m: True)]
+
+        scope.compact(outputs)
+        # the previous architecture and the replaced substitution modules
+        # are released.
+        assert len(subst_names) > 0
+        for name in old_names + subst_names:
+            assert name not in scope.name_to_elem
+        for name in names:
+            assert scope.get_elem(name).get_name() == name
+        # the hyperparameter reachable through the dependent one is kept.
+        assert scope.get_elem(h.get_name()) is h
+        assert co.jsonify(inputs, outputs) == jsonified
+
+        # the names of the released elements are not reused.
+        m = _AddOne()
+        assert m.get_name() not in old_names + names
+
+        # several graphs can be kept.
+        scope.compact([outputs, {'out': m.outputs['out']}])
+        assert scope.get_elem(m.get_name()) is m
+        assert scope.get_elem(names[0]).get_name() == names[0]
+
+
+def _assign_values_by_pass(outputs, vs):
+    # assigns the values of each pass of the frontier at once.
+    frontier = co.HyperparameterFrontier(outputs)
+    idx = 0
+    hs = frontier.next_pass()
+    while len(hs) > 0:
+        co.assign_values(dict(zip(hs, vs[idx:idx + len(hs)])))
+        idx += len(hs)
+        hs = frontier.next_pass()
+    assert idx == len(vs)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_assign_values(seed):
+    with co.scope_context():
+        _, outputs = _fork_search_space()
+        vs = _assign_values(outputs, [], np.random.RandomState(seed))
+    with co.scope_context():
+        inputs, outputs = _fork_search_space()
+        _assign_values_by_pass(outputs, vs)
+        assert co.is_specified(outputs)
+        assert co.jsonify(inputs, outputs) == _get_jsonified(vs, [])
+
+
+def test_assign_values_long_chain():
+    with co.scope_context():
+        h = D([1, 2])
+        h_dep = h
+        for _ in range(5000):
+            h_dep = co.DependentHyperparameter(lambda dh: dh['x'] + 1,
+                                               {'x': h_dep})
+        co.assign_values({h: 2})
+        assert h_dep.get_value() == 5002
+
+
+def test_assign_values_checks_all_values_first():
+    with co.scope_context():
+        h1 = D([1, 2])
+        h2 = D([3, 4])
+        with pytest.raises(AssertionError):
+            co.assign_values({h1: 1, h2: 5})
+        assert not h1.has_value_assigned()
+        assert not h2.has_value_assigned()
+
+
+def _get_constant_fn(x):
+    return lambda: x
+
+
+def test_fn_label():
+    label = co._get_fn_label
+    assert label(_get_constant_fn(8)) == label(_get_constant_fn(8))
+    assert label(_get_constant_fn(np.int64(8))) == label(
+        _get_constant_fn(np.int64(8)))
+    assert label(_get_constant_fn(np.int64(8))) != label(_get_constant_fn(16))
+    assert label(_get_constant_fn([1, 2])) != label(_get_constant_fn([1, 3]))
+    # functions differing only in their constants.
+    fns = [lambda: 'A', lambda: 'B']
+    assert label(fns[0]) != label(fns[1])
+    # functions differing only in their lines.
+    fns = [lambda: 'A',
+           lambda: 'A']
+    assert label(fns[0]) == label(fns[1])
+    # outside of fingerprint, the hyperparameters and modules captured cannot
+    # be described.
+    with co.scope_context():
+        h = D([1, 2])
+        assert label(_get_constant_fn(h)) != label(_get_constant_fn(h))
+        assert label(_get_constant_fn(D([1, 2]))) != label(
+            _get_constant_fn(D([3, 4])))
+        m = _AddOne()
+        assert label(_get_constant_fn(m)) != label(_get_constant_fn(m))
+        assert label(m._forward) != label(m._forward)
+
+
+def _get_fingerprint(prefix):
+    with co.scope_context():
+        return co.fingerprint(*_get_partial_search_space(prefix))
+
+
+def _get_shared_fingerprint(is_shared):
+    with co.scope_context():
+        h1 = D([1, 2])
+        h2 = h1 if is_shared else D([1, 2])
+        return co.fingerprint(*mo.siso_sequential([
+            mo.siso_repeat(lambda: mo.hyperparameter_aggregator({'a': h1}),
+                           D([1, 2])),
+            mo.siso_repeat(lambda: mo.hyperparameter_aggregator({'a': h2}),
+                           D([1, 2])),
+        ]))
+
+
+def _get_optional_fingerprint(opt):
+    with co.scope_context():
+        h = D([1, 2])
+        inputs, outputs = mo.siso_sequential([
+            mo.siso_repeat(lambda: mo.hyperparameter_aggregator({'a': h}),
+                           D([1, 2])),
+            mo.siso_optional(mo.identity, D([0, 1])),
+        ])
+        # the first hyperparameter is the one of the optional module.
+        next(co.unassigned_independent_hyperparameter_iterator(
+            outputs)).assign_value(opt)
+        return co.fingerprint(inputs, outputs)
+
+
+def test_fingerprint_of_partial_search_spaces():
+    assert _get_fingerprint([1]) == _get_fingerprint([1])
+    assert _get_fingerprint([1]) != _get_fingerprint([2])
+    # the substitution functions capture hyperparameters, which are described
+    # by their positions in the graph.
+    assert _get_shared_fingerprint(True) == _get_shared_fingerprint(True)
+    assert _get_shared_fingerprint(False) == _get_shared_fingerprint(False)
+    assert _get_shared_fingerprint(True) != _get_shared_fingerprint(False)
+    # both values of the optional hyperparameter give an identity module.
+    assert _get_optional_fingerprint(0) == _get_optional_fingerprint(1)
+
+
+def test_fingerprint_of_permutations():
+    with co.scope_context():
+        fp = co.fingerprint(*mo.siso_permutation(
+            [mo.identity, mo.identity], OneOfKFactorial(2)))
+    with co.scope_context():
+        assert co.fingerprint(*mo.siso_permutation(
+            [mo.identity, mo.identity], OneOfKFactorial(2))) == fp
+
+
+class _Scale(co.Module):
+
+    def __init__(self, h):
+        co.Module.__init__(self, name='Scale')
+        self._register(['in'], ['out'], {'k': h})
+
+
+def _get_specified_graph(ks, reverse, num_extra_modules):
+    # the input is scaled and fans out to a scaled and an incremented branch,
+    # which are summed. the modules can be created in reverse order and after
+    # other modules, which changes their names.
+    for _ in range(num_extra_modules):
+        _Scale(D([1]))
+    fns = [
+        lambda: _Scale(D([ks[0]])), lambda: _Scale(D([ks[1]])), _AddOne,
+        lambda: _Sum(2)
+    ]
+    if reverse:
+        ms = [fn() for fn in reversed(fns)][::-1]
+    else:
+        ms = [fn() for fn in fns]
+    m_in, m_scale, m_add, m_sum = ms
+    for m in [m_in, m_scale]:
+        h = m.hyperps['k']
+        h.assign_value(h.vs[0])
+    m_scale.inputs['in'].connect(m_in.outputs['out'])
+    m_add.inputs['in'].connect(m_in.outputs['out'])
+    m_sum.inputs['in0'].connect(m_scale.outputs['out'])
+    m_sum.inputs['in1'].connect(m_add.outputs['out'])
+    inputs, outputs = {'in': m_in.inputs['in']}, {'out': m_sum.outputs['out']}
+    assert co.is_specified(outputs)
+    return inputs, outputs
+
+
+def test_fingerprint_of_specified_graphs():
+    with co.scope_context():
+        inputs, outputs = _get_specified_graph([2, 3], False, 0)
+        names = _get_names(outputs)
+        fp = co.fingerprint(inputs, outputs)
+    with co.scope_context():
+        inputs, outputs = _get_specified_graph([2, 3], True, 3)
+        # the same graph with different names, created in a different order.
+        assert _get_names(outputs) != names
+        assert co.fingerprint(inputs, outputs) == fp
+    for ks in [[2, 4], [3, 3]]:
+        with co.scope_context():
+            assert co.fingerprint(*_get_specified_graph(ks, False, 0)) != fp
+
+
+def _get_names(outputs):
+    ms = co.get_modules_with_cond(outputs, lambda m: True)
+    return (sorted(m.get_name() for m in ms),
+            sorted(h.get_name() for h in co.get_all_hyperparameters(outputs)))
+
+
+def test_names():
+    # the names are the ones given before the scope kept a counter per prefix
+    # and deferred the names of the inputs and outputs.
+    with co.scope_context() as scope:
+        samples = []
+        for seed in range(3):
+            inputs, outputs = mo.siso_sequential(
+                [_fork_search_space(), mo.identity()])
+            _assign_values(outputs, [], np.random.RandomState(seed))
+            samples.append(_get_names(outputs) +
+                           ([inputs['in'].get_name(),
+                             outputs['out'].get_name()],))
+        assert samples == [
+            (['M.B-0', 'M.B-1', 'M.C-0', 'M.D-0', 'M.Identity-0'], [
+                'H.Discrete-2', 'H.Discrete-3', 'H.Discrete-5',
+                'H.Discrete-6'
+            ], ['M.SISORepeat-0.I.in', 'M.Identity-0.O.out']),
+            (['M.A-0', 'M.C-1', 'M.D-1', 'M.Identity-1'],
+             ['H.Discrete-10', 'H.Discrete-11', 'H.Discrete-9'],
+             ['M.A-0.I.in', 'M.Identity-1.O.out']),
+            (['M.B-2', 'M.C-2', 'M.D-2', 'M.Identity-2'],
+             ['H.Discrete-14', 'H.Discrete-15', 'H.Discrete-17'],
+             ['M.SISORepeat-1.I.in', 'M.Identity-2.O.out']),
+        ]
+
+        module_names = ['M.A-0', 'M.SISORepeat-0', 'M.SISORepeat-1']
+        for prefix in ['B', 'C', 'D', 'Identity', 'SISOOptional', 'SISOOr']:
+            module_names.extend('M.%s-%d' % (prefix, i) for i in range(3))
+        names = ['H.Discrete-%d' % i for i in range(18)]
+        for name in module_names:
+            names.extend([name, name + '.I.in', name + '.O.out'])
+        scope.get_elem(names[-1])
+        assert sorted(scope.name_to_elem) == sorted(names)
+
+
+def test_scope_compact_names():
+    with co.scope_context() as scope:
+        graphs = []
+        for seed in range(3):
+            inputs, outputs = _fork_search_space()
+            _assign_values(outputs, [], np.random.RandomState(seed))
+            graphs.append((inputs, outputs))
+        old_module_names, old_hyperp_names = _get_names(graphs[0][1])
+        # the names of the inputs and outputs have not been built yet.
+        scope.compact(graphs[1][1])
+
+        for seed in range(3):
+            inputs, outputs = _fork_search_space()
+            _assign_values(outputs, [], np.random.RandomState(seed))
+            graphs.append((inputs, outputs))
+        elems = []
+        for _, outputs in [graphs[1]] + graphs[3:]:
+            for m in co.get_modules_with_cond(outputs, lambda m: True):
+                elems.append(m)
+                elems.extend(m.inputs.values())
+                elems.extend(m.outputs.values())
+            elems.extend(co.get_all_hyperparameters(outputs))
+        names = [x.get_name() for x in elems]
+        # the elements kept and the new ones have distinct names, which are
+        # not the names of the released elements.
+        assert len(set(names)) == len(names)
+        assert not set(names) & set(old_module_names + old_hyperp_names)
+        for x, name in zip(elems, names):
+            assert scope.get_elem(name) is x
+
+
+def test_slotted_objects_have_no_dict():
+    co.Scope.reset_default_scope()
+    h_perm = OneOfKFactorial(2)
+    h_opt = Bool()
+    h_dep = co.DependentHyperparameter(lambda dh: dh['opt'] + 1,
+                                       {'opt': h_opt})
+    inputs, outputs = mo.siso_sequential([
+        mo.siso_optional(mo.identity, h_opt),
+        mo.siso_permutation([mo.identity, mo.identity], h_perm),
+        mo.hyperparameter_aggregator({
+            'k': OneOfK(3),
+            'dep': h_dep
+        })
+    ])
+    # substitution modules are replaced when their hyperparameters are assigned.
+    elems = list(co.Scope.get_default_scope().name_to_elem.values())
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        h.assign_value(h.vs[-1])
+    for m in co.get_modules_with_cond(outputs, lambda m: True):
+        elems.append(m)
+        for d in [m.inputs, m.outputs, m.hyperps]:
+            elems.extend(d.values())
+    types = set(type(x) for x in elems)
+    assert types >= {
+        co.Input, co.Output, co.DependentHyperparameter, Bool, OneOfK,
+        OneOfKFactorial, mo.Identity, mo.HyperparameterAggregator,
+        mo.SubstitutionModule
+    }
+    for x in elems:
+        assert not hasattr(x, '__dict__'), type(x)
+    assert not hasattr(D([1]), '__dict__')
+    assert not hasattr(co.OrderedSet(), '__dict__')
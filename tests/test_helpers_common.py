@@ -0,0 +1,106 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import deep_architect.core as co
+import deep_architect.helpers.common as hco
+import deep_architect.helpers.tensorflow_support as htf
+import deep_architect.searchers.common as se
+from deep_architect.hyperparameters import D
+
+
+def _compile_fn(di, dh):
+
+    def forward_fn(di):
+        return {'out': di['in'] * dh['k']}
+
+    return forward_fn
+
+
+_helper_module_names = [
+    'tensorflow_support', 'tensorflow_eager_support', 'keras_support',
+    'pytorch_support'
+]
+
+
+@pytest.mark.parametrize('module_name', _helper_module_names)
+def test_helper_does_not_import_framework(module_name):
+    # the helper is imported in a new process, as the framework may have
+    # been imported by other tests.
+    code = ("import sys; import deep_architect.helpers.%s; "
+            "print(' '.join(sorted(set(sys.modules) & "
+            "{'tensorflow', 'torch', 'keras'})))" % module_name)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode('utf-8').strip() == ''
+
+
+@pytest.mark.parametrize('module_name, class_name', [
+    ('tensorflow_support', 'TensorflowModule'),
+    ('tensorflow_eager_support', 'TensorflowEagerModule'),
+    ('keras_support', 'KerasModule'),
+    ('pytorch_support', 'PyTorchModule'),
+])
+def test_helper_modules_have_no_dict(module_name, class_name):
+    helper = importlib.import_module('deep_architect.helpers.' + module_name)
+    co.Scope.reset_default_scope()
+    m = getattr(helper, class_name)('Mul', _compile_fn, {'k': D([2, 3])},
+                                    ['in'], ['out'])
+    assert not hasattr(m, '__dict__')
+
+
+def test_get_hyperp_dict():
+    co.Scope.reset_default_scope()
+    h = D([1, 2])
+    name_to_hyperp = hco.get_hyperp_dict({'h': h, 'c': 3})
+    assert name_to_hyperp['h'] is h
+    assert name_to_hyperp['c'].vs == [3]
+
+
+def test_compile_and_forward():
+    co.Scope.reset_default_scope()
+    inputs, outputs = htf.siso_tensorflow_module('Mul', _compile_fn,
+                                                 {'k': D([2, 3])})
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        h.assign_value(3)
+    co.forward({inputs['in']: 2})
+    assert outputs['out'].val == 6
+
+
+def _get_search_space():
+    return htf.siso_tensorflow_module('Mul', _compile_fn, {
+        'k': D([2, 3]),
+        'c': 4
+    })
+
+
+def test_constants_are_assigned():
+    co.Scope.reset_default_scope()
+    inputs, outputs = _get_search_space()
+    m = outputs['out'].get_module()
+    assert m.hyperps['c'].get_value() == 4
+    # the constant is not among the hyperparameters to assign.
+    hs = []
+    for h in co.unassigned_independent_hyperparameter_iterator(outputs):
+        hs.append(h)
+        h.assign_value(3)
+    assert hs == [m.hyperps['k']]
+    assert co.is_specified(outputs)
+    assert co.jsonify(inputs, outputs)['modules'][
+        m.get_name()]['hyperp_name_to_val'] == {'k': 3, 'c': 4}
+
+
+def test_legacy_constants_mode():
+    assert not hco.is_legacy_constants_mode()
+    hco.set_legacy_constants_mode(True)
+    try:
+        assert hco.is_legacy_constants_mode()
+        co.Scope.reset_default_scope()
+        inputs, outputs = _get_search_space()
+        # value lists logged with the constants can be replayed.
+        se.specify(outputs, [4, 3])
+    finally:
+        hco.set_legacy_constants_mode(False)
+    m = outputs['out'].get_module()
+    assert m._get_hyperp_values() == {'k': 3, 'c': 4}
@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+import deep_architect.core as co
+from deep_architect.hyperparameters import D, OneOfKFactorial
+
+
+class _Value:
+    # the values are not hashable, and comparing them fails, so looking them
+    # up in the list of values fails.
+    __hash__ = None
+
+    def __eq__(self, other):
+        raise AssertionError
+
+
+def test_assign_index():
+    co.Scope.reset_default_scope()
+    h = D(['a', 'b', 'a'])
+    h.assign_index(2)
+    assert h.get_value() == 'a'
+    assert h.get_index('a') == 0
+
+
+def test_assign_index_does_not_look_up_value():
+    co.Scope.reset_default_scope()
+    vs = [_Value(), _Value()]
+    h = D(vs)
+    h.assign_index(1)
+    assert h.get_value() is vs[1]
+    with pytest.raises(AssertionError):
+        D(vs).assign_value(vs[1])
+
+
+def test_one_of_k_factorial():
+    co.Scope.reset_default_scope()
+    h = OneOfKFactorial(20)
+    assert len(h.vs) == math.factorial(20)
+    h.assign_index(len(h.vs) - 1)
+    assert h.get_value() == math.factorial(20) - 1
+    with pytest.raises(ValueError):
+        OneOfKFactorial(21)
@@ -0,0 +1,15 @@
+import itertools
+import math
+
+import deep_architect.modules as mo
+
+
+def test_get_permutation():
+    # the ranks map to the permutations in lexicographic order, so each
+    # permutation is obtained exactly once.
+    for k in range(7):
+        perms = [
+            tuple(mo._get_permutation(k, idx))
+            for idx in range(math.factorial(k))
+        ]
+        assert perms == list(itertools.permutations(range(k)))
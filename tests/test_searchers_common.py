@@ -0,0 +1,196 @@
+import numpy as np
+import pytest
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+import deep_architect.surrogates.common as suco
+from deep_architect.hyperparameters import D
+from deep_architect.searchers.mcts import MCTSSearcher
+from deep_architect.searchers.random import RandomSearcher
+from deep_architect.searchers.regularized_evolution import (EvolutionSearcher,
+                                                            mutatable)
+from deep_architect.searchers.successive_narrowing import SuccessiveNarrowing
+
+
+def _search_space():
+    return mo.siso_sequential([
+        mo.siso_or([
+            lambda: mo.hyperparameter_aggregator({'a': D([1, 2])}),
+            lambda: mo.siso_repeat(
+                lambda: mo.hyperparameter_aggregator({'b': D([3, 4])}),
+                D([1, 2])),
+        ], D([0, 1])),
+        mo.hyperparameter_aggregator({'c': D([5, 6])}),
+    ])
+
+
+def _get_jsonified(vs):
+    with co.scope_context():
+        inputs, outputs = _search_space()
+        se.specify(outputs, vs)
+        return co.jsonify(inputs, outputs)
+
+
+def _get_value_lsts(num_lsts, seed):
+    np.random.seed(seed)
+    vs_lst = []
+    for _ in range(num_lsts):
+        with co.scope_context():
+            _, outputs = _search_space()
+            vs_lst.append(se.random_specify(outputs))
+    return vs_lst
+
+
+@pytest.fixture(params=[None, 0.0, np.inf])
+def fork_time_per_elem(request, monkeypatch):
+    # forces the copies to be made by forking (0.0) or by creating the search
+    # space again (np.inf), or lets the times measured decide (None).
+    init = se._StateCopier.__init__
+
+    def init_with_fork_time(self, search_space_fn):
+        init(self, search_space_fn)
+        self.fork_time_per_elem = request.param
+
+    monkeypatch.setattr(se._StateCopier, '__init__', init_with_fork_time)
+    return request.param
+
+
+def test_specify_many(fork_time_per_elem):
+    vs_lst = _get_value_lsts(16, 0)
+    # some lists share prefixes and some are repeated.
+    assert len(set(map(tuple, vs_lst))) < len(vs_lst)
+    idxs = []
+    for i, inputs, outputs in se.specify_many(_search_space, vs_lst):
+        assert co.is_specified(outputs)
+        assert co.jsonify(inputs, outputs) == _get_jsonified(vs_lst[i])
+        idxs.append(i)
+    assert sorted(idxs) == list(range(len(vs_lst)))
+
+
+def test_specify_idxs_many(fork_time_per_elem):
+    vs_lst = _get_value_lsts(16, 0)
+    idxs_lst = []
+    for vs in vs_lst:
+        with co.scope_context():
+            _, outputs = _search_space()
+            idxs_lst.append(se.specify(outputs, vs, return_idxs=True))
+    idxs = []
+    for i, inputs, outputs, vs in se.specify_idxs_many(_search_space,
+                                                       idxs_lst):
+        assert vs == vs_lst[i]
+        assert co.jsonify(inputs, outputs) == _get_jsonified(vs_lst[i])
+        idxs.append(i)
+    assert sorted(idxs) == list(range(len(vs_lst)))
+
+
+def test_specify_many_not_enough_values():
+    vs_lst = _get_value_lsts(4, 0)
+    for vs_lst in [vs_lst + [vs_lst[0][:-1]], [vs_lst[0][:-1]]]:
+        with pytest.raises(ValueError):
+            for _ in se.specify_many(_search_space, vs_lst):
+                pass
+
+
+def test_specify_many_restores_default_scope():
+    vs_lst = _get_value_lsts(4, 0)
+    scope = co.Scope()
+    with co.scope_context(scope):
+        for _ in se.specify_many(_search_space, vs_lst):
+            pass
+        assert co.Scope.get_default_scope() is scope
+
+        # also when the generator is closed before finishing.
+        gen = se.specify_many(_search_space, vs_lst)
+        next(gen)
+        assert co.Scope.get_default_scope() is not scope
+        gen.close()
+        assert co.Scope.get_default_scope() is scope
+
+
+class _RestructuringModule(co.Module):
+    # stands for a module that changes the structure of the search space when
+    # its hyperparameter is assigned without being a substitution module.
+
+    def __init__(self, h):
+        co.Module.__init__(self)
+        self._register(['in'], ['out'], {'h': h})
+
+    def _update(self):
+        pass
+
+
+def test_is_structural():
+    co.Scope.reset_default_scope()
+    h_or = D([0, 1])
+    mo.siso_or([mo.identity, mo.identity], h_or)
+    h_agg = D([1, 2])
+    mo.hyperparameter_aggregator({'h': h_agg})
+    h_dep = D([1, 2])
+    h = co.DependentHyperparameter(lambda x: 2 * x, {'x': h_dep})
+    mo.hyperparameter_aggregator({'h': h})
+    h_custom = D([1, 2])
+    _RestructuringModule(h_custom)
+
+    # the substitution modules are structural even if all their choices lead
+    # to the same structure.
+    assert se._is_structural(h_or)
+    assert se._is_structural(h_dep)
+    assert not se._is_structural(h_agg)
+    # only known substitution modules are detected.
+    assert not se._is_structural(h_custom)
+
+
+def test_decision_trie():
+    co.Scope.reset_default_scope()
+    search_space_fn = mo.SearchSpaceFactory(_search_space).get_search_space
+    trie = se.DecisionTrie(search_space_fn)
+    np.random.seed(0)
+    vs_lst = [trie.random_specify() for _ in range(16)]
+    assert vs_lst == _get_value_lsts(16, 0)
+    for vs in vs_lst:
+        inputs, outputs = search_space_fn()
+        se.specify(outputs, vs)
+        assert trie.get_features(vs) == suco.extract_features(inputs, outputs)
+
+
+def _get_searchers():
+    return [
+        RandomSearcher(_search_space),
+        EvolutionSearcher(_search_space, mutatable, 4, 2),
+        MCTSSearcher(_search_space),
+        SuccessiveNarrowing(_search_space, 8, 0.5, True),
+    ]
+
+
+@pytest.mark.parametrize('idx', range(4))
+def test_sample_batch(idx):
+    results = []
+    for num_workers in [None, 1, 2]:
+        np.random.seed(0)
+        searcher = _get_searchers()[idx]
+        state = np.random.get_state()
+        samples = searcher.sample_batch(8, num_workers=num_workers, seed=1)
+        # the state of the generators is not changed.
+        assert np.all(np.random.get_state()[1] == state[1])
+        results.append(samples)
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+
+
+def test_sample_batch_seed():
+    searcher = RandomSearcher(_search_space)
+    samples = searcher.sample_batch(4, seed=0)
+    assert searcher.sample_batch(4, seed=0) == samples
+    assert [
+        se.sample_with_seed(searcher, s) for s in se.get_sample_seeds(4, 0)
+    ] == samples
+
+
+@pytest.mark.parametrize('num_workers', [None, 2])
+def test_successive_narrowing_sample_batch(num_workers):
+    np.random.seed(0)
+    searcher = SuccessiveNarrowing(_search_space, 8, 0.5, True)
+    samples = [searcher.sample()[2:] for _ in range(8)]
+    searcher.idx = 0
+    assert searcher.sample_batch(8, num_workers=num_workers) == samples
@@ -0,0 +1,229 @@
+import numpy as np
+import pytest
+
+import deep_architect.modules as mo
+import deep_architect.utils as ut
+from deep_architect.hyperparameters import D
+from deep_architect.searchers.mcts import MCTSSearcher, MCTSTree
+
+
+def _search_space():
+    return mo.siso_sequential([
+        mo.siso_or([
+            lambda: mo.hyperparameter_aggregator({'a': D([1, 2])}),
+            lambda: mo.siso_repeat(
+                lambda: mo.hyperparameter_aggregator({'b': D([3, 4])}),
+                D([1, 2])),
+        ], D([0, 1])),
+        mo.hyperparameter_aggregator({'c': D([5, 6, 7])}),
+    ])
+
+
+def _run(searcher, num_samples):
+    samples = []
+    for _ in range(num_samples):
+        _, _, vs, token = searcher.sample()
+        searcher.update(float(sum(vs)) / 20.0, token)
+        samples.append(vs)
+    return samples
+
+
+def test_tree_expand():
+    tree = MCTSTree(capacity=2)
+    tree.expand(0, 3)
+    tree.expand(tree.get_child(0, 1), 2)
+    assert tree.num_nodes == 6
+    assert len(tree.parent) >= 6
+    assert tree.parent[:6].tolist() == [-1, 0, 0, 0, 2, 2]
+    assert not tree.is_leaf(0) and not tree.is_leaf(2)
+    assert tree.is_leaf(1) and tree.is_leaf(5)
+    assert tree.get_child(2, 1) == 5
+
+
+def test_best_child():
+    tree = MCTSTree()
+    tree.expand(0, 3)
+    tree.update_stats(np.array([0, 1]), 1.0)
+    tree.update_stats(np.array([0, 2]), 0.5)
+    # the child that has not been tried is chosen first.
+    assert tree.best_child(0, 1.0) == (3, 2)
+    tree.update_stats(np.array([0, 3]), 0.0)
+    tree.update_stats(np.array([0, 1]), 0.0)
+    # the first child has mean 0.5 over 2 trials and the others have 0.5 and
+    # 0.0 over 1 trial, so the exploration term decides.
+    assert tree.best_child(0, 1.0) == (2, 1)
+    # without exploration, the tie between the means is broken at random.
+    assert tree.best_child(0, 0.0) in [(1, 0), (2, 1)]
+
+
+def test_best_child_with_pending():
+    tree = MCTSTree()
+    tree.expand(0, 3)
+    tree.update_stats(np.array([0, 1]), 1.0)
+    tree.update_stats(np.array([0, 2]), 0.5)
+    tree.update_stats(np.array([0, 3]), 0.5)
+    tree.add_pending(np.array([0, 1]), 3)
+    # the pending evaluations count as trials with the mean of the child
+    # minus the virtual loss, i.e., (1.0 + 3 * (1.0 - 0.6)) / 4 = 0.55 and
+    # (1.0 + 3 * (1.0 - 0.8)) / 4 = 0.4.
+    assert tree.best_child(0, 0.0, 0.0) == (1, 0)
+    assert tree.best_child(0, 0.0, 0.6) == (1, 0)
+    assert tree.best_child(0, 0.0, 0.8) in [(2, 1), (3, 2)]
+    # children without results count them with the mean of the node.
+    tree.expand(1, 2)
+    tree.update_stats(np.array([1, 4]), 1.0)
+    tree.add_pending(np.array([1, 5]), 1)
+    assert tree.best_child(1, 0.0, 0.0) in [(4, 0), (5, 1)]
+    assert tree.best_child(1, 0.0, 0.1) == (4, 0)
+
+
+def test_save_and_load_state(tmpdir):
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space)
+    _run(searcher, 32)
+    searcher.save_state(str(tmpdir))
+    other = MCTSSearcher(_search_space)
+    other.load_state(str(tmpdir))
+    n = searcher.mcts_tree.num_nodes
+    assert other.mcts_tree.num_nodes == n
+    for name in ['parent', 'first_child', 'num_children', 'num_trials',
+                 'sum_scores']:
+        assert np.array_equal(
+            getattr(other.mcts_tree, name)[:n],
+            getattr(searcher.mcts_tree, name)[:n])
+
+    # both searchers continue in the same way.
+    np.random.seed(1)
+    samples = _run(searcher, 16)
+    np.random.seed(1)
+    assert _run(other, 16) == samples
+
+
+def test_load_legacy_state(tmpdir):
+    # nested (num_trials, sum_scores, children) tuples.
+    serialization = (3, 1.5, [(2, 1.0, [(1, 0.5, []), (1, 0.5, [])]),
+                              (1, 0.5, [])])
+    ut.write_jsonfile({'mcts_root_node': serialization},
+                      ut.join_paths([str(tmpdir), 'mcts_searcher_state.json']))
+    searcher = MCTSSearcher(_search_space)
+    searcher.load_state(str(tmpdir))
+    tree = searcher.mcts_tree
+    assert tree.num_nodes == 5
+    assert tree.num_trials[:5].tolist() == [3, 2, 1, 1, 1]
+    assert tree.sum_scores[:5].tolist() == [1.5, 1.0, 0.5, 0.5, 0.5]
+    assert [tree.num_children[i] for i in range(5)] == [2, 2, 0, 0, 0]
+    assert tree.parent[tree.get_child(1, 0)] == 1
+
+
+def test_virtual_loss():
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space, virtual_loss=0.0)
+    tokens = [searcher.sample()[3] for _ in range(8)]
+    tree = searcher.mcts_tree
+    assert tree.num_pending[0] == 8
+    # each child counts the models sampled through it.
+    for i in range(tree.num_children[0]):
+        assert tree.num_pending[tree.get_child(0, i)] == sum(
+            token['tree_hist'][0] == i for token in tokens)
+    for token in tokens:
+        searcher.update(0.5, token)
+    assert tree.num_pending[:tree.num_nodes].sum() == 0
+    assert tree.num_trials[0] == 8
+
+
+def test_load_state_resets_pending(tmpdir):
+    np.random.seed(0)
+    searcher = MCTSSearcher(_search_space, virtual_loss=0.0)
+    _run(searcher, 8)
+    tokens = [searcher.sample()[3] for _ in range(4)]
+    searcher.save_state(str(tmpdir))
+
+    other = MCTSSearcher(_search_space, virtual_loss=0.0)
+    other.load_state(str(tmpdir))
+    tree = other.mcts_tree
+    assert tree.num_pending[:tree.num_nodes].sum() == 0
+    new_tokens = [other.sample()[3] for _ in range(4)]
+    assert tree.num_pending[0] == 4
+    # the results of the models sampled before the state was saved only
+    # update the statistics.
+    for token in tokens + new_tokens:
+        other.update(0.5, token)
+    assert tree.num_pending[:tree.num_nodes].sum() == 0
+    assert tree.num_trials[0] == 16
+
+
+def _shared_search_space():
+    # the two branches lead to the same search space.
+    return mo.siso_sequential([
+        mo.siso_or([
+            lambda: mo.hyperparameter_aggregator({'a': D([1, 2])}),
+            lambda: mo.hyperparameter_aggregator({'a': D([1, 2])}),
+        ], D([0, 1])),
+        mo.hyperparameter_aggregator({'c': D([5, 6, 7])}),
+    ])
+
+
+def test_transposition_table():
+    np.random.seed(0)
+    searcher = MCTSSearcher(_shared_search_space,
+                            transposition_table_size=16,
+                            virtual_loss=0.0)
+    tokens = []
+    for _ in range(64):
+        tokens.append(searcher.sample()[3])
+        if len(tokens) > 4:
+            searcher.update(0.5, tokens.pop(0))
+    for token in tokens:
+        searcher.update(0.5, token)
+    tree = searcher.mcts_tree
+    n = tree.num_nodes
+    canonical = tree.canonical[:n]
+    assert ((canonical >= 0) & (canonical != np.arange(n))).sum() > 0
+    assert tree.num_pending[:n].sum() == 0
+    assert tree.num_trials[0] == 64
+
+
+def _captured_search_space():
+    h = D([1, 2])
+    return mo.siso_sequential([
+        mo.siso_repeat(lambda: mo.hyperparameter_aggregator({'a': h}),
+                       D([1, 2])),
+        mo.siso_optional(mo.identity, D([0, 1])),
+    ])
+
+
+def test_transposition_table_with_captured_hyperparameters(tmpdir):
+    np.random.seed(0)
+    searcher = MCTSSearcher(_captured_search_space,
+                            transposition_table_size=16)
+    _run(searcher, 16)
+    tree = searcher.mcts_tree
+    # both values of the optional hyperparameter give an identity module, so
+    # the two children of the root reach the same partial search space.
+    assert tree.num_children[0] == 2
+    assert tree.get_canonical(1) == tree.get_canonical(2)
+
+    folderpath = str(tmpdir)
+    searcher.save_state(folderpath)
+    new_searcher = MCTSSearcher(_captured_search_space,
+                                transposition_table_size=16)
+    new_searcher.load_state(folderpath)
+    assert new_searcher._node_to_domain == searcher._node_to_domain
+    _run(new_searcher, 4)
+
+
+def test_get_path_stops_at_repeated_node():
+    searcher = MCTSSearcher(_search_space, transposition_table_size=16)
+    tree = searcher.mcts_tree
+    tree.expand(0, 2)
+    tree.expand(1, 2)
+    # the first child of node 1 was found to be the same as node 1 in an
+    # earlier walk.
+    tree.set_canonical(1, 1)
+    tree.set_canonical(3, 1)
+    path = searcher._get_path([0, 0])
+    assert path.tolist() == [0, 1, 3]
+    searcher.update(0.5, {'tree_hist': [0, 0], 'rollout_hist': []})
+    assert tree.num_trials[[0, 1, 3]].tolist() == [1, 1, 1]
+    with pytest.raises(AssertionError):
+        tree.update_stats(np.array([0, 1, 1]), 0.5)
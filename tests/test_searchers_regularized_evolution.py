@@ -0,0 +1,131 @@
+import random
+
+import numpy as np
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.utils as ut
+import deep_architect.searchers.common as se
+import deep_architect.searchers.regularized_evolution as re
+from deep_architect.hyperparameters import D
+
+
+def _search_space():
+    return mo.siso_sequential([
+        mo.hyperparameter_aggregator({'a': D([1, 2, 3])}),
+        mo.hyperparameter_aggregator({'b': D([4])}),
+        mo.hyperparameter_aggregator({'c': D([5, 5, 6])}),
+    ])
+
+
+def _get_searcher():
+    return re.EvolutionSearcher(_search_space, re.mutatable, 4, 2)
+
+
+def _run(searcher, num_samples):
+    tokens = []
+    for i in range(num_samples):
+        _, _, vs, token = searcher.sample()
+        assert token['all_vs'] == vs
+        searcher.update(float(sum(vs)), token)
+        tokens.append(token)
+    return tokens
+
+
+def test_tokens_have_values_and_idxs():
+    random.seed(0)
+    np.random.seed(0)
+    for token in _run(_get_searcher(), 12):
+        with co.scope_context():
+            _, outputs = _search_space()
+            assert se.specify_idxs(outputs,
+                                   token['all_idxs']) == token['all_vs']
+        assert token['user_vs'] == [token['all_vs'][0], token['all_vs'][2]]
+        assert token['user_idxs'] == [
+            token['all_idxs'][0], token['all_idxs'][2]
+        ]
+
+
+def test_mutate_changes_value():
+    random.seed(0)
+    for _ in range(20):
+        # the hyperparameters are visited from the output, and the current
+        # value of the first one appears twice in its list of values.
+        a_idx = random.randint(0, 2)
+        with co.scope_context():
+            _, outputs = _search_space()
+            _, _, user_vs, _, _, _ = re.mutate(outputs, [0, a_idx],
+                                               [0, 0, a_idx], re.mutatable,
+                                               _search_space)
+        assert (user_vs[0] != 5) + (user_vs[1] != a_idx + 1) == 1
+
+
+def test_update_with_values_only():
+    random.seed(0)
+    np.random.seed(0)
+    searcher = _get_searcher()
+    other = _get_searcher()
+    for _ in range(8):
+        _, _, vs, token = searcher.sample()
+        other.initializing = searcher.initializing
+        searcher.update(float(sum(vs)), token)
+        other.update(float(sum(vs)), {
+            'user_vs': token['user_vs'],
+            'all_vs': token['all_vs']
+        })
+    assert other.get_best(4) == searcher.get_best(4)
+
+
+def test_save_and_load_state(tmpdir):
+    random.seed(0)
+    np.random.seed(0)
+    searcher = _get_searcher()
+    _run(searcher, 6)
+    searcher.save_state(str(tmpdir))
+    other = _get_searcher()
+    other.load_state(str(tmpdir))
+    assert [(x[1].tolist(), x[2]) for x in searcher.population
+           ] == [(x[1].tolist(), x[2]) for x in other.population]
+    assert other.get_best(2) == searcher.get_best(2)
+
+    # states with the values of the architectures are also read.
+    filepath = ut.join_paths([str(tmpdir), 'evolution_searcher.json'])
+    state = ut.read_jsonfile(filepath)
+    state['population'] = [
+        ([vs[0], vs[2]], vs, val)
+        for (val, vs) in searcher.get_best(len(searcher.population))
+    ]
+    del state['population_idxs']
+    ut.write_jsonfile(state, filepath)
+    other = _get_searcher()
+    other.load_state(str(tmpdir))
+    assert other.get_best(2) == searcher.get_best(2)
+
+
+def test_default_scope_is_unchanged(tmpdir):
+    random.seed(0)
+    np.random.seed(0)
+    searcher = _get_searcher()
+    tokens = _run(searcher, 6)
+    searcher.save_state(str(tmpdir))
+    filepath = ut.join_paths([str(tmpdir), 'evolution_searcher.json'])
+    state = ut.read_jsonfile(filepath)
+    state['population'] = [
+        ([vs[0], vs[2]], vs, val)
+        for (val, vs) in searcher.get_best(len(searcher.population))
+    ]
+    del state['population_idxs']
+    ut.write_jsonfile(state, filepath)
+
+    # converting the values of the architectures to positions and getting
+    # the best architectures create the search spaces in their own scopes.
+    with co.scope_context() as scope:
+        other = _get_searcher()
+        other.load_state(str(tmpdir))
+        other.update(1.0, {
+            'user_vs': tokens[0]['user_vs'],
+            'all_vs': tokens[0]['all_vs']
+        })
+        other.get_best(2)
+        assert co.Scope.get_default_scope() is scope
+        assert len(scope.name_to_elem) == 0
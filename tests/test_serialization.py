@@ -0,0 +1,159 @@
+import struct
+
+import numpy as np
+import pytest
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+import deep_architect.serialization as sr
+from deep_architect.hyperparameters import D
+
+
+class _Scale(co.Module):
+
+    def __init__(self, h):
+        co.Module.__init__(self, name='Scale')
+        self._register(['in'], ['out'], {'k': h})
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        self.outputs['out'].val = self.inputs['in'].val * self.hyperps['k'].val
+
+
+class _Sum(co.Module):
+
+    def __init__(self, input_names):
+        co.Module.__init__(self, name='Sum')
+        self._register(input_names, ['out'], {})
+
+    def _compile(self):
+        pass
+
+    def _forward(self):
+        self.outputs['out'].val = sum(ix.val for ix in self.inputs.values())
+
+
+def _search_space():
+    return mo.siso_sequential([
+        _Scale(D([1, 2, 3])).get_io(),
+        mo.siso_optional(mo.identity, D([0, 1])),
+        mo.siso_split_combine(
+            lambda: _Scale(D([2, 3])).get_io(),
+            lambda num_splits: _Sum(['in%d' % i for i in range(num_splits)]).
+            get_io(), D([2, 3])),
+        mo.hyperparameter_aggregator({'a': D([4, 5])}),
+        mo.siso_repeat(lambda: _Scale(D([1, 2])).get_io(), D([1, 2])),
+    ])
+
+
+# the hyperparameters of the modules are assigned the values by build_graph.
+_module_type_to_fn = {
+    'Scale': lambda dh, input_names, output_names: _Scale(D([dh['k']])).get_io(),
+    'Sum': lambda dh, input_names, output_names: _Sum(input_names).get_io(),
+}
+
+
+def _get_specified_search_space(seed):
+    np.random.seed(seed)
+    inputs, outputs = _search_space()
+    se.random_specify(outputs)
+    return inputs, outputs
+
+
+def _get_modules_without_names(inputs, outputs):
+    # describes the modules in evaluation order without the names in the
+    # scope, which differ for the rebuilt graph.
+    graph = co.jsonify(inputs, outputs)
+    name_to_idx = {
+        name: idx for idx, name in enumerate(graph['module_eval_seq'])
+    }
+    ms = []
+    for name in graph['module_eval_seq']:
+        m = graph['modules'][name]
+        ms.append((m['module_type'], m['hyperp_name_to_val'],
+                   sorted(m['input_names']), sorted(m['output_names']),
+                   sorted(name_to_idx[x] for x in m['in_modules']),
+                   sorted(name_to_idx[x] for x in m['out_modules'])))
+    return ms, sorted(graph['unconnected_inputs']), sorted(
+        graph['unconnected_outputs'])
+
+
+def _forward(inputs, outputs, module_seq=None):
+    co.forward({inputs['in']: 2}, module_seq)
+    return outputs['out'].val
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_serialize_build_graph(seed):
+    with co.scope_context():
+        inputs, outputs = _get_specified_search_space(seed)
+        data = sr.serialize(inputs, outputs)
+        ms = _get_modules_without_names(inputs, outputs)
+        fp = co.fingerprint(inputs, outputs)
+        val = _forward(inputs, outputs)
+    with co.scope_context():
+        new_inputs, new_outputs, module_seq = sr.build_graph(
+            data, _module_type_to_fn)
+        assert co.is_specified(new_outputs)
+        assert module_seq == co.determine_module_eval_seq(new_inputs)
+        assert _get_modules_without_names(new_inputs, new_outputs) == ms
+        assert co.fingerprint(new_inputs, new_outputs) == fp
+        assert _forward(new_inputs, new_outputs, module_seq) == val
+        # encoding the rebuilt graph gives the same architecture up to the
+        # names of the modules.
+        a = sr.deserialize(data)
+        new_a = sr.deserialize(sr.serialize(new_inputs, new_outputs))
+        assert new_a.module_names == [m.get_name() for m in module_seq]
+        for attr in sr.Architecture.__slots__:
+            if attr != 'module_names':
+                assert getattr(new_a, attr) == getattr(a, attr)
+
+
+def test_deserialize():
+    with co.scope_context():
+        inputs, outputs = _get_specified_search_space(0)
+        a = sr.deserialize(sr.serialize(inputs, outputs))
+        module_seq = co.determine_module_eval_seq(inputs)
+        assert a.module_names == [m.get_name() for m in module_seq]
+        for i, m in enumerate(module_seq):
+            assert a.get_hyperp_values(i) == m._get_hyperp_values()
+            start, end = a.input_offsets[i], a.input_offsets[i + 1]
+            assert a.input_names[start:end] == list(m.inputs)
+
+
+def test_build_graph_with_default_modules():
+    with co.scope_context():
+        inputs, outputs = mo.siso_sequential(
+            [mo.identity(),
+             mo.hyperparameter_aggregator({'a': D([4, 5])})])
+        se.random_specify(outputs)
+        data = sr.serialize(inputs, outputs)
+        ms = _get_modules_without_names(inputs, outputs)
+    with co.scope_context():
+        new_inputs, new_outputs, _ = sr.build_graph(data, {})
+        assert _get_modules_without_names(new_inputs, new_outputs) == ms
+
+
+def test_build_graph_with_unknown_module_type():
+    with co.scope_context():
+        data = sr.serialize(*_get_specified_search_space(0))
+    with co.scope_context():
+        with pytest.raises(ValueError, match='Scale'):
+            sr.build_graph(data, {})
+
+
+def test_deserialize_rejects_other_data():
+    with co.scope_context():
+        data = sr.serialize(*_get_specified_search_space(0))
+    with pytest.raises(ValueError, match='Not a serialized architecture'):
+        sr.deserialize(b'XXXX' + data[4:])
+    with pytest.raises(ValueError, match='Not a serialized architecture'):
+        sr.deserialize(b'{"modules": {}}')
+    new_data = data[:4] + struct.pack('<H', sr._VERSION + 1) + data[6:]
+    with pytest.raises(ValueError, match='Unsupported serialization version'):
+        sr.deserialize(new_data)
+    with pytest.raises(ValueError, match='Unsupported serialization version'):
+        sr.build_graph(new_data, _module_type_to_fn)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+import deep_architect.core as co
+import deep_architect.modules as mo
+import deep_architect.searchers.common as se
+from deep_architect.hyperparameters import D
+from deep_architect.searchers.smbo_random import SMBOSearcher
+from deep_architect.surrogates.common import SurrogateModel, extract_features
+from deep_architect.surrogates.dummy import DummySurrogate
+from deep_architect.surrogates.hashing import HashingSurrogate
+
+
+def _search_space():
+    return mo.siso_sequential([
+        mo.siso_or([
+            lambda: mo.hyperparameter_aggregator({'a': D([1, 2])}),
+            lambda: mo.siso_repeat(
+                lambda: mo.hyperparameter_aggregator({'b': D([3, 4])}),
+                D([1, 2])),
+        ], D([0, 1])),
+        mo.hyperparameter_aggregator({'c': D([5, 6])}),
+    ])
+
+
+def _get_feats_lst(num_feats):
+    # the search spaces are created as in the searchers.
+    search_space_fn = mo.SearchSpaceFactory(_search_space).get_search_space
+    feats_lst = []
+    for _ in range(num_feats):
+        with co.scope_context():
+            inputs, outputs = search_space_fn()
+            se.random_specify(outputs)
+            feats_lst.append(extract_features(inputs, outputs))
+    return feats_lst
+
+
+class _LengthSurrogate(SurrogateModel):
+    # scores the architectures by their number of features and counts the
+    # calls.
+
+    def __init__(self):
+        self.num_evals = 0
+        self.num_eval_batches = 0
+
+    def eval(self, feats):
+        self.num_evals += 1
+        return float(sum(len(fs) for fs in feats.values()))
+
+    def eval_batch(self, feats_lst):
+        self.num_eval_batches += 1
+        return SurrogateModel.eval_batch(self, feats_lst)
+
+    def update(self, val, feats):
+        pass
+
+
+@pytest.mark.parametrize('surr_model', [
+    DummySurrogate(),
+    HashingSurrogate(64, 4),
+    HashingSurrogate(64, 4, use_connection_feats=False),
+])
+def test_eval_batch(surr_model):
+    np.random.seed(0)
+    feats_lst = _get_feats_lst(16)
+    assert surr_model.eval_batch([]) == []
+    for i, feats in enumerate(feats_lst):
+        assert np.allclose(surr_model.eval_batch(feats_lst),
+                           [surr_model.eval(x) for x in feats_lst])
+        surr_model.update(float(i), feats)
+
+
+def test_smbo_scores_candidates_in_a_batch():
+    surr_model = _LengthSurrogate()
+    searcher = SMBOSearcher(_search_space, surr_model, 8, 0.0)
+    for seed in range(4):
+        np.random.seed(seed)
+        inputs, outputs, _, _ = searcher.sample()
+        assert co.is_specified(outputs)
+        score = surr_model.eval(extract_features(inputs, outputs))
+
+        # the candidates are drawn after the exploration draw.
+        np.random.seed(seed)
+        np.random.rand()
+        assert score == max(surr_model.eval(feats)
+                            for feats in _get_feats_lst(8))
+    assert surr_model.num_eval_batches == 4